@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""Benchmark of `remove_samples`
+
+Removes a fixed range of samples at different positions of files of
+different lengths. Run time should follow the number of bytes after the
+removed range, peak memory should stay bounded by the block size.
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import tracemalloc
+import numpy as np
+
+from pyplanter import PlantedH5
+
+
+def make_file(f_path:str, nb_channels:int, nb_samples:int, block:int=2**18) -> PlantedH5:
+    planter = PlantedH5()
+    planter.create(f_path, sampl_freq=2000)
+    planter.create_dataset(np.zeros((nb_channels, 0), dtype='<f4'))
+
+    for start in range(0, nb_samples, block):
+        length = min(block, nb_samples - start)
+        planter.add_samples(np.random.standard_normal((nb_channels, length)).astype('<f4'))
+
+    return planter
+
+
+def run(nb_channels:int, lengths:list, removed:int, block_bytes:int):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for nb_samples in lengths:
+            for position in (0.1, 0.5, 0.9):
+                f_path = os.path.join(tmp_dir, f'bench_{nb_samples}_{position}.h5')
+                planter = make_file(f_path, nb_channels, nb_samples)
+
+                start = int(position * nb_samples)
+                tail_mb = (nb_samples - start - removed) * nb_channels * 4 / 2**20
+
+                tracemalloc.start()
+                t_start = time.perf_counter()
+                planter.remove_samples((start, start + removed), block_bytes=block_bytes)
+                elapsed = time.perf_counter() - t_start
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                file_mb = nb_channels * nb_samples * 4 / 2**20
+                print(f'file {file_mb:9.1f} MB | tail {tail_mb:9.1f} MB | {elapsed:7.3f} s | peak {peak / 2**20:7.1f} MB')
+
+                planter.close()
+                os.remove(f_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--channels', type=int, default=64)
+    parser.add_argument('--lengths', type=int, nargs='+', default=[500_000, 2_000_000])
+    parser.add_argument('--removed', type=int, default=10_000)
+    parser.add_argument('--block-bytes', type=int, default=16 * 2**20)
+    args = parser.parse_args()
+
+    run(args.channels, args.lengths, args.removed, args.block_bytes)
+
+
+if __name__ == '__main__':
+    main()
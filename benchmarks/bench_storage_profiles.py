@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""Benchmark matrix of `Data` storage profiles
+
+For every profile in `STORAGE_PROFILES` reports write throughput, read
+latency of a time window over all channels, read latency of a full scan
+of a single channel and resulting file size.
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import numpy as np
+
+from pyplanter import PlantedH5
+from pyplanter.config.config import STORAGE_PROFILES
+
+
+def synthetic_data(nb_channels:int, nb_samples:int) -> np.ndarray:
+    """Noisy sinusoids; compressible roughly like physiological signals"""
+    time_axis = np.arange(nb_samples) / 2000
+    freqs = np.linspace(1, 40, nb_channels)[:, None]
+    noise = np.random.standard_normal((nb_channels, nb_samples)) * 0.05
+
+    return (np.sin(2 * np.pi * freqs * time_axis) + noise).astype('<f4')
+
+
+def run_profile(f_path:str, profile:str, data_arr:np.ndarray, window:int, nb_reads:int) -> dict:
+    planter = PlantedH5()
+    planter.create(f_path, sampl_freq=2000, storage_profile=profile)
+    planter.create_dataset(data_arr[:, :0])
+
+    t_start = time.perf_counter()
+    with planter.stream_writer() as writer:
+        writer.write(data_arr)
+    planter.close()
+    write_time = time.perf_counter() - t_start
+
+    planter.open(f_path, mode='r')
+    dset = planter.f_obj['Data']
+    starts = np.random.randint(0, data_arr.shape[1] - window, nb_reads)
+
+    t_start = time.perf_counter()
+    for start in starts:
+        dset[:, start:start + window]
+    window_time = (time.perf_counter() - t_start) / nb_reads
+
+    t_start = time.perf_counter()
+    dset[data_arr.shape[0] // 2, :]
+    channel_time = time.perf_counter() - t_start
+
+    planter.close()
+
+    return {
+        'profile': profile,
+        'write_mb_s': data_arr.nbytes / 2**20 / write_time,
+        'window_ms': window_time * 1e3,
+        'channel_ms': channel_time * 1e3,
+        'size_mb': os.path.getsize(f_path) / 2**20,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--channels', type=int, default=64)
+    parser.add_argument('--nb-samples', type=int, default=1_000_000)
+    parser.add_argument('--window', type=int, default=20_000)
+    parser.add_argument('--nb-reads', type=int, default=20)
+    parser.add_argument('--profiles', nargs='+', default=list(STORAGE_PROFILES))
+    args = parser.parse_args()
+
+    data_arr = synthetic_data(args.channels, args.nb_samples)
+
+    print(f'{"profile":>14} | {"write MB/s":>10} | {"window ms":>9} | {"channel ms":>10} | {"size MB":>8}')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for profile in args.profiles:
+            result = run_profile(os.path.join(tmp_dir, profile + '.h5'), profile, data_arr, args.window, args.nb_reads)
+            print(f'{profile:>14} | {result["write_mb_s"]:10.1f} | {result["window_ms"]:9.2f} | {result["channel_ms"]:10.2f} | {result["size_mb"]:8.1f}')
+
+
+if __name__ == '__main__':
+    main()
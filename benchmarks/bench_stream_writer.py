@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""Benchmark of sustained write rate during acquisition
+
+Appends small blocks of samples either by repeated `add_samples` calls
+or through a `stream_writer` session and reports samples per second.
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import numpy as np
+
+from pyplanter import PlantedH5
+
+
+def run_add_samples(f_path:str, blocks:np.ndarray, nb_blocks:int) -> float:
+    planter = PlantedH5()
+    planter.create(f_path, sampl_freq=2000)
+    planter.create_dataset(blocks[:, :0])
+
+    t_start = time.perf_counter()
+    for _ in range(nb_blocks):
+        planter.add_samples(blocks)
+    planter.close()
+
+    return time.perf_counter() - t_start
+
+
+def run_stream_writer(f_path:str, blocks:np.ndarray, nb_blocks:int, block_samples:int) -> float:
+    planter = PlantedH5()
+    planter.create(f_path, sampl_freq=2000)
+    planter.create_dataset(blocks[:, :0])
+
+    t_start = time.perf_counter()
+    with planter.stream_writer(block_samples=block_samples) as writer:
+        for _ in range(nb_blocks):
+            writer.write(blocks)
+    planter.close()
+
+    return time.perf_counter() - t_start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--channels', type=int, default=64)
+    parser.add_argument('--block', type=int, nargs='+', default=[50, 200])
+    parser.add_argument('--nb-samples', type=int, default=2_000_000)
+    parser.add_argument('--block-samples', type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        f_path = os.path.join(tmp_dir, 'bench.h5')
+
+        for block in args.block:
+            blocks = np.random.standard_normal((args.channels, block)).astype('<f4')
+            nb_blocks = args.nb_samples // block
+
+            elapsed = run_add_samples(f_path, blocks, nb_blocks)
+            print(f'add_samples   | block {block:5d} | {nb_blocks * block / elapsed:12.0f} samples/s')
+
+            elapsed = run_stream_writer(f_path, blocks, nb_blocks, args.block_samples)
+            print(f'stream_writer | block {block:5d} | {nb_blocks * block / elapsed:12.0f} samples/s')
+
+
+if __name__ == '__main__':
+    main()
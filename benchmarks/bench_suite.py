@@ -0,0 +1,524 @@
+#!/usr/bin/env python
+"""Benchmark suite of the main operations of `PlantedH5`
+
+For every scale a synthetic recording is built from noisy sinusoids,
+then each case runs in a fresh process, so that peak RSS belongs to
+that case only. Cases that modify the recording work on a copy of it.
+Results are printed as a table of throughput and peak RSS and can be
+saved as JSON. `--baseline` compares the results with an earlier JSON
+file, `--compare` compares two saved files without running anything;
+both exit with status 1 if any case regressed by more than `--threshold`.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import multiprocessing
+import h5py as h
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from pyplanter import PlantedH5
+
+
+SCALES = {
+    'small': {'channels': 8, 'duration': 60, 'fs': 2000, 'marks': 1_000},
+    'medium': {'channels': 64, 'duration': 3_600, 'fs': 1000, 'marks': 20_000},
+    'large': {'channels': 256, 'duration': 86_400, 'fs': 250, 'marks': 200_000},
+}
+
+# in-memory array of `create_dataset` and block of large appends
+CREATE_BYTES = 256 * 2**20
+LARGE_BLOCK_BYTES = 64 * 2**20
+
+MARK_GROUPS = 8
+
+
+def nb_samples_of(scale:dict) -> int:
+    return int(scale['duration'] * scale['fs'])
+
+
+def synthetic_data(nb_channels:int, nb_samples:int, sampl_freq:float, seed:int=0) -> np.ndarray:
+    """Noisy sinusoids; compressible roughly like physiological signals"""
+    rng = np.random.default_rng(seed)
+    time_axis = np.arange(nb_samples) / sampl_freq
+    freqs = np.linspace(1, 40, nb_channels)[:, None]
+
+    data_arr = np.sin(2 * np.pi * freqs * time_axis).astype('<f4')
+    data_arr += rng.standard_normal((nb_channels, nb_samples), dtype=np.float32) * 0.05
+
+    return data_arr
+
+
+def synthetic_marks(nb_marks:int, nb_samples:int, seed:int=0) -> tuple:
+    rng = np.random.default_rng(seed)
+    starts = np.sort(rng.integers(0, max(1, nb_samples - 1000), nb_marks))
+    ends = starts + rng.integers(0, 1000, nb_marks)
+    groups = [f'G{idx % MARK_GROUPS}' for idx in range(nb_marks)]
+
+    return starts, ends, groups
+
+
+def build_recording(f_path:str, scale:dict) -> dict:
+    """Writes recording of scale by large appends; timed as `add_samples_large`"""
+    nb_channels, nb_samples = scale['channels'], nb_samples_of(scale)
+    block = max(1, min(nb_samples, LARGE_BLOCK_BYTES // (nb_channels * 4)))
+    data_arr = synthetic_data(nb_channels, block, scale['fs'])
+
+    planter = PlantedH5()
+    planter.create(f_path, sampl_freq=scale['fs'])
+    planter.create_dataset(data_arr[:, :0])
+
+    t_start = time.perf_counter()
+    for start in range(0, nb_samples, block):
+        planter.add_samples(data_arr[:, :min(block, nb_samples - start)])
+    planter.flush()
+    elapsed = time.perf_counter() - t_start
+
+    planter.add_marks(*synthetic_marks(scale['marks'], nb_samples))
+    planter.close()
+
+    return {'seconds': elapsed, 'amount': nb_channels * nb_samples * 4 / 2**20, 'unit': 'MB'}
+
+
+def case_create_dataset(f_path:str, work_dir:str, scale:dict) -> dict:
+    nb_samples = min(nb_samples_of(scale), CREATE_BYTES // (scale['channels'] * 4))
+    data_arr = synthetic_data(scale['channels'], nb_samples, scale['fs'])
+
+    planter = PlantedH5()
+    planter.create(os.path.join(work_dir, 'create.h5'), sampl_freq=scale['fs'])
+
+    t_start = time.perf_counter()
+    planter.create_dataset(data_arr)
+    planter.flush()
+    elapsed = time.perf_counter() - t_start
+
+    planter.close()
+
+    return {'seconds': elapsed, 'amount': data_arr.nbytes / 2**20, 'unit': 'MB'}
+
+
+def case_add_samples_small(f_path:str, work_dir:str, scale:dict, nb_appends:int) -> dict:
+    block = max(1, int(scale['fs']) // 10)
+    nb_appends = max(1, min(nb_appends, nb_samples_of(scale) // block))
+    data_arr = synthetic_data(scale['channels'], block, scale['fs'])
+
+    planter = PlantedH5()
+    planter.create(os.path.join(work_dir, 'append.h5'), sampl_freq=scale['fs'])
+    planter.create_dataset(data_arr[:, :0])
+
+    t_start = time.perf_counter()
+    for _ in range(nb_appends):
+        planter.add_samples(data_arr)
+    planter.flush()
+    elapsed = time.perf_counter() - t_start
+
+    planter.close()
+
+    return {'seconds': elapsed, 'amount': nb_appends * data_arr.nbytes / 2**20, 'unit': 'MB'}
+
+
+def case_add_channels(f_path:str, work_dir:str, scale:dict, nb_added:int) -> dict:
+    data_arr = synthetic_data(nb_added, nb_samples_of(scale), scale['fs'], seed=1)
+
+    planter = PlantedH5()
+    planter.open(f_path, mode='r+')
+
+    t_start = time.perf_counter()
+    planter.add_channels(data_arr, ch_names=[f'added_{idx}' for idx in range(nb_added)])
+    planter.flush()
+    elapsed = time.perf_counter() - t_start
+
+    planter.close()
+
+    return {'seconds': elapsed, 'amount': data_arr.nbytes / 2**20, 'unit': 'MB'}
+
+
+def case_remove_samples(f_path:str, work_dir:str, scale:dict, removed_s:float) -> dict:
+    nb_samples = nb_samples_of(scale)
+    removed = min(nb_samples // 2, int(removed_s * scale['fs']))
+    start = nb_samples // 2
+
+    planter = PlantedH5()
+    planter.open(f_path, mode='r+')
+
+    t_start = time.perf_counter()
+    planter.remove_samples((start, start + removed))
+    planter.flush()
+    elapsed = time.perf_counter() - t_start
+
+    planter.close()
+
+    # bytes shifted towards the beginning
+    return {'seconds': elapsed, 'amount': (nb_samples - start - removed) * scale['channels'] * 4 / 2**20, 'unit': 'MB'}
+
+
+def case_remove_channel(f_path:str, work_dir:str, scale:dict) -> dict:
+    planter = PlantedH5()
+    planter.open(f_path, mode='r+')
+    ch_name = planter._get_channels()[scale['channels'] // 2]
+
+    t_start = time.perf_counter()
+    planter.remove_channel(ch_name)
+    planter.flush()
+    elapsed = time.perf_counter() - t_start
+
+    planter.close()
+
+    # bytes of remaining channels
+    return {'seconds': elapsed, 'amount': (scale['channels'] - 1) * nb_samples_of(scale) * 4 / 2**20, 'unit': 'MB'}
+
+
+def marks_file(work_dir:str, scale:dict, filled:bool) -> PlantedH5:
+    """File with empty `Data`, optionally holding marks of scale"""
+    planter = PlantedH5()
+    planter.create(os.path.join(work_dir, 'marks.h5'), sampl_freq=scale['fs'])
+    planter.create_dataset(np.zeros((scale['channels'], 0), dtype='<f4'))
+
+    if filled:
+        planter.add_marks(*synthetic_marks(scale['marks'], nb_samples_of(scale)))
+
+    return planter
+
+
+def case_add_marks(f_path:str, work_dir:str, scale:dict) -> dict:
+    marks = synthetic_marks(scale['marks'], nb_samples_of(scale))
+    planter = marks_file(work_dir, scale, filled=False)
+
+    t_start = time.perf_counter()
+    planter.add_marks(*marks)
+    planter.flush()
+    elapsed = time.perf_counter() - t_start
+
+    planter.close()
+
+    return {'seconds': elapsed, 'amount': scale['marks'], 'unit': 'marks'}
+
+
+def case_add_mark(f_path:str, work_dir:str, scale:dict, nb_single:int) -> dict:
+    nb_single = min(nb_single, scale['marks'])
+    starts, ends, groups = synthetic_marks(nb_single, nb_samples_of(scale))
+    planter = marks_file(work_dir, scale, filled=False)
+
+    t_start = time.perf_counter()
+    for start, end, group in zip(starts, ends, groups):
+        planter.add_mark(int(start), int(end), group)
+    planter.flush()
+    elapsed = time.perf_counter() - t_start
+
+    planter.close()
+
+    return {'seconds': elapsed, 'amount': nb_single, 'unit': 'marks'}
+
+
+def case_remove_marks(f_path:str, work_dir:str, scale:dict) -> dict:
+    planter = marks_file(work_dir, scale, filled=True)
+    nb_samples = nb_samples_of(scale)
+
+    t_start = time.perf_counter()
+    planter.remove_marks('G0')
+    planter.remove_marks(sample_range=(nb_samples // 4, nb_samples // 2))
+    planter.flush()
+    elapsed = time.perf_counter() - t_start
+
+    planter.close()
+
+    return {'seconds': elapsed, 'amount': scale['marks'], 'unit': 'marks'}
+
+
+def case_find_marks(f_path:str, work_dir:str, scale:dict, nb_reads:int, window_s:float) -> dict:
+    planter = PlantedH5()
+    planter.open(f_path, mode='r')
+
+    window = int(window_s * scale['fs'])
+    starts = np.random.default_rng(0).integers(0, max(1, nb_samples_of(scale) - window), nb_reads)
+
+    t_start = time.perf_counter()
+    for start in starts:
+        planter.find_marks(group='G1', sample_range=(int(start), int(start) + window))
+    elapsed = time.perf_counter() - t_start
+
+    planter.close()
+
+    return {'seconds': elapsed, 'amount': nb_reads, 'unit': 'queries'}
+
+
+def case_read_window(f_path:str, work_dir:str, scale:dict, nb_reads:int, window_s:float) -> dict:
+    planter = PlantedH5()
+    planter.open(f_path, mode='r')
+
+    window_s = min(window_s, scale['duration'])
+    starts = np.random.default_rng(0).uniform(0, scale['duration'] - window_s, nb_reads)
+
+    t_start = time.perf_counter()
+    nbytes = sum(planter.read(start_s=start, stop_s=start + window_s).nbytes for start in starts)
+    elapsed = time.perf_counter() - t_start
+
+    planter.close()
+
+    return {'seconds': elapsed, 'amount': nbytes / 2**20, 'unit': 'MB'}
+
+
+def case_read_channel(f_path:str, work_dir:str, scale:dict) -> dict:
+    planter = PlantedH5()
+    planter.open(f_path, mode='r')
+
+    t_start = time.perf_counter()
+    nbytes = planter.read(channels=scale['channels'] // 2).nbytes
+    elapsed = time.perf_counter() - t_start
+
+    planter.close()
+
+    return {'seconds': elapsed, 'amount': nbytes / 2**20, 'unit': 'MB'}
+
+
+# name: (function, modifies recording, names of options passed to function)
+CASES = {
+    'create_dataset': (case_create_dataset, False, ()),
+    'add_samples_small': (case_add_samples_small, False, ('small_appends',)),
+    'add_channels': (case_add_channels, True, ('added_channels',)),
+    'remove_samples': (case_remove_samples, True, ('removed_s',)),
+    'remove_channel': (case_remove_channel, True, ()),
+    'add_marks': (case_add_marks, False, ()),
+    'add_mark': (case_add_mark, False, ('single_marks',)),
+    'remove_marks': (case_remove_marks, False, ()),
+    'find_marks': (case_find_marks, False, ('nb_reads', 'window_s')),
+    'read_window': (case_read_window, False, ('nb_reads', 'window_s')),
+    'read_channel': (case_read_channel, False, ()),
+}
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB, None if unknown"""
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # bytes on macOS, kilobytes elsewhere
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+def run_case(name:str, fixture:str, scale:dict, options:dict) -> dict:
+    """Runs single case; executed in a fresh process"""
+    func, modifies, option_names = CASES[name]
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(fixture)) as work_dir:
+        f_path = fixture
+        if modifies:
+            f_path = os.path.join(work_dir, 'recording.h5')
+            shutil.copyfile(fixture, f_path)
+
+        rss_before = peak_rss_mb()
+        result = func(f_path, work_dir, scale, *(options[option] for option in option_names))
+
+    result['peak_rss_mb'] = peak_rss_mb()
+    result['rss_delta_mb'] = None if rss_before is None else result['peak_rss_mb'] - rss_before
+
+    return result
+
+
+def summarize(scale_name:str, scale:dict, case:str, runs:list) -> dict:
+    seconds = float(np.median([run['seconds'] for run in runs]))
+    peaks = [run['peak_rss_mb'] for run in runs if run['peak_rss_mb'] is not None]
+    deltas = [run['rss_delta_mb'] for run in runs if run['rss_delta_mb'] is not None]
+
+    return {
+        'scale': scale_name,
+        'params': scale,
+        'case': case,
+        'seconds': seconds,
+        'runs': [run['seconds'] for run in runs],
+        'throughput': runs[0]['amount'] / seconds if seconds > 0 else None,
+        'unit': runs[0]['unit'] + '/s',
+        'peak_rss_mb': max(peaks) if peaks else None,
+        'rss_delta_mb': max(deltas) if deltas else None,
+        }
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'commit': commit,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'h5py': h.__version__,
+        'hdf5': h.version.hdf5_version,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        }
+
+
+def format_row(result:dict) -> str:
+    throughput = '-' if result['throughput'] is None else f'{result["throughput"]:12.1f}'
+    peak = '-' if result['peak_rss_mb'] is None else f'{result["peak_rss_mb"]:8.1f}'
+    delta = '-' if result['rss_delta_mb'] is None else f'{result["rss_delta_mb"]:8.1f}'
+
+    return (
+        f'{result["scale"]:>8} | {result["case"]:>17} | {result["seconds"]:9.3f} | {throughput:>12} '
+        f'{result["unit"]:<10} | {peak:>8} | {delta:>8}'
+        )
+
+
+def run(scales:dict, cases:list, options:dict, repeat:int, tmp_dir:str=None) -> list:
+    ctx = multiprocessing.get_context('spawn')
+    results = []
+
+    print(f'{"scale":>8} | {"case":>17} | {"seconds":>9} | {"throughput":>23} | {"peak MB":>8} | {"delta MB":>8}')
+
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as work_dir:
+        for scale_name, scale in scales.items():
+            fixture = os.path.join(work_dir, f'{scale_name}.h5')
+
+            with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as executor:
+                build = executor.submit(build_recording, fixture, scale).result()
+                build['peak_rss_mb'] = executor.submit(peak_rss_mb).result()
+                build['rss_delta_mb'] = None
+
+            results.append(summarize(scale_name, scale, 'add_samples_large', [build]))
+            print(format_row(results[-1]), flush=True)
+
+            for case in cases:
+                runs = []
+                for _ in range(repeat):
+                    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as executor:
+                        runs.append(executor.submit(run_case, case, fixture, scale, options).result())
+
+                results.append(summarize(scale_name, scale, case, runs))
+                print(format_row(results[-1]), flush=True)
+
+            os.remove(fixture)
+
+    return results
+
+
+def compare(baseline:dict, current:dict, threshold:float, rss_threshold:float, rss_floor:float) -> list:
+    """Prints changes between two result files and returns regressions
+
+    A case regressed if its throughput dropped by more than `threshold`
+    or its peak RSS grew by more than `rss_threshold` and `rss_floor` MB.
+    """
+    base = {(result['scale'], result['case']): result for result in baseline['results']}
+    regressions = []
+
+    print(f'baseline {baseline["meta"].get("commit")} | current {current["meta"].get("commit")}')
+    print(f'{"scale":>8} | {"case":>17} | {"throughput":>10} | {"peak RSS":>10} | status')
+
+    for result in current['results']:
+        key = (result['scale'], result['case'])
+        if key not in base:
+            print(f'{key[0]:>8} | {key[1]:>17} | {"new":>10} | {"":>10} |')
+            continue
+
+        old = base[key]
+        status = []
+
+        speed = None
+        if old['throughput'] and result['throughput']:
+            speed = result['throughput'] / old['throughput']
+            if speed < 1 - threshold:
+                status.append('slower')
+
+        memory = None
+        if old['peak_rss_mb'] and result['peak_rss_mb']:
+            memory = result['peak_rss_mb'] / old['peak_rss_mb']
+            if memory > 1 + rss_threshold and result['peak_rss_mb'] - old['peak_rss_mb'] > rss_floor:
+                status.append('memory')
+
+        speed_txt = '-' if speed is None else f'{(speed - 1) * 100:+9.1f}%'
+        memory_txt = '-' if memory is None else f'{(memory - 1) * 100:+9.1f}%'
+        print(f'{key[0]:>8} | {key[1]:>17} | {speed_txt:>10} | {memory_txt:>10} | {", ".join(status) or "ok"}')
+
+        if status:
+            regressions.append((key, status))
+
+    for key in sorted(base.keys() - {(result['scale'], result['case']) for result in current['results']}):
+        print(f'{key[0]:>8} | {key[1]:>17} | {"missing":>10} | {"":>10} |')
+
+    return regressions
+
+
+def load(f_path:str) -> dict:
+    with open(f_path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scales', nargs='+', default=['small'], choices=list(SCALES) + ['custom'])
+    parser.add_argument('--channels', type=int, default=32, help='Channels of custom scale.')
+    parser.add_argument('--duration', type=float, default=600, help='Duration of custom scale in seconds.')
+    parser.add_argument('--fs', type=float, default=1000, help='Sampling frequency of custom scale.')
+    parser.add_argument('--marks', type=int, default=10_000, help='Marks of custom scale.')
+    parser.add_argument('--cases', nargs='+', default=list(CASES), choices=list(CASES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--small-appends', type=int, default=2_000)
+    parser.add_argument('--added-channels', type=int, default=4)
+    parser.add_argument('--removed-s', type=float, default=10.0)
+    parser.add_argument('--single-marks', type=int, default=1_000)
+    parser.add_argument('--nb-reads', type=int, default=50)
+    parser.add_argument('--window-s', type=float, default=10.0)
+    parser.add_argument('--tmp-dir', help='Directory of temporary recordings. Defaults to system temporary directory.')
+    parser.add_argument('--output', help='Write results as JSON.')
+    parser.add_argument('--baseline', help='Compare results with JSON of earlier run.')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'), help='Compare two JSON files and exit.')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Tolerated relative drop of throughput.')
+    parser.add_argument('--rss-threshold', type=float, default=0.2, help='Tolerated relative growth of peak RSS.')
+    parser.add_argument('--rss-floor', type=float, default=16.0, help='Tolerated absolute growth of peak RSS in MB.')
+    args = parser.parse_args()
+
+    if args.compare:
+        regressions = compare(load(args.compare[0]), load(args.compare[1]), args.threshold, args.rss_threshold, args.rss_floor)
+        sys.exit(1 if regressions else 0)
+
+    scales = {}
+    for name in args.scales:
+        if name == 'custom':
+            scales[name] = {'channels': args.channels, 'duration': args.duration, 'fs': args.fs, 'marks': args.marks}
+        else:
+            scales[name] = SCALES[name]
+
+    options = {
+        'small_appends': args.small_appends,
+        'added_channels': args.added_channels,
+        'removed_s': args.removed_s,
+        'single_marks': args.single_marks,
+        'nb_reads': args.nb_reads,
+        'window_s': args.window_s,
+        }
+
+    current = {
+        'meta': dict(environment(), repeat=args.repeat, options=options),
+        'results': run(scales, args.cases, options, args.repeat, args.tmp_dir),
+        }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+
+    if args.baseline:
+        regressions = compare(load(args.baseline), current, args.threshold, args.rss_threshold, args.rss_floor)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
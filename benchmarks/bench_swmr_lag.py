@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""Benchmark of end-to-end reader lag in SWMR mode
+
+A writer process appends blocks of samples at a sustained rate while
+reader processes follow the file with `LiveReader.tail`. The first
+channel carries the time at which its block was handed to the writer;
+readers report the delay until the block became visible to them.
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import multiprocessing
+import numpy as np
+
+from pyplanter import PlantedH5, LiveReader
+
+
+def run_writer(f_path:str, t_zero:float, ready, done, nb_channels:int, sampl_freq:int, block:int, duration:float):
+    planter = PlantedH5()
+    planter.create(f_path, sampl_freq=sampl_freq, swmr=True)
+    planter.create_dataset(np.zeros((nb_channels, 0), dtype='<f4'))
+    planter.start_swmr()
+    ready.set()
+
+    data_arr = np.random.standard_normal((nb_channels, block)).astype('<f4')
+    period = block / sampl_freq
+    t_next = time.monotonic()
+
+    while time.monotonic() - t_zero < duration:
+        t_next += period
+        time.sleep(max(0.0, t_next - time.monotonic()))
+
+        data_arr[0] = time.monotonic() - t_zero
+        planter.add_samples(data_arr)
+
+    planter.close()
+    done.set()
+
+
+def run_reader(f_path:str, t_zero:float, ready, done, results, poll:float, tail:int):
+    ready.wait()
+
+    lags = []
+    with LiveReader(f_path, channels=0) as reader:
+        while not done.is_set():
+            if reader.refresh():
+                stamp = reader.tail(tail, refresh=False)[0, -1]
+                lags.append(time.monotonic() - t_zero - float(stamp))
+
+            time.sleep(poll)
+
+    results.put(lags)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--channels', type=int, default=64)
+    parser.add_argument('--sampl-freq', type=int, default=2000)
+    parser.add_argument('--block', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--readers', type=int, default=2)
+    parser.add_argument('--poll', type=float, default=0.001)
+    parser.add_argument('--tail', type=int, default=2000)
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('spawn')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        f_path = os.path.join(tmp_dir, 'bench.h5')
+
+        ready, done = ctx.Event(), ctx.Event()
+        results = ctx.Queue()
+        t_zero = time.monotonic()
+
+        readers = [
+            ctx.Process(target=run_reader, args=(f_path, t_zero, ready, done, results, args.poll, args.tail))
+            for _ in range(args.readers)
+            ]
+        for reader in readers:
+            reader.start()
+
+        writer = ctx.Process(
+            target=run_writer,
+            args=(f_path, t_zero, ready, done, args.channels, args.sampl_freq, args.block, args.duration),
+            )
+        writer.start()
+        writer.join()
+
+        lags = [results.get() for _ in readers]
+        for reader in readers:
+            reader.join()
+
+    rate = args.channels * args.sampl_freq
+    print(f'write rate {rate:.0f} values/s in blocks of {args.block} samples, {args.readers} readers')
+
+    for idx, reader_lags in enumerate(lags):
+        reader_lags = np.array(reader_lags) * 1e3
+        if not reader_lags.shape[0]:
+            print(f'reader {idx} | no updates')
+            continue
+
+        print(
+            f'reader {idx} | {reader_lags.shape[0]:6d} updates | lag p50 {np.percentile(reader_lags, 50):7.2f} ms'
+            f' | p99 {np.percentile(reader_lags, 99):7.2f} ms | max {reader_lags.max():7.2f} ms'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -1 +1,4 @@
-from .planter import PlantedH5
\ No newline at end of file
+from .planter import PlantedH5
+from .catalog import Catalog
+from .windows import WindowIterator
+from .live import LiveReader
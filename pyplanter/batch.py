@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+
+import numpy as np
+
+from .config.constants import *
+
+
+class Batch():
+    """Pending metadata mutations of `PlantedH5.batch`
+
+    Rows appended to `Info`, `ChannelSettings`, `Scaling` and `Marks` and
+    changes of attributes are kept in memory and applied with one write
+    per dataset on commit. `Data` is written immediately; its state at the beginning
+    of the batch is recorded so that it can be restored on rollback. A
+    replaced `Data` is kept under a backup name until the batch ends.
+
+    Args:
+        planter (PlantedH5): Planter with opened, writable file.
+    """
+
+    TABLES = (INFO_DNAME, CHANNEL_DNAME, SCALING_DNAME, MARKS_DNAME)
+    BACKUP_SUFFIX = '_batch_backup'
+
+    def __init__(self, planter):
+        self.rows = {dname: [] for dname in self.TABLES}
+        self.reset = set()
+        self.attrs = {}
+        self.removed_attrs = set()
+
+        f_obj = planter.f_obj
+        self.data_shape = f_obj[DATASET_DNAME].shape if DATASET_DNAME in f_obj else None
+        self.data_replaced = False
+
+
+    def append(self, dname:str, content:np.ndarray):
+        self.rows[dname].append(content)
+
+
+    def set_attr(self, attr_name:str, attr_value):
+        self.removed_attrs.discard(attr_name)
+        self.attrs[attr_name] = attr_value
+
+
+    def remove_attr(self, attr_name:str):
+        self.attrs.pop(attr_name, None)
+        self.removed_attrs.add(attr_name)
+
+
+    def replace_data(self, planter):
+        """Prepares replacement of `Data` and its channel tables
+
+        The original `Data`, its overview, statistics and checksums are moved to backup names on
+        first replacement, later replacements within the batch simply drop
+        the current ones.
+        """
+        f_obj = planter.f_obj
+
+        for dname in (DATASET_DNAME, OVERVIEW_GNAME, STATS_DNAME, CHECKSUMS_DNAME):
+            if dname not in f_obj:
+                continue
+
+            if self.data_replaced or self.data_shape is None:
+                del f_obj[dname]
+            else:
+                f_obj.move(dname, dname + self.BACKUP_SUFFIX)
+
+        self.data_replaced = True
+
+        for dname in (INFO_DNAME, CHANNEL_DNAME, SCALING_DNAME):
+            self.reset.add(dname)
+            self.rows[dname] = []
+
+
+    def table(self, planter, dname:str) -> np.ndarray:
+        """Content of table as it will be after commit
+
+        Returns:
+            np.ndarray: Structured array or None if the table will not exist.
+        """
+        content = []
+        if dname not in self.reset and dname in planter.f_obj:
+            content.append(planter.f_obj[dname][:])
+
+        content.extend(self.rows[dname])
+
+        return np.concatenate(content) if content else None
+
+
+    def nb_rows(self, planter, dname:str) -> int:
+        """Number of rows of table after commit"""
+        nb_rows = 0
+        if dname not in self.reset and dname in planter.f_obj:
+            nb_rows = planter.f_obj[dname].shape[0]
+
+        return nb_rows + sum(content.shape[0] for content in self.rows[dname])
+
+
+    def check(self, planter):
+        """Checks that channel tables will match `Data` after commit
+
+        Raises:
+            ValueError: Inconsistent number of channels.
+        """
+        if DATASET_DNAME not in planter.f_obj:
+            return
+
+        nb_channels = planter.f_obj[DATASET_DNAME].shape[0]
+
+        for dname in (INFO_DNAME, CHANNEL_DNAME, SCALING_DNAME):
+            if dname == SCALING_DNAME and planter.f_obj[DATASET_DNAME].dtype.kind not in 'iu':
+                continue
+
+            nb_rows = self.nb_rows(planter, dname)
+            if nb_rows != nb_channels:
+                raise ValueError(f'Inconsistent batch: `{DATASET_DNAME}` has {nb_channels} channels, `{dname}` would have {nb_rows} rows.')
+
+
+    def commit(self, planter):
+        """Applies pending mutations, one write per dataset"""
+        f_obj = planter.f_obj
+
+        for dname in self.reset:
+            if dname in f_obj and not self.rows[dname]:
+                del f_obj[dname]
+            elif dname in f_obj:
+                planter._make_resizable(dname).resize(0, axis=0)
+
+        for dname, rows in self.rows.items():
+            if rows:
+                planter._append_rows(dname, np.concatenate(rows))
+
+        for attr_name in self.removed_attrs:
+            if attr_name in f_obj.attrs:
+                del f_obj.attrs[attr_name]
+
+        for attr_name, attr_value in self.attrs.items():
+            f_obj.attrs[attr_name] = attr_value
+
+        planter._remove_dataset([dname + self.BACKUP_SUFFIX for dname in (DATASET_DNAME, OVERVIEW_GNAME, STATS_DNAME, CHECKSUMS_DNAME)])
+
+        planter._invalidate_channel_index()
+        planter._invalidate_marks_index()
+        planter._invalidate_metadata('attrs')
+        planter._fill_yrange()
+
+
+    def rollback(self, planter):
+        """Discards pending mutations and restores `Data`"""
+        f_obj = planter.f_obj
+
+        if self.data_replaced or self.data_shape is None:
+            planter._remove_dataset([DATASET_DNAME, OVERVIEW_GNAME, STATS_DNAME, CHECKSUMS_DNAME])
+
+            for dname in (DATASET_DNAME, OVERVIEW_GNAME, STATS_DNAME, CHECKSUMS_DNAME):
+                if dname + self.BACKUP_SUFFIX in f_obj:
+                    f_obj.move(dname + self.BACKUP_SUFFIX, dname)
+
+        elif f_obj[DATASET_DNAME].shape != self.data_shape:
+            f_obj[DATASET_DNAME].resize(self.data_shape)
+            planter._update_overview(from_sample=self.data_shape[1])
+            planter._update_stats(from_sample=self.data_shape[1])
+            planter._update_checksums(from_sample=self.data_shape[1])
+
+        planter._invalidate_channel_index()
+        planter._invalidate_marks_index()
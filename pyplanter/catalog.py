@@ -0,0 +1,327 @@
+#!/usr/bin/env python
+
+import os
+import sqlite3
+import multiprocessing
+import h5py as h
+import numpy as np
+from typing import Union
+from concurrent.futures import ProcessPoolExecutor
+
+from .config.constants import *
+from .utils import collect_files
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    fs REAL,
+    generated_by TEXT,
+    nb_channels INTEGER,
+    nb_samples INTEGER,
+    dtype TEXT,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS channels (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    row INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    datacache TEXT NOT NULL,
+    units TEXT
+);
+CREATE TABLE IF NOT EXISTS mark_groups (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    first_sample INTEGER,
+    last_sample INTEGER
+);
+CREATE INDEX IF NOT EXISTS files_fs ON files(fs);
+CREATE INDEX IF NOT EXISTS channels_name ON channels(name, datacache);
+CREATE INDEX IF NOT EXISTS channels_file ON channels(file_id);
+CREATE INDEX IF NOT EXISTS mark_groups_name ON mark_groups(name);
+CREATE INDEX IF NOT EXISTS mark_groups_file ON mark_groups(file_id);
+"""
+
+
+def _decode(value) -> str:
+    """Decodes attribute or field value into str"""
+    if isinstance(value, np.ndarray):
+        value = value.flat[0] if value.size else b''
+
+    return value.decode('UTF-8') if isinstance(value, bytes) else str(value)
+
+
+def _scan_file(f_path:str) -> dict:
+    """Summary of single planted file
+
+    Module-level so that it can be executed on a process pool. Only
+    attributes, `Info` and `Marks` are read.
+
+    Args:
+        f_path (str): Path to h5 file.
+
+    Returns:
+        dict: File summary; `error` holds the message if the file could not be read.
+    """
+    stat = os.stat(f_path)
+    summary = {
+        'path': f_path,
+        'mtime': stat.st_mtime,
+        'size': stat.st_size,
+        'fs': None,
+        'generated_by': None,
+        'nb_channels': None,
+        'nb_samples': None,
+        'dtype': None,
+        'error': None,
+        'channels': [],
+        'mark_groups': [],
+        }
+
+    try:
+        with h.File(f_path, 'r') as f_obj:
+            if 'Fs' in f_obj.attrs:
+                summary['fs'] = float(np.asarray(f_obj.attrs['Fs']).flat[0])
+
+            if 'GeneratedBy' in f_obj.attrs:
+                summary['generated_by'] = _decode(f_obj.attrs['GeneratedBy'])
+
+            if DATASET_DNAME in f_obj:
+                dset = f_obj[DATASET_DNAME]
+                summary['nb_channels'], summary['nb_samples'] = (int(n) for n in dset.shape)
+                summary['dtype'] = dset.dtype.str
+
+            if INFO_DNAME in f_obj:
+                info = f_obj[INFO_DNAME][:]
+                summary['channels'] = [
+                    (row, _decode(item['ChannelName']), _decode(item['DatacacheName']), _decode(item['Units']))
+                    for row, item in enumerate(info)
+                    ]
+
+            if MARKS_DNAME in f_obj and f_obj[MARKS_DNAME].shape[0]:
+                marks = f_obj[MARKS_DNAME][:]
+                groups, inverse, counts = np.unique(marks['Group'], return_inverse=True, return_counts=True)
+
+                first = np.full(groups.shape[0], np.iinfo(np.int64).max)
+                last = np.full(groups.shape[0], np.iinfo(np.int64).min)
+                np.minimum.at(first, inverse, marks['SampleLeft'])
+                np.maximum.at(last, inverse, marks['SampleRight'])
+
+                summary['mark_groups'] = [
+                    (_decode(group), int(count), int(first_sample), int(last_sample))
+                    for group, count, first_sample, last_sample in zip(groups, counts, first, last)
+                    ]
+
+    except (OSError, KeyError, ValueError) as e:
+        summary['error'] = str(e)
+
+    return summary
+
+
+class Catalog():
+    """SQLite index of many planted files
+
+    File attributes, shape of `Data`, rows of `Info` and per-group
+    summaries of `Marks` are stored in a local database, so that searches
+    over large collections do not open any HDF5 file. Files are rescanned
+    only if their modification time or size changed.
+
+    Args:
+        db_path (str): Path to SQLite database, created if it does not exist.
+    """
+
+    def __init__(self, db_path:str):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute('PRAGMA foreign_keys = ON')
+        self._conn.execute('PRAGMA journal_mode = WAL')
+        self._conn.executescript(SCHEMA)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+    def refresh(self, paths:Union[str,list], pattern:str='*.h5', prune:bool=True, max_workers:int=None, chunksize:int=16) -> dict:
+        """Indexes new and changed files
+
+        Files whose modification time and size match the catalog are
+        skipped, the rest is scanned on a process pool.
+
+        Args:
+            paths (Union[str,list]): Files or directories (searched recursively).
+            pattern (str, optional): File name pattern within directories. Defaults to '*.h5'.
+            prune (bool, optional): Remove catalogued files within given directories that no longer exist.
+                Defaults to True.
+            max_workers (int, optional): Number of scanning processes, 0 scans in the calling process.
+                Defaults to None.
+            chunksize (int, optional): Number of files per task of the pool. Defaults to 16.
+
+        Returns:
+            dict: Numbers of `added`, `updated`, `unchanged`, `removed` and `failed` files.
+        """
+        files = collect_files(paths, pattern)
+        known = {path: (mtime, size) for path, mtime, size in self._conn.execute('SELECT path, mtime, size FROM files')}
+
+        changed = []
+        for path in files:
+            stat = os.stat(path)
+            if known.get(path) != (stat.st_mtime, stat.st_size):
+                changed.append(path)
+
+        counts = {'added': 0, 'updated': 0, 'unchanged': len(files) - len(changed), 'removed': 0, 'failed': 0}
+
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+
+        if max_workers and len(changed) > 1:
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+                summaries = executor.map(_scan_file, changed, chunksize=chunksize)
+                self._store(summaries, known, counts)
+        else:
+            self._store(map(_scan_file, changed), known, counts)
+
+        if prune:
+            roots = [os.path.join(os.path.abspath(path), '') for path in ([paths] if isinstance(paths, str) else paths) if os.path.isdir(path)]
+            existing = set(files)
+            removed = [
+                (path,) for path in known
+                if path not in existing and any(path.startswith(root) for root in roots) and not os.path.exists(path)
+                ]
+
+            with self._conn:
+                self._conn.executemany('DELETE FROM files WHERE path = ?', removed)
+
+            counts['removed'] = len(removed)
+
+        return counts
+
+
+    def _store(self, summaries, known:dict, counts:dict):
+        """Writes file summaries in single transaction"""
+        with self._conn:
+            for summary in summaries:
+                self._conn.execute('DELETE FROM files WHERE path = ?', (summary['path'],))
+
+                cursor = self._conn.execute(
+                    'INSERT INTO files (path, mtime, size, fs, generated_by, nb_channels, nb_samples, dtype, error) '
+                    'VALUES (:path, :mtime, :size, :fs, :generated_by, :nb_channels, :nb_samples, :dtype, :error)',
+                    summary,
+                    )
+                file_id = cursor.lastrowid
+
+                self._conn.executemany(
+                    'INSERT INTO channels (file_id, row, name, datacache, units) VALUES (?, ?, ?, ?, ?)',
+                    [(file_id,) + item for item in summary['channels']],
+                    )
+                self._conn.executemany(
+                    'INSERT INTO mark_groups (file_id, name, count, first_sample, last_sample) VALUES (?, ?, ?, ?, ?)',
+                    [(file_id,) + item for item in summary['mark_groups']],
+                    )
+
+                if summary['error'] is not None:
+                    counts['failed'] += 1
+                elif summary['path'] in known:
+                    counts['updated'] += 1
+                else:
+                    counts['added'] += 1
+
+
+    def search(
+        self,
+        channel:str=None,
+        datacache:str=None,
+        fs:float=None,
+        mark_group:str=None,
+        generated_by:str=None,
+        min_samples:int=None,
+        ) -> list:
+        """Paths of catalogued files matching all given conditions
+
+        Args:
+            channel (str, optional): File has channel of this name. Defaults to None.
+            datacache (str, optional): File has datacache of this name; combined with `channel`,
+                the channel has to be in the datacache. Defaults to None.
+            fs (float, optional): Sampling frequency. Defaults to None.
+            mark_group (str, optional): File has marks of this group. Defaults to None.
+            generated_by (str, optional): Value of `GeneratedBy` attribute. Defaults to None.
+            min_samples (int, optional): Minimal number of samples. Defaults to None.
+
+        Returns:
+            list: Sorted paths.
+        """
+        conditions = ['error IS NULL']
+        params = []
+
+        if fs is not None:
+            conditions.append('fs = ?')
+            params.append(float(fs))
+
+        if generated_by is not None:
+            conditions.append('generated_by = ?')
+            params.append(generated_by)
+
+        if min_samples is not None:
+            conditions.append('nb_samples >= ?')
+            params.append(int(min_samples))
+
+        if channel is not None or datacache is not None:
+            channel_conditions = []
+            for column, value in (('name', channel), ('datacache', datacache)):
+                if value is not None:
+                    channel_conditions.append(f'{column} = ?')
+                    params.append(value)
+
+            conditions.append('id IN (SELECT file_id FROM channels WHERE ' + ' AND '.join(channel_conditions) + ')')
+
+        if mark_group is not None:
+            conditions.append('id IN (SELECT file_id FROM mark_groups WHERE name = ?)')
+            params.append(mark_group)
+
+        query = 'SELECT path FROM files WHERE ' + ' AND '.join(conditions) + ' ORDER BY path'
+
+        return [path for path, in self._conn.execute(query, params)]
+
+
+    def file_summary(self, f_path:str) -> dict:
+        """Catalogued summary of single file
+
+        Args:
+            f_path (str): Path to h5 file.
+
+        Returns:
+            dict: File attributes with `channels` and `mark_groups` lists or None if not catalogued.
+        """
+        cursor = self._conn.execute('SELECT * FROM files WHERE path = ?', (os.path.abspath(f_path),))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+
+        summary = dict(zip([column[0] for column in cursor.description], row))
+        summary['channels'] = self._conn.execute(
+            'SELECT name, datacache, units FROM channels WHERE file_id = ? ORDER BY row', (summary['id'],)
+            ).fetchall()
+        summary['mark_groups'] = self._conn.execute(
+            'SELECT name, count, first_sample, last_sample FROM mark_groups WHERE file_id = ? ORDER BY name', (summary['id'],)
+            ).fetchall()
+
+        return summary
+
+
+    def failed(self) -> list:
+        """Catalogued files that could not be read, as list of (path, error)"""
+        return self._conn.execute('SELECT path, error FROM files WHERE error IS NOT NULL ORDER BY path').fetchall()
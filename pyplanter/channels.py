@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+
+import numpy as np
+from typing import Union
+
+
+class ChannelIndex():
+    """In-memory index over `Info` table
+
+    Channel names, datacaches and units are decoded once. Lookups of
+    channels by name or by datacache are dictionary lookups.
+
+    Args:
+        info (np.ndarray): Structured array in `INFO_DTYPES`.
+    """
+
+    def __init__(self, info:np.ndarray):
+        self.names = [item.decode('UTF-8') for item in info['ChannelName']]
+        self.datacaches = [item.decode('UTF-8') for item in info['DatacacheName']]
+        self.units = [item.decode('UTF-8') for item in info['Units']]
+
+        self._by_name = {}
+        self._by_key = {}
+        by_datacache = {}
+
+        for row, (name, datacache_name) in enumerate(zip(self.names, self.datacaches)):
+            self._by_name.setdefault(name, []).append(row)
+            self._by_key.setdefault((datacache_name, name), row)
+            by_datacache.setdefault(datacache_name, []).append(row)
+
+        self._by_datacache = {key: np.array(rows, dtype=np.intp) for key, rows in by_datacache.items()}
+
+
+    def __len__(self):
+        return len(self.names)
+
+
+    def find(self, name:str, datacache_name:str=None) -> int:
+        """Row of channel with given name
+
+        Args:
+            name (str): Channel name.
+            datacache_name (str, optional): Datacache of the channel. Defaults to first
+                channel of the name in any datacache.
+
+        Raises:
+            ValueError: Channel does not exist.
+
+        Returns:
+            int: Row index.
+        """
+        if datacache_name is None:
+            rows = self._by_name.get(name)
+            row = rows[0] if rows else None
+        else:
+            row = self._by_key.get((datacache_name, name))
+
+        if row is None:
+            raise ValueError(f'Channel {name} does not exist.')
+
+        return row
+
+
+    def rows(self, channels:Union[str,int,list]=None, datacache_name:str=None) -> np.ndarray:
+        """Rows of channels given by names or indices
+
+        Args:
+            channels (Union[str,int,list], optional): Channel name, index or list of these.
+                Defaults to all channels (of the datacache).
+            datacache_name (str, optional): Restrict names to given datacache. Defaults to None.
+
+        Returns:
+            np.ndarray: Row indices in the order of `channels`.
+        """
+        if channels is None:
+            if datacache_name is None:
+                return np.arange(len(self))
+
+            return self.datacache_rows(datacache_name)
+
+        if isinstance(channels, (str, int, np.integer)):
+            channels = [channels]
+
+        return np.array(
+            [int(item) if isinstance(item, (int, np.integer)) else self.find(item, datacache_name) for item in channels],
+            dtype=np.intp,
+            )
+
+
+    def name_rows(self, names:Union[str,list]) -> np.ndarray:
+        """Rows of all channels with given names in any datacache
+
+        Args:
+            names (Union[str,list]): Channel name or list of names.
+
+        Returns:
+            np.ndarray: Sorted row indices.
+        """
+        if isinstance(names, str):
+            names = [names]
+
+        rows = [row for name in names for row in self._by_name.get(name, [])]
+
+        return np.unique(np.array(rows, dtype=np.intp))
+
+
+    def datacache_rows(self, datacache_names:Union[str,list]) -> np.ndarray:
+        """Rows of all channels in given datacaches
+
+        Args:
+            datacache_names (Union[str,list]): Datacache name or list of names.
+
+        Returns:
+            np.ndarray: Sorted row indices.
+        """
+        if isinstance(datacache_names, str):
+            datacache_names = [datacache_names]
+
+        rows = [self._by_datacache[name] for name in datacache_names if name in self._by_datacache]
+
+        if not rows:
+            return np.empty(0, dtype=np.intp)
+
+        return np.unique(np.concatenate(rows))
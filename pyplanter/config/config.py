@@ -5,4 +5,59 @@ DEFAULT_PARAMS = {
     'right_index': 100,    
     'datacache_name': 'RAW',
     'data_units': 'mV',   
-}
\ No newline at end of file
+    'block_bytes': 32 * 2**20,
+    'storage_profile': 'auto',
+    'overview_factors': (10, 100, 1000, 10000),
+    'checksum_samples': 65536,
+}
+
+# storage profiles of `Data` dataset
+# chunk shape is given as (channels, samples), None stands for all channels
+STORAGE_PROFILES = {
+    'auto': {
+        'chunks': True,
+    },
+    'time': {
+        'chunks': (None, 1024),
+    },
+    'channel': {
+        'chunks': (1, 65536),
+    },
+    'time_gzip': {
+        'chunks': (None, 1024),
+        'compression': 'gzip',
+        'compression_opts': 4,
+        'shuffle': True,
+    },
+    'time_lzf': {
+        'chunks': (None, 1024),
+        'compression': 'lzf',
+        'shuffle': True,
+    },
+    'channel_gzip': {
+        'chunks': (1, 65536),
+        'compression': 'gzip',
+        'compression_opts': 4,
+        'shuffle': True,
+    },
+}
+
+# default keys of importer sidecar configs (see `pyplanter.importer`)
+IMPORT_PARAMS = {
+    'format': None,
+    'layout': 'interleaved',
+    'dtype': '<i2',
+    'nb_channels': None,
+    'header_bytes': 0,
+    'delimiter': ',',
+    'skip_rows': 0,
+    'header': False,
+    'sampl_freq': DEFAULT_PARAMS['sampling_freq'],
+    'channels': None,
+    'units': DEFAULT_PARAMS['data_units'],
+    'datacache_name': DEFAULT_PARAMS['datacache_name'],
+    'gain': None,
+    'offset': None,
+    'storage_dtype': None,
+    'storage_profile': None,
+}
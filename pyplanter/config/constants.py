@@ -21,6 +21,10 @@ DATASET_DNAME = 'Data'
 INFO_DNAME = 'Info'
 CHANNEL_DNAME = 'ChannelSettings'
 MARKS_DNAME = 'Marks'
+SCALING_DNAME = 'Scaling'
+STATS_DNAME = 'Stats'
+CHECKSUMS_DNAME = 'Checksums'
+OVERVIEW_GNAME = 'Overview'
 
 # default datasets data types
 DATASET_DTYPE = '<f4'
@@ -53,4 +57,24 @@ MARKS_DTYPES = [
     ('Channel', 'S256'),
     ('Info', 'S256'),
 ]
-ATTR_DTYPE = '<f4'
\ No newline at end of file
+SCALING_DTYPES = [
+    ('Gain', '<f8'),
+    ('Offset', '<f8'),
+]
+STATS_DTYPES = [
+    ('Count', '<u8'),
+    ('NaNCount', '<u8'),
+    ('Min', '<f8'),
+    ('Max', '<f8'),
+    ('Mean', '<f8'),
+    ('M2', '<f8'),
+]
+ATTR_DTYPE = '<f4'
+CHECKSUM_DTYPE = '<u4'
+OVERVIEW_DTYPE = '<f4'
+
+# number of rows per chunk of resizable tables (`Marks`, `Info`, ...)
+TABLE_CHUNK_ROWS = 256
+
+# number of bins per chunk of overview levels
+OVERVIEW_CHUNK_BINS = 4096
\ No newline at end of file
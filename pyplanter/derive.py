@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+
+import os
+import collections
+import multiprocessing
+import numpy as np
+from typing import Union, Callable
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from .config.constants import *
+from .config.config import *
+from .utils import block_length, read_rows, apply_scaling, dataset_storage
+
+
+def _apply_block(func:Callable, block:np.ndarray, first:int, length:int, expected:int) -> np.ndarray:
+    """Applies transform to block with margins and trims the margins
+
+    Module-level so that it can be executed on a process pool.
+
+    Args:
+        func (Callable): Transform of array of shape (channels, samples).
+        block (np.ndarray): Block including margins.
+        first (int): First output sample past the left margin.
+        length (int): Number of output samples without margins.
+        expected (int): Expected number of output samples of the whole block.
+
+    Raises:
+        ValueError: Transform returned array of unexpected shape.
+
+    Returns:
+        np.ndarray: Output samples without margins.
+    """
+    out = np.asarray(func(block))
+
+    if out.shape != (block.shape[0], expected):
+        raise ValueError(f'Transform returned array of shape {out.shape}, expected {(block.shape[0], expected)}.')
+
+    return out[:, first:first + length]
+
+
+class DeriveMixin():
+    """Derived datacaches computed from existing channels"""
+
+    def derive_datacache(
+        self,
+        src:str,
+        dst:str,
+        func:Callable,
+        overlap:int=0,
+        channels:Union[str,int,list]=None,
+        decimation:int=1,
+        out_file:str=None,
+        max_workers:int=None,
+        use_processes:bool=True,
+        block_bytes:int=None,
+        ) -> str:
+        """Applies transform to channels of datacache block by block
+
+        `Data` is read in time blocks extended by `overlap` samples on both
+        sides (overlap-save), so filters see enough history and future
+        around block borders; margins are dropped from the output. Blocks of
+        channel groups (one chunk of channels each) are transformed on a
+        pool while the calling process reads the following ones, so memory
+        is bounded by the block size.
+
+        `func` maps array of shape (channels, n) onto (channels, ceil(n / decimation)),
+        with output sample `i` corresponding to input sample `i * decimation`.
+        It has to be picklable (module-level) for the process pool.
+
+        Without `out_file`, results are appended as channels of datacache `dst`
+        with names and units of their sources; integer `Data` uses the scaling
+        of the sources. Decimated results have different sampling frequency
+        and have to be written into `out_file`, which gets `Data` of the
+        derived channels, their parameters and marks at the new rate. It is
+        written as `<out_file stem>.part.h5` and renamed once complete, so a
+        failed run leaves no partial `out_file`.
+
+        Args:
+            src (str): Source datacache.
+            dst (str): Name of derived datacache.
+            func (Callable): Vectorized transform of block of channels.
+            overlap (int, optional): Margin in samples on each side of a block. Defaults to 0.
+            channels (Union[str,int,list], optional): Channel names or indices within `src`. Defaults to all channels of `src`.
+            decimation (int, optional): Ratio of input and output sampling frequency. Defaults to 1.
+            out_file (str, optional): Path to h5 file for the derived datacache. Defaults to None.
+            max_workers (int, optional): Number of workers, 0 transforms in the calling process. Defaults to None.
+            use_processes (bool, optional): Use process pool instead of thread pool. Defaults to True.
+            block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
+
+        Raises:
+            ValueError: No source channels, existing datacache or decimation without `out_file`.
+
+        Returns:
+            str: Path to `out_file` or None.
+        """
+        self._check_no_batch('derive_datacache')
+
+        decimation = int(decimation)
+        if decimation < 1:
+            raise ValueError('Value of `decimation` has to be positive.')
+
+        if out_file is None and decimation != 1:
+            raise ValueError('Decimated datacache has a different sampling frequency, write it into `out_file`.')
+
+        index = self._get_channel_index()
+        channel_ids = index.rows(channels, src) if channels is not None else index.datacache_rows(src)
+
+        if not channel_ids.shape[0]:
+            raise ValueError(f'Datacache {src} has no channels.')
+
+        if out_file is None and dst in index.datacaches:
+            raise ValueError(f'Datacache {dst} already exists.')
+
+        ch_names = [index.names[row] for row in channel_ids]
+        units = [index.units[row] for row in channel_ids]
+
+        dset = self.f_obj[DATASET_DNAME]
+        nb_samples = dset.shape[1]
+        scaling = self._get_scaling()
+
+        # margins and blocks aligned to decimation
+        overlap = -(-int(overlap) // decimation) * decimation
+        step = max(decimation, block_length(dset, axis=1, block_bytes=block_bytes) // decimation * decimation)
+
+        group_size = dset.chunks[0] if dset.chunks else dset.shape[0]
+        groups = [(pos, channel_ids[pos:pos + group_size]) for pos in range(0, channel_ids.shape[0], group_size)]
+
+        # output dataset
+        if out_file is None:
+            planter = self
+            out_dset = self._make_resizable(DATASET_DNAME)
+            first_row = out_dset.shape[0]
+            out_dset.resize(first_row + channel_ids.shape[0], axis=0)
+            out_scaling = None if scaling is None else scaling[channel_ids]
+
+        else:
+            part = os.path.splitext(out_file)[0] + '.part.h5'
+            planter = type(self)()
+            planter.create(part, sampl_freq=float(self.f_obj.attrs['Fs'][0]) / decimation, storage_profile=dataset_storage(dset))
+            out_dset = planter.f_obj.create_dataset(
+                DATASET_DNAME,
+                shape=(channel_ids.shape[0], -(-nb_samples // decimation)),
+                dtype=DATASET_DTYPE,
+                maxshape=(None, None),
+                **planter._storage_kwargs(channel_ids.shape[0]),
+                )
+            first_row = 0
+            out_scaling = None
+
+        def write_block(pos, start, out):
+            rows = slice(first_row + pos, first_row + pos + out.shape[0])
+            if out_scaling is not None:
+                out = planter._to_storage(out, out_scaling[pos:pos + out.shape[0]])
+
+            out_dset[rows, start // decimation:start // decimation + out.shape[1]] = out
+
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+
+        executor = None
+        if max_workers and use_processes:
+            executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+        elif max_workers:
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        pending = collections.deque()
+
+        try:
+            for start in range(0, nb_samples, step):
+                stop = min(start + step, nb_samples)
+                left, right = max(0, start - overlap), min(nb_samples, stop + overlap)
+
+                for pos, group in groups:
+                    block = read_rows(dset, group, (slice(left, right),))
+                    if scaling is not None:
+                        block = apply_scaling(block.astype(DATASET_DTYPE), scaling[group])
+
+                    args = (func, block, (start - left) // decimation, -(-(stop - start) // decimation), -(-(right - left) // decimation))
+
+                    if executor is None:
+                        write_block(pos, start, _apply_block(*args))
+                        continue
+
+                    pending.append((pos, start, executor.submit(_apply_block, *args)))
+                    while len(pending) > 2 * max_workers:
+                        item_pos, item_start, future = pending.popleft()
+                        write_block(item_pos, item_start, future.result())
+
+            while pending:
+                item_pos, item_start, future = pending.popleft()
+                write_block(item_pos, item_start, future.result())
+
+        except BaseException:
+            if out_file is None:
+                out_dset.resize(first_row, axis=0)
+            else:
+                planter.close()
+                os.remove(part)
+
+            raise
+
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        if out_file is None:
+            if out_scaling is not None:
+                self._append_rows(SCALING_DNAME, out_scaling)
+
+            self._update_overview(rows=slice(first_row, None), block_bytes=block_bytes)
+            self._update_stats(rows=slice(first_row, None), block_bytes=block_bytes)
+            self._update_checksums(rows=slice(first_row, None), block_bytes=block_bytes)
+            self._add_channel_params(ch_names, dst, units)
+
+            return None
+
+        # parameters and marks of the derived file
+        try:
+            for attr_name, attr_value in self.f_obj.attrs.items():
+                if attr_name != 'Fs':
+                    planter.f_obj.attrs[attr_name] = attr_value
+
+            planter._add_channel_params(ch_names, dst, units)
+
+            if MARKS_DNAME in self.f_obj and self.f_obj[MARKS_DNAME].shape[0]:
+                marks = self.f_obj[MARKS_DNAME][:]
+                marks['SampleLeft'] //= decimation
+                marks['SampleRight'] //= decimation
+                planter._append_rows(MARKS_DNAME, marks)
+
+        except BaseException:
+            planter.close()
+            os.remove(part)
+            raise
+
+        planter.close()
+        os.replace(part, out_file)
+
+        return out_file
@@ -0,0 +1,401 @@
+#!/usr/bin/env python
+"""Converts raw binary, NumPy and CSV recordings into planted files
+
+Every input is described by a sidecar JSON config, `<input>.json` or
+`<input stem>.json`, merged over the shared config given by `--config`
+and `IMPORT_PARAMS`. Inputs are read in blocks (memory-mapped where the
+format allows it) and appended by `add_samples`, so memory stays bounded
+by the block size. Files are converted in parallel on a process pool.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+import multiprocessing
+import numpy as np
+from typing import Union
+from concurrent.futures import ProcessPoolExecutor
+
+from .config.constants import *
+from .config.config import *
+from .utils import block_length, collect_files
+from .planter import PlantedH5
+
+
+FORMATS = {
+    '.npy': 'npy',
+    '.csv': 'csv',
+    '.txt': 'csv',
+    '.bin': 'raw',
+    '.raw': 'raw',
+    '.dat': 'raw',
+}
+
+LAYOUTS = ('interleaved', 'planar')
+
+
+class _ArraySource():
+    """Memory-mapped 2D array read in blocks of samples
+
+    Interleaved arrays have shape (samples, channels), planar arrays
+    (channels, samples). Blocks of interleaved arrays are transposed
+    views, so only a single block is ever copied.
+    """
+
+    def __init__(self, array:np.ndarray, layout:str):
+        if array.ndim == 1:
+            array = array[:, None] if layout == 'interleaved' else array[None, :]
+
+        if array.ndim != 2:
+            raise ValueError(f'Expected 2D array, got {array.ndim} dimensions.')
+
+        self._array = array
+        self._layout = layout
+        self.dtype = array.dtype
+        self.names = None
+
+        if layout == 'interleaved':
+            self.nb_samples, self.nb_channels = array.shape
+        else:
+            self.nb_channels, self.nb_samples = array.shape
+
+
+    def blocks(self, block_samples:int):
+        for start in range(0, self.nb_samples, block_samples):
+            if self._layout == 'interleaved':
+                yield self._array[start:start + block_samples].T
+            else:
+                yield self._array[:, start:start + block_samples]
+
+
+class _CsvSource():
+    """CSV file with one sample per row, parsed in blocks of rows"""
+
+    def __init__(self, f_path:str, delimiter:str, skip_rows:int, header:bool):
+        self._f_path = f_path
+        self._delimiter = delimiter
+        self._skip_rows = skip_rows
+        self._header = header
+        self.dtype = np.dtype(np.float32)
+        self.nb_samples = None
+
+        with open(f_path) as f:
+            lines = self._data_lines(f)
+            first = next(lines, None)
+
+        if first is None:
+            raise ValueError('CSV file contains no samples.')
+
+        self.nb_channels = len(first.split(delimiter))
+
+
+    def _data_lines(self, f):
+        lines = itertools.islice(f, self._skip_rows, None)
+
+        self.names = None
+        if self._header:
+            header = next(lines, None)
+            self.names = None if header is None else [name.strip() for name in header.split(self._delimiter)]
+
+        return (line for line in lines if line.strip())
+
+
+    def blocks(self, block_samples:int):
+        with open(self._f_path) as f:
+            lines = self._data_lines(f)
+
+            while True:
+                rows = list(itertools.islice(lines, block_samples))
+                if not rows:
+                    break
+
+                yield np.loadtxt(rows, delimiter=self._delimiter, dtype=self.dtype, ndmin=2).T
+
+
+def load_params(src:str, config:Union[str,dict]=None) -> dict:
+    """Import parameters of input file
+
+    Args:
+        src (str): Path to input file.
+        config (Union[str,dict], optional): Shared config or path to its JSON file, overridden
+            by the sidecar of the input. Defaults to None.
+
+    Returns:
+        dict: `IMPORT_PARAMS` updated by shared config and sidecar.
+    """
+    params = dict(IMPORT_PARAMS)
+
+    if isinstance(config, str):
+        with open(config) as f:
+            config = json.load(f)
+
+    if config:
+        params.update(config)
+
+    for sidecar in (src + '.json', os.path.splitext(src)[0] + '.json'):
+        if os.path.isfile(sidecar):
+            with open(sidecar) as f:
+                params.update(json.load(f))
+            break
+
+    unknown = set(params) - set(IMPORT_PARAMS)
+    if unknown:
+        raise ValueError('Unknown import parameters: ' + ', '.join(sorted(unknown)))
+
+    if params['format'] is None:
+        params['format'] = FORMATS.get(os.path.splitext(src)[1].lower(), 'raw')
+
+    if params['layout'] not in LAYOUTS:
+        raise ValueError(f'Unknown layout {params["layout"]}. Use one of: ' + ', '.join(LAYOUTS))
+
+    return params
+
+
+def open_source(src:str, params:dict):
+    """Block reader of input file
+
+    Args:
+        src (str): Path to input file.
+        params (dict): Import parameters (see `load_params`).
+
+    Returns:
+        Source with `nb_channels`, `nb_samples`, `dtype`, `names` and `blocks(block_samples)`.
+    """
+    if params['format'] == 'npy':
+        return _ArraySource(np.load(src, mmap_mode='r'), params['layout'])
+
+    if params['format'] == 'csv':
+        if params['layout'] != 'interleaved':
+            raise ValueError('CSV input has to be interleaved (one sample per row).')
+
+        return _CsvSource(src, params['delimiter'], params['skip_rows'], params['header'])
+
+    if params['format'] != 'raw':
+        raise ValueError(f'Unknown format {params["format"]}. Use one of: ' + ', '.join(sorted(set(FORMATS.values()))))
+
+    if not params['nb_channels']:
+        raise ValueError('Raw binary input requires `nb_channels`.')
+
+    dtype = np.dtype(params['dtype'])
+    nb_channels = int(params['nb_channels'])
+    nb_values, remainder = divmod(os.path.getsize(src) - params['header_bytes'], dtype.itemsize)
+
+    if remainder or nb_values % nb_channels:
+        raise ValueError(f'Size of {src} does not match {nb_channels} channels of {dtype}.')
+
+    nb_samples = nb_values // nb_channels
+    shape = (nb_samples, nb_channels) if params['layout'] == 'interleaved' else (nb_channels, nb_samples)
+
+    # np.memmap cannot map empty file
+    if not nb_samples:
+        return _ArraySource(np.empty(shape, dtype=dtype), params['layout'])
+
+    return _ArraySource(np.memmap(src, dtype=dtype, mode='r', offset=params['header_bytes'], shape=shape), params['layout'])
+
+
+def _per_channel(value, nb_channels:int) -> np.ndarray:
+    return np.broadcast_to(np.asarray(value, dtype=np.float64), (nb_channels,))[:, None]
+
+
+def convert(src:str, dst:str=None, config:Union[str,dict]=None, block_bytes:int=None, overwrite:bool=False) -> dict:
+    """Converts single input file into planted file
+
+    Samples are written to `<dst stem>.part.h5`, which is renamed to `dst`
+    once complete. Integer input stored with integer `storage_dtype` is
+    written unchanged and `gain` and `offset` go to `Scaling`; values
+    outside of the range of `storage_dtype` raise an error. Otherwise
+    values are converted block by block into `gain * value + offset`.
+
+    Args:
+        src (str): Path to input file.
+        dst (str, optional): Path to h5 file. Defaults to input path with `.h5` suffix.
+        config (Union[str,dict], optional): Shared config (see `load_params`). Defaults to None.
+        block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
+        overwrite (bool, optional): Replace existing `dst`. Defaults to False.
+
+    Returns:
+        dict: `src`, `dst`, `nb_channels`, `nb_samples`, `seconds` and `error`.
+    """
+    if dst is None:
+        dst = os.path.splitext(src)[0] + '.h5'
+
+    summary = {'src': src, 'dst': dst, 'nb_channels': None, 'nb_samples': 0, 'seconds': 0.0, 'error': None}
+
+    if os.path.exists(dst) and not overwrite:
+        summary['error'] = 'Output file exists.'
+        return summary
+
+    params = load_params(src, config)
+    source = open_source(src, params)
+    nb_channels = source.nb_channels
+
+    storage_dtype = np.dtype(DATASET_DTYPE if params['storage_dtype'] is None else params['storage_dtype'])
+    keep_raw = storage_dtype.kind in 'iu'
+
+    if keep_raw and source.dtype.kind not in 'iu':
+        raise ValueError('Integer storage requires integer input.')
+
+    # values of wider input are checked block by block
+    check_range = keep_raw and not np.can_cast(source.dtype, storage_dtype)
+    limits = np.iinfo(storage_dtype) if keep_raw else None
+
+    gain = None if params['gain'] is None else _per_channel(params['gain'], nb_channels)
+    offset = None if params['offset'] is None else _per_channel(params['offset'], nb_channels)
+
+    ch_names = params['channels'] or source.names
+    if ch_names is not None and len(ch_names) != nb_channels:
+        raise ValueError(f'Expected {nb_channels} channel names, got {len(ch_names)}.')
+
+    part = os.path.splitext(dst)[0] + '.part.h5'
+    t_start = time.perf_counter()
+
+    planter = PlantedH5()
+    planter.create(part, sampl_freq=params['sampl_freq'], storage_profile=params['storage_profile'])
+
+    try:
+        planter.create_dataset(
+            np.empty((nb_channels, 0), dtype=source.dtype if keep_raw else np.float32),
+            ch_names=ch_names,
+            datacache_name=params['datacache_name'],
+            unit_name=params['units'],
+            dtype=storage_dtype,
+            gain=None if gain is None else gain[:, 0],
+            offset=None if offset is None else offset[:, 0],
+            )
+
+        block_samples = block_length(planter.f_obj[DATASET_DNAME], axis=1, block_bytes=block_bytes)
+
+        for block in source.blocks(block_samples):
+            if keep_raw:
+                block = np.ascontiguousarray(block)
+                if check_range and block.size and (block.min() < limits.min or block.max() > limits.max):
+                    raise ValueError(f'Input values exceed range of storage type {storage_dtype}.')
+            else:
+                block = np.array(block, dtype=np.float32)
+                if gain is not None:
+                    block *= gain
+                if offset is not None:
+                    block += offset
+
+            planter.add_samples(block)
+            summary['nb_samples'] += block.shape[1]
+
+    except BaseException:
+        planter.close()
+        os.remove(part)
+        raise
+
+    planter.close()
+    os.replace(part, dst)
+
+    summary['nb_channels'] = nb_channels
+    summary['seconds'] = time.perf_counter() - t_start
+
+    return summary
+
+
+def _convert_job(job:tuple) -> dict:
+    """Converts file and records any error as failed file; module-level for process pool"""
+    src, dst, config, block_bytes, overwrite = job
+
+    try:
+        return convert(src, dst, config, block_bytes, overwrite)
+
+    except Exception as e:
+        return {'src': src, 'dst': dst, 'nb_channels': None, 'nb_samples': 0, 'seconds': 0.0, 'error': str(e)}
+
+
+def collect_inputs(paths:Union[str,list], patterns:list=None) -> list:
+    """Expands files and directories into sorted list of input files
+
+    Args:
+        paths (Union[str,list]): Files or directories (searched recursively).
+        patterns (list, optional): File name patterns within directories. Defaults to extensions of `FORMATS`.
+
+    Returns:
+        list: Absolute input file paths; sidecar JSON files are skipped.
+    """
+    if patterns is None:
+        patterns = ['*' + ext for ext in FORMATS]
+
+    return [path for path in collect_files(paths, patterns) if not path.lower().endswith('.json')]
+
+
+def convert_many(
+    sources:list,
+    out_dir:str=None,
+    config:Union[str,dict]=None,
+    max_workers:int=None,
+    block_bytes:int=None,
+    overwrite:bool=False,
+    ):
+    """Converts input files in parallel
+
+    Args:
+        sources (list): Paths to input files.
+        out_dir (str, optional): Directory of output files. Defaults to directory of each input.
+        config (Union[str,dict], optional): Shared config (see `load_params`). Defaults to None.
+        max_workers (int, optional): Number of converting processes, 0 converts in the calling process.
+            Defaults to None.
+        block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
+        overwrite (bool, optional): Replace existing output files. Defaults to False.
+
+    Yields:
+        dict: Summary of every converted file (see `convert`) in order of `sources`.
+    """
+    if isinstance(config, str):
+        with open(config) as f:
+            config = json.load(f)
+
+    jobs = []
+    for src in sources:
+        dst = None
+        if out_dir is not None:
+            dst = os.path.join(out_dir, os.path.splitext(os.path.basename(src))[0] + '.h5')
+
+        jobs.append((src, dst, config, block_bytes, overwrite))
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    if not max_workers or len(jobs) < 2:
+        yield from map(_convert_job, jobs)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        yield from executor.map(_convert_job, jobs)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='planter-import', description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('inputs', nargs='+', help='Input files or directories.')
+    parser.add_argument('-o', '--out-dir', help='Directory of output files. Defaults to directory of each input.')
+    parser.add_argument('-c', '--config', help='Shared JSON config, overridden by sidecars.')
+    parser.add_argument('-p', '--pattern', nargs='+', help='File name patterns within directories.')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Number of processes, 0 for none.')
+    parser.add_argument('--block-bytes', type=int, default=None)
+    parser.add_argument('--overwrite', action='store_true')
+    args = parser.parse_args()
+
+    sources = collect_inputs(args.inputs, args.pattern)
+    if args.out_dir is not None:
+        os.makedirs(args.out_dir, exist_ok=True)
+
+    nb_failed = 0
+    for summary in convert_many(sources, args.out_dir, args.config, args.workers, args.block_bytes, args.overwrite):
+        if summary['error'] is not None:
+            nb_failed += 1
+            print(f'FAILED {summary["src"]}: {summary["error"]}', file=sys.stderr)
+            continue
+
+        print(f'{summary["src"]} -> {summary["dst"]} | {summary["nb_channels"]} channels | {summary["nb_samples"]} samples | {summary["seconds"]:.2f} s')
+
+    print(f'{len(sources) - nb_failed} of {len(sources)} files converted')
+    sys.exit(1 if nb_failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+
+import numpy as np
+from typing import Union
+
+from .config.constants import *
+from .planter import PlantedH5
+
+
+class LiveReader():
+    """Reader following a recording written in SWMR mode
+
+    The file is opened as single-writer/multiple-reader reader, so it can
+    be read while another process appends samples after `start_swmr`.
+    `refresh` picks up the new extent of `Data`; `tail` keeps the last
+    samples in a buffer and reads only samples added since its last call.
+
+    Args:
+        f_path (str): Path to h5 file.
+        channels (Union[str,int,list], optional): Channel names or indices. Defaults to all channels
+            (of the datacache).
+        datacache_name (str, optional): Restrict channel names to given datacache. Defaults to None.
+        raw (bool, optional): Read stored values of integer `Data` without scaling. Defaults to False.
+    """
+
+    def __init__(self, f_path:str, channels:Union[str,int,list]=None, datacache_name:str=None, raw:bool=False):
+        self._planter = PlantedH5()
+        self._planter.open(f_path, mode='r', swmr=True)
+
+        f_obj = self._planter.f_obj
+        self._channel_ids = self._planter._channel_ids(channels, datacache_name)
+        self._scaling = None if raw else self._planter._get_scaling()
+
+        index = self._planter._get_channel_index()
+        self.channels = [index.names[row] for row in self._channel_ids]
+        self.sampl_freq = float(f_obj.attrs['Fs'][0])
+
+        self._dset = f_obj[DATASET_DNAME]
+        self._dtype = self._dset.dtype if self._scaling is None else np.dtype(np.float32)
+        self._marks = f_obj[MARKS_DNAME] if MARKS_DNAME in f_obj else None
+
+        self.nb_samples = self._dset.shape[1]
+        self._nb_marks_read = 0
+
+        self._buffer = None
+        self._buffer_end = 0
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    def close(self):
+        self._planter.close()
+
+
+    def refresh(self) -> int:
+        """Reloads extent of `Data` and `Marks` written so far
+
+        Returns:
+            int: Number of samples added since the previous refresh.
+        """
+        self._dset.refresh()
+        if self._marks is not None:
+            self._marks.refresh()
+
+        nb_new = self._dset.shape[1] - self.nb_samples
+        self.nb_samples = self._dset.shape[1]
+
+        return nb_new
+
+
+    def _read(self, start:int, stop:int) -> np.ndarray:
+        return self._planter._read_samples(self._channel_ids, start, stop, scaling=self._scaling)
+
+
+    def tail(self, n_samples:int, refresh:bool=True) -> np.ndarray:
+        """Last samples of the recording
+
+        Samples read by previous calls are kept, only the new extent of
+        `Data` is read from the file.
+
+        Args:
+            n_samples (int): Number of samples.
+            refresh (bool, optional): Refresh extent of `Data` first. Defaults to True.
+
+        Returns:
+            np.ndarray: Array of shape (channels, samples), shorter if the recording is shorter.
+        """
+        if refresh:
+            self.refresh()
+
+        end = self.nb_samples
+
+        if self._buffer is None or self._buffer.shape[1] < n_samples:
+            self._buffer = np.empty((self._channel_ids.shape[0], n_samples), dtype=self._dtype)
+            self._buffer_end = 0
+
+        # buffer holds samples up to `_buffer_end` aligned to its end
+        capacity = self._buffer.shape[1]
+        nb_new = end - self._buffer_end
+
+        if nb_new >= capacity:
+            self._buffer[:] = self._read(end - capacity, end)
+
+        elif nb_new > 0:
+            self._buffer[:, :capacity - nb_new] = self._buffer[:, nb_new:]
+            self._buffer[:, capacity - nb_new:] = self._read(self._buffer_end, end)
+
+        self._buffer_end = end
+
+        return self._buffer[:, capacity - min(n_samples, end):].copy()
+
+
+    def new_marks(self, refresh:bool=True) -> np.ndarray:
+        """Marks appended since the previous call
+
+        Args:
+            refresh (bool, optional): Refresh extent of `Marks` first. Defaults to True.
+
+        Returns:
+            np.ndarray: Structured array of marks in `MARKS_DTYPES`.
+        """
+        if self._marks is None:
+            return np.empty(0, dtype=MARKS_DTYPES)
+
+        if refresh:
+            self.refresh()
+
+        marks = self._marks[self._nb_marks_read:]
+        self._nb_marks_read += marks.shape[0]
+
+        return marks
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+
+import numpy as np
+from typing import Union
+
+
+class MarksIndex():
+    """In-memory index over `Marks` table
+
+    The table is loaded once as a structured array. Sorted orders of
+    `SampleLeft` and `SampleRight` answer interval queries with binary
+    search, string columns are grouped into lookup tables on first use.
+
+    Args:
+        marks (np.ndarray): Structured array in `MARKS_DTYPES`.
+    """
+
+    def __init__(self, marks:np.ndarray):
+        self.marks = marks
+
+        self._left_order = np.argsort(marks['SampleLeft'], kind='stable')
+        self._left_sorted = marks['SampleLeft'][self._left_order]
+
+        self._right_order = np.argsort(marks['SampleRight'], kind='stable')
+        self._right_sorted = marks['SampleRight'][self._right_order]
+
+        self._lookups = {}
+
+
+    def __len__(self):
+        return self.marks.shape[0]
+
+
+    def _lookup(self, field:str) -> dict:
+        """Returns mapping of field values to row ids
+
+        Args:
+            field (str): Name of string field (`Group`, `Channel`, `Info`).
+
+        Returns:
+            dict: Encoded value -> sorted array of row ids.
+        """
+        if field not in self._lookups:
+            values, inverse = np.unique(self.marks[field], return_inverse=True)
+            order = np.argsort(inverse, kind='stable')
+            bounds = np.searchsorted(inverse[order], np.arange(values.shape[0] + 1))
+
+            self._lookups[field] = {
+                value: order[bounds[idx]:bounds[idx + 1]] for idx, value in enumerate(values)
+                }
+
+        return self._lookups[field]
+
+
+    @staticmethod
+    def _encode(value:Union[str,bytes,list]) -> list:
+        """Encodes value or list of values into list of UTF-8 bytes"""
+        if isinstance(value, (str, bytes)):
+            value = [value]
+
+        return [item.encode('UTF-8') if isinstance(item, str) else item for item in value]
+
+
+    def _field_ids(self, field:str, value:list) -> np.ndarray:
+        """Row ids with `field` equal to any of `value`
+
+        Args:
+            field (str): Name of string field.
+            value (list): List of encoded values.
+
+        Returns:
+            np.ndarray: Row ids.
+        """
+        lookup = self._lookup(field)
+        ids = [lookup[item] for item in value if item in lookup]
+
+        if not ids:
+            return np.empty(0, dtype=np.intp)
+
+        return np.concatenate(ids) if len(ids) > 1 else ids[0]
+
+
+    def _range_ids(self, sample_range:tuple) -> np.ndarray:
+        """Row ids of marks overlapping half-open interval
+
+        Args:
+            sample_range (tuple): Interval `(start, stop)`; mark overlaps if
+                `SampleLeft < stop` and `SampleRight >= start`.
+
+        Returns:
+            np.ndarray: Row ids.
+        """
+        start, stop = sample_range
+
+        # marks starting before stop and marks ending after start
+        left_ids = self._left_order[:np.searchsorted(self._left_sorted, stop, side='left')]
+        right_ids = self._right_order[np.searchsorted(self._right_sorted, start, side='left'):]
+
+        # filter the smaller candidate set by the other condition
+        if left_ids.shape[0] <= right_ids.shape[0]:
+            return left_ids[self.marks['SampleRight'][left_ids] >= start]
+
+        return right_ids[self.marks['SampleLeft'][right_ids] < stop]
+
+
+    def _filter(self, ids:np.ndarray, condition:tuple) -> np.ndarray:
+        """Filters row ids by single condition evaluated on the rows only"""
+        field, value = condition
+
+        if field == 'sample_range':
+            start, stop = value
+            keep = (self.marks['SampleLeft'][ids] < stop) & (self.marks['SampleRight'][ids] >= start)
+        else:
+            keep = np.isin(self.marks[field][ids], value)
+
+        return ids[keep]
+
+
+    def select(self, group:Union[str,list]=None, channel:Union[str,list]=None, info:Union[str,list]=None, sample_range:tuple=None) -> np.ndarray:
+        """Row ids of marks matching all given conditions
+
+        Args:
+            group (Union[str,list], optional): Group or list of groups. Defaults to None.
+            channel (Union[str,list], optional): Channel or list of channels. Defaults to None.
+            info (Union[str,list], optional): Info or list of infos. Defaults to None.
+            sample_range (tuple, optional): Half-open interval `(start, stop)` of samples. Defaults to None.
+
+        Returns:
+            np.ndarray: Sorted row ids.
+        """
+        conditions = []
+
+        for field, value in (('Group', group), ('Channel', channel), ('Info', info)):
+            if value is not None:
+                value = self._encode(value)
+                conditions.append(((field, value), self._field_ids(field, value)))
+
+        if sample_range is not None:
+            conditions.append((('sample_range', sample_range), self._range_ids(sample_range)))
+
+        if not conditions:
+            return np.arange(len(self))
+
+        # start from the smallest candidate set and test remaining conditions on its rows
+        conditions.sort(key=lambda item: item[1].shape[0])
+        ids = conditions[0][1]
+        for condition, _ in conditions[1:]:
+            ids = self._filter(ids, condition)
+
+        return np.sort(ids)
+
+
+    def mask(self, **kwargs) -> np.ndarray:
+        """Boolean mask of marks matching all given conditions
+
+        Args:
+            **kwargs: Conditions as accepted by `select`.
+
+        Returns:
+            np.ndarray: Boolean mask over all rows.
+        """
+        mask = np.zeros(len(self), dtype=bool)
+        mask[self.select(**kwargs)] = True
+
+        return mask
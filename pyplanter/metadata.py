@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+
+import numpy as np
+
+from .config.constants import *
+
+
+class Metadata():
+    """Lazily loaded snapshot of metadata of opened file
+
+    Attributes, shape of `Data`, `ChannelSettings` and mark counts are
+    read on first access and kept until the planter invalidates them by
+    a write. Channel names, datacaches and units come from the channel
+    index of the planter, which is cached the same way. Shape of `Data`
+    is cached only in read-only files that are not followed in SWMR mode.
+
+    Args:
+        planter (PlantedH5): Planter with opened file.
+    """
+
+    PARTS = ('attrs', 'data', 'settings', 'marks')
+
+    def __init__(self, planter):
+        self._planter = planter
+        self._cache = {}
+
+
+    def invalidate(self, *parts):
+        """Drops cached parts, all of them if none is given"""
+        if not parts:
+            self._cache.clear()
+
+        for part in parts:
+            self._cache.pop(part, None)
+
+
+    def load(self):
+        """Reads all parts at once
+
+        Returns:
+            Metadata: The snapshot itself.
+        """
+        for part in self.PARTS:
+            self._get(part)
+
+        self._planter._get_channel_index()
+
+        return self
+
+
+    def _get(self, part:str):
+        if part in self._cache:
+            return self._cache[part]
+
+        content = getattr(self, '_load_' + part)()
+
+        f_obj = self._planter.f_obj
+        if part != 'data' or not (self._planter.is_writable() or f_obj.swmr_mode):
+            self._cache[part] = content
+
+        return content
+
+
+    def _load_attrs(self) -> dict:
+        return dict(self._planter.f_obj.attrs.items())
+
+
+    def _load_data(self) -> tuple:
+        f_obj = self._planter.f_obj
+        if DATASET_DNAME not in f_obj:
+            return None
+
+        dset = f_obj[DATASET_DNAME]
+
+        return dset.shape, dset.dtype
+
+
+    def _load_settings(self) -> np.ndarray:
+        f_obj = self._planter.f_obj
+
+        return f_obj[CHANNEL_DNAME][:] if CHANNEL_DNAME in f_obj else np.empty(0, dtype=CHANNEL_DTYPES)
+
+
+    def _load_marks(self) -> dict:
+        index = self._planter._marks_index
+        f_obj = self._planter.f_obj
+
+        # only the group column is read unless marks are already indexed
+        if index is not None:
+            groups = index.marks['Group']
+        elif MARKS_DNAME in f_obj:
+            groups = f_obj[MARKS_DNAME].fields('Group')[:]
+        else:
+            return {}
+
+        values, counts = np.unique(groups, return_counts=True)
+
+        return {value.decode('UTF-8'): int(count) for value, count in zip(values, counts)}
+
+
+    @property
+    def attrs(self) -> dict:
+        """File attributes"""
+        return self._get('attrs')
+
+
+    @property
+    def sampl_freq(self) -> float:
+        """Sampling frequency or None"""
+        attrs = self.attrs
+
+        return float(np.asarray(attrs['Fs']).flat[0]) if 'Fs' in attrs else None
+
+
+    @property
+    def shape(self) -> tuple:
+        """Shape of `Data` (channels, samples) or None"""
+        data = self._get('data')
+
+        return None if data is None else data[0]
+
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Storage type of `Data` or None"""
+        data = self._get('data')
+
+        return None if data is None else data[1]
+
+
+    @property
+    def nb_channels(self) -> int:
+        shape = self.shape
+
+        return 0 if shape is None else shape[0]
+
+
+    @property
+    def nb_samples(self) -> int:
+        shape = self.shape
+
+        return 0 if shape is None else shape[1]
+
+
+    @property
+    def channels(self) -> list:
+        """Channel names in order of `Data` rows"""
+        return list(self._planter._get_channel_index().names)
+
+
+    @property
+    def datacaches(self) -> list:
+        """Datacache names in order of first appearance"""
+        return list(dict.fromkeys(self._planter._get_channel_index().datacaches))
+
+
+    @property
+    def units(self) -> list:
+        """Physical units of channels"""
+        return list(self._planter._get_channel_index().units)
+
+
+    @property
+    def channel_settings(self) -> np.ndarray:
+        """Structured array in `CHANNEL_DTYPES`"""
+        return self._get('settings')
+
+
+    @property
+    def mark_counts(self) -> dict:
+        """Number of marks of every group"""
+        return self._get('marks')
+
+
+    @property
+    def nb_marks(self) -> int:
+        return sum(self.mark_counts.values())
+
+
+    def summary(self) -> dict:
+        """Snapshot as plain dictionary
+
+        Returns:
+            dict: `path`, `sampl_freq`, `nb_channels`, `nb_samples`, `dtype`, `channels`,
+                `datacaches`, `units` and `mark_counts`.
+        """
+        dtype = self.dtype
+
+        return {
+            'path': self._planter.f_obj.filename,
+            'sampl_freq': self.sampl_freq,
+            'nb_channels': self.nb_channels,
+            'nb_samples': self.nb_samples,
+            'dtype': None if dtype is None else dtype.str,
+            'channels': self.channels,
+            'datacaches': self.datacaches,
+            'units': self.units,
+            'mark_counts': dict(self.mark_counts),
+            }
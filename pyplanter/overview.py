@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+
+import numpy as np
+from typing import Union
+
+from .config.constants import *
+from .config.config import *
+from .utils import read_rows, apply_scaling
+
+
+def _reduce_bins(block:np.ndarray, ratio:int, from_samples:bool) -> np.ndarray:
+    """Reduces block of samples or bins into coarser min/max/mean bins
+
+    Args:
+        block (np.ndarray): Samples of shape (channels, n) or bins of shape (channels, n, 3).
+        ratio (int): Number of source items per bin.
+        from_samples (bool): Block contains raw samples.
+
+    Returns:
+        np.ndarray: Bins of shape (channels, n // ratio, 3).
+    """
+    nb_bins = block.shape[1] // ratio
+    shape = (block.shape[0], nb_bins, ratio)
+
+    if from_samples:
+        values = block[:, :nb_bins * ratio].reshape(shape)
+        mins, maxs, means = values, values, values
+    else:
+        mins = block[:, :nb_bins * ratio, 0].reshape(shape)
+        maxs = block[:, :nb_bins * ratio, 1].reshape(shape)
+        means = block[:, :nb_bins * ratio, 2].reshape(shape)
+
+    return np.stack(
+        [mins.min(axis=2), maxs.max(axis=2), means.mean(axis=2, dtype=np.float64)],
+        axis=-1,
+        ).astype(OVERVIEW_DTYPE)
+
+
+class OverviewMixin():
+    """Multi-resolution min/max/mean overview of `Data`
+
+    Every level is stored in group `Overview` as dataset of shape
+    (channels, bins, 3) holding minimum, maximum and mean of `factor`
+    consecutive samples. Levels are derived from the previous one, so each
+    factor has to be a multiple of the previous factor. Only complete
+    bins are stored; samples past the last complete bin of a level are
+    not covered by it.
+    """
+
+    def _overview_levels(self) -> list:
+        """Returns list of (factor, dataset) sorted by factor"""
+        if OVERVIEW_GNAME not in self.f_obj:
+            return []
+
+        levels = [(int(dset.attrs['Factor']), dset) for dset in self.f_obj[OVERVIEW_GNAME].values()]
+
+        return sorted(levels, key=lambda item: item[0])
+
+
+    def build_overview(self, factors:Union[list,tuple]=None, block_bytes:int=None):
+        """Builds overview pyramid of whole `Data`
+
+        Once built, the overview is updated together with `Data`.
+
+        Args:
+            factors (Union[list,tuple], optional): Decimation factors, each a multiple of the previous one.
+                Defaults to `DEFAULT_PARAMS['overview_factors']`.
+            block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
+
+        Raises:
+            ValueError: Invalid decimation factors.
+        """
+        if factors is None:
+            factors = DEFAULT_PARAMS['overview_factors']
+
+        factors = sorted(int(factor) for factor in factors)
+        if factors[0] < 2 or any(high % low for low, high in zip(factors[:-1], factors[1:])):
+            raise ValueError('Overview factors have to be larger than 1 and multiples of each other.')
+
+        self.remove_overview()
+
+        if DATASET_DNAME not in self.f_obj:
+            return
+
+        group = self.f_obj.create_group(OVERVIEW_GNAME)
+        nb_channels = self.f_obj[DATASET_DNAME].shape[0]
+
+        for factor in factors:
+            dset = group.create_dataset(
+                str(factor),
+                shape=(nb_channels, 0, 3),
+                dtype=OVERVIEW_DTYPE,
+                chunks=(1, OVERVIEW_CHUNK_BINS, 3),
+                maxshape=(None, None, 3),
+                )
+            dset.attrs['Factor'] = factor
+
+        self._update_overview(from_sample=0, block_bytes=block_bytes)
+
+
+    def remove_overview(self):
+        """Removes overview pyramid"""
+        if OVERVIEW_GNAME in self.f_obj:
+            del self.f_obj[OVERVIEW_GNAME]
+
+
+    def _update_overview(self, from_sample:int=0, stop:int=None, rows:slice=None, block_bytes:int=None):
+        """Recomputes overview bins from given sample on
+
+        Bins starting before `from_sample` are kept, the rest is recomputed
+        from `Data` (first level) or from the previous level.
+
+        Args:
+            from_sample (int, optional): First changed sample. Defaults to 0.
+            stop (int, optional): Number of valid samples of `Data`. Defaults to `Data.shape[1]`.
+            rows (slice, optional): Recomputed channels; levels are resized to the number
+                of channels of `Data`. Defaults to all channels.
+            block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
+        """
+        levels = self._overview_levels()
+        if not levels:
+            return
+
+        if block_bytes is None:
+            block_bytes = DEFAULT_PARAMS['block_bytes']
+
+        data = self.f_obj[DATASET_DNAME]
+        stop = data.shape[1] if stop is None else stop
+        rows = slice(None) if rows is None else rows
+
+        source, source_factor = data, 1
+        for factor, dset in levels:
+            ratio = factor // source_factor
+            first_bin = from_sample // factor
+            nb_bins = stop // factor
+
+            dset.resize((data.shape[0], nb_bins, 3))
+
+            nb_rows = len(range(*rows.indices(data.shape[0])))
+            item_bytes = max(1, nb_rows) * ratio * source.dtype.itemsize * (1 if source is data else 3)
+            step = max(1, block_bytes // item_bytes)
+
+            for start in range(first_bin, nb_bins, step):
+                end = min(start + step, nb_bins)
+                block = source[rows, start * ratio:end * ratio]
+                dset[rows, start:end] = _reduce_bins(block, ratio, from_samples=source is data)
+
+            source, source_factor = dset, factor
+
+
+    def read_overview(
+        self,
+        channels:Union[str,int,list]=None,
+        t0:float=None,
+        t1:float=None,
+        max_points:int=2000,
+        datacache_name:str=None,
+        ) -> dict:
+        """Reads decimated view of channels for plotting
+
+        Raw samples are read if the time range holds at most `max_points`
+        samples. Otherwise the finest overview level with at most
+        `max_points` bins in the range is read; if even the coarsest level
+        has more bins, its bins are merged on the fly. Values of integer
+        `Data` are scaled into physical values.
+
+        Args:
+            channels (Union[str,int,list], optional): Channel names or indices. Defaults to all channels.
+            t0 (float, optional): Start time in seconds. Defaults to beginning of the record.
+            t1 (float, optional): Stop time in seconds. Defaults to end of the record.
+            max_points (int, optional): Maximum number of points per channel. Defaults to 2000.
+            datacache_name (str, optional): Restrict channel names to given datacache. Defaults to None.
+
+        Returns:
+            dict: `factor`, `time` (start of bins in seconds) and `min`, `max`, `mean`
+                arrays of shape (channels, points).
+
+        Raises:
+            ValueError: Range is longer than `max_points` samples and no overview exists.
+        """
+        data = self.f_obj[DATASET_DNAME]
+        sampl_freq = self.metadata.sampl_freq
+
+        channel_ids = self._channel_ids(channels, datacache_name)
+        scaling = self._get_scaling()
+
+        start = 0 if t0 is None else max(0, int(t0 * sampl_freq))
+        stop = data.shape[1] if t1 is None else min(data.shape[1], int(np.ceil(t1 * sampl_freq)))
+        stop = max(start, stop)
+
+        if stop - start <= max_points:
+            values = read_rows(data, channel_ids, (slice(start, stop),))
+
+            if scaling is not None:
+                values = apply_scaling(values.astype(np.float32), scaling[channel_ids])
+
+            return {
+                'factor': 1,
+                'time': np.arange(start, stop) / sampl_freq,
+                'min': values,
+                'max': values,
+                'mean': values,
+                }
+
+        levels = self._overview_levels()
+        if not levels:
+            raise ValueError(f'Range of {stop - start} samples exceeds `max_points`; build overview first using `build_overview`.')
+
+        # finest level with at most max_points bins in the range, coarsest otherwise
+        for factor, dset in levels:
+            first_bin = start // factor
+            end_bin = max(first_bin, min(-(-stop // factor), dset.shape[1]))
+            if end_bin - first_bin <= max_points:
+                break
+
+        bins = read_rows(dset, channel_ids, (slice(first_bin, end_bin),))
+        starts = np.arange(first_bin, end_bin) * factor
+
+        # too many bins even in the coarsest level
+        nb_bins = bins.shape[1]
+        if nb_bins > max_points:
+            ratio = -(-nb_bins // max_points)
+            parts = [_reduce_bins(bins, ratio, from_samples=False)]
+            if nb_bins % ratio:
+                parts.append(_reduce_bins(bins[:, nb_bins // ratio * ratio:], nb_bins % ratio, from_samples=False))
+
+            bins = np.concatenate(parts, axis=1)
+            starts = starts[::ratio]
+            factor *= ratio
+
+        if scaling is not None:
+            apply_scaling(bins, scaling[channel_ids])
+
+        return {
+            'factor': factor,
+            'time': starts / sampl_freq,
+            'min': bins[..., 0],
+            'max': bins[..., 1],
+            'mean': bins[..., 2],
+            }
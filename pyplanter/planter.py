@@ -1,13 +1,29 @@
 #!/usr/bin/env python
 
 import os
+import re
 import shutil
+import contextlib
+import collections
+import multiprocessing
 import h5py as h
 import numpy as np
 from typing import Union
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 from .config.constants import *
 from .config.config import *
+from .marks import MarksIndex
+from .channels import ChannelIndex
+from .metadata import Metadata
+from .batch import Batch
+from .utils import encode_field, block_length, dataset_storage, fit_scaling, quantize, apply_scaling
+from .writer import StreamWriter, AsyncWriter
+from .overview import OverviewMixin
+from .stats import StatsMixin
+from .derive import DeriveMixin
+from .verify import VerifyMixin
+from .profiler import Profiler, instrument
 
 
 class DatasetMixin():
@@ -31,19 +47,201 @@ class DatasetMixin():
                 del self.f_obj[dset]
 
 
-    def create_dataset(self, data_arr:np.ndarray, ch_names:list=None, datacache_name:str=None, unit_name:Union[str, list]=None):
-        """_summary_
+    def _check_no_batch(self, method_name:str):
+        """Raises error for methods that cannot be deferred by `batch`"""
+        if self._batch is not None:
+            raise RuntimeError(f'Method `{method_name}` is not supported inside batch.')
+
+
+    def _make_resizable(self, dname:str) -> h.Dataset:
+        """Converts dataset into chunked, resizable one if necessary
+
+        Files produced by other tools may store datasets with fixed size.
+        These are copied block by block into chunked dataset with unlimited
+        maximum shape, which then replaces the original one.
+
+        Args:
+            dname (str): Dataset name.
+
+        Returns:
+            h.Dataset: Resizable dataset handle.
+        """
+        dset = self.f_obj[dname]
+
+        if dset.chunks and all(item is None for item in dset.maxshape[:2]):
+            return dset
+
+        if dset.ndim == 1:
+            storage_kwargs = {'chunks': (TABLE_CHUNK_ROWS,)}
+        else:
+            storage_kwargs = self._storage_kwargs(dset.shape[0])
+
+        tmp_name = dname + '_resizable'
+        new_dset = self.f_obj.create_dataset(
+            tmp_name,
+            shape=dset.shape,
+            dtype=dset.dtype,
+            maxshape=(None,) * dset.ndim,
+            **storage_kwargs,
+            )
+
+        # copy content block by block along the last axis
+        axis = dset.ndim - 1
+        step = block_length(dset, axis)
+        for start in range(0, dset.shape[axis], step):
+            sel = (slice(None),) * axis + (slice(start, start + step),)
+            new_dset[sel] = dset[sel]
+
+        for attr_name, attr_value in dset.attrs.items():
+            new_dset.attrs[attr_name] = attr_value
+
+        del self.f_obj[dname]
+        self.f_obj.move(tmp_name, dname)
+
+        return self.f_obj[dname]
+
+
+    def _append_rows(self, dname:str, content:np.ndarray):
+        """Appends rows into resizable table dataset
+
+        Args:
+            dname (str): Dataset name.
+            content (np.ndarray): Structured array of rows.
+        """
+        if self._batch is not None and dname in Batch.TABLES:
+            self._batch.append(dname, content)
+            return
+
+        if dname not in self.f_obj:
+            self.f_obj.create_dataset(dname, data=content, chunks=(TABLE_CHUNK_ROWS,), maxshape=(None,))
+            return
+
+        dset = self._make_resizable(dname)
+
+        nb_rows = dset.shape[0]
+        dset.resize(nb_rows + content.shape[0], axis=0)
+        try:
+            dset[nb_rows:] = content
+        except BaseException:
+            # no zero-filled rows are left behind
+            dset.resize(nb_rows, axis=0)
+            raise
+
+        self._swmr_flush()
+
+
+    def _storage_kwargs(self, nb_channels:int, storage_profile:Union[str,dict]=None) -> dict:
+        """Keyword arguments of `Data` storage for `h5py.Group.create_dataset`
+
+        If no profile is given, the profile of the file is used. If neither is
+        set, storage properties of the existing `Data` are preserved.
 
         Args:
-            data_arr (_type_): _description_
+            nb_channels (int): Number of channels of the dataset.
+            storage_profile (Union[str,dict], optional): Name of profile in `STORAGE_PROFILES`
+                or profile dictionary. Defaults to None.
+
+        Raises:
+            ValueError: Unknown storage profile.
+
+        Returns:
+            dict: Keyword arguments (chunks, compression, shuffle, ...).
+        """
+        if storage_profile is None:
+            storage_profile = self._storage_profile
+
+        if storage_profile is None and DATASET_DNAME in self.f_obj:
+            storage_profile = dataset_storage(self.f_obj[DATASET_DNAME])
+
+        if storage_profile is None:
+            storage_profile = DEFAULT_PARAMS['storage_profile']
+
+        if isinstance(storage_profile, str):
+            if storage_profile not in STORAGE_PROFILES:
+                raise ValueError(f'Storage profile {storage_profile} does not exist. Use one of: ' + ', '.join(STORAGE_PROFILES))
+
+            storage_profile = STORAGE_PROFILES[storage_profile]
+
+        kwargs = dict(storage_profile)
+
+        # resolve chunk shape for current number of channels
+        chunks = kwargs.get('chunks', True)
+        if isinstance(chunks, (tuple, list)):
+            nb_channels = max(1, nb_channels)
+            kwargs['chunks'] = (nb_channels if chunks[0] is None else min(chunks[0], nb_channels), chunks[1])
+
+        return kwargs
+
+
+    def create_dataset(
+        self,
+        data_arr:np.ndarray,
+        ch_names:list=None,
+        datacache_name:str=None,
+        unit_name:Union[str, list]=None,
+        storage_profile:Union[str,dict]=None,
+        dtype:Union[str,np.dtype]=None,
+        gain:Union[float,list]=None,
+        offset:Union[float,list]=None,
+        block_bytes:int=None,
+        ):
+        """Creates `Data` dataset together with channel parameters
+
+        Existing `Data`, `Info` and `ChannelSettings` are replaced. Data are
+        written block by block, converting only one block at a time.
+
+        With integer `dtype`, values are stored quantized as
+        `(value - offset) / gain`; per-channel gain and offset are kept in
+        `Scaling` beside `Info` and applied by `read`. Such files have to be
+        exported by `export_float` to be opened in Signal Plant.
+
+        Args:
+            data_arr (np.ndarray): Array of shape (channels, samples).
+            ch_names (list, optional): Channel names. Defaults to channel indices.
+            datacache_name (str, optional): Datacache name. Defaults to `DEFAULT_PARAMS['datacache_name']`.
+            unit_name (Union[str, list], optional): Physical unit(s). Defaults to `DEFAULT_PARAMS['data_units']`.
+            storage_profile (Union[str,dict], optional): Chunking and filters of `Data`, name of profile
+                in `STORAGE_PROFILES` or profile dictionary. Defaults to profile of the file.
+            dtype (Union[str,np.dtype], optional): Storage type of `Data`, float or integer. Defaults to `DATASET_DTYPE`.
+            gain (Union[float,list], optional): Gain of channels for integer storage. Defaults to fit of data range.
+            offset (Union[float,list], optional): Offset of channels for integer storage. Defaults to fit of data range.
+            block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
         """
 
+        dtype = np.dtype(DATASET_DTYPE if dtype is None else dtype)
+        scaling = self._channel_scaling(data_arr, dtype, gain, offset)
+
+        storage_kwargs = self._storage_kwargs(data_arr.shape[0], storage_profile)
+        overview_factors = [factor for factor, _ in self._overview_levels()]
+        stats_yrange = self.f_obj[STATS_DNAME].attrs.get('YRange', 0) if STATS_DNAME in self.f_obj else None
+        checksums = CHECKSUMS_DNAME in self.f_obj
+
         # remove old dataset and all related structures
-        if DATASET_DNAME in self.f_obj:
-            self._remove_dataset(dname=[DATASET_DNAME, INFO_DNAME, CHANNEL_DNAME])
+        if self._batch is not None:
+            self._batch.replace_data(self)
+
+        elif DATASET_DNAME in self.f_obj:
+            self._remove_dataset(dname=[DATASET_DNAME, INFO_DNAME, CHANNEL_DNAME, SCALING_DNAME, STATS_DNAME, CHECKSUMS_DNAME, OVERVIEW_GNAME])
+            self._invalidate_channel_index()
 
         # create new dataset
-        self.f_obj.create_dataset(DATASET_DNAME, dtype=DATASET_DTYPE, data=data_arr, chunks=True, maxshape=(None, None))
+        dset = self.f_obj.create_dataset(DATASET_DNAME, shape=data_arr.shape, dtype=dtype, maxshape=(None, None), **storage_kwargs)
+
+        step = block_length(dset, axis=1, block_bytes=block_bytes)
+        for start in range(0, data_arr.shape[1], step):
+            dset[:, start:start + step] = self._to_storage(data_arr[:, start:start + step], scaling)
+
+        if scaling is not None:
+            self._append_rows(SCALING_DNAME, scaling)
+
+        if overview_factors:
+            self.build_overview(overview_factors)
+
+        if stats_yrange is not None:
+            self.compute_channel_stats(yrange=bool(stats_yrange), max_workers=0, block_bytes=block_bytes)
+
+        if checksums:
+            self.compute_checksums(max_workers=0, block_bytes=block_bytes)
 
         # generate channel parameters
         if ch_names is None:
@@ -52,6 +250,61 @@ class DatasetMixin():
         self._add_channel_params(ch_names, datacache_name, unit_name)
 
 
+    def _channel_scaling(self, data_arr:np.ndarray, dtype:np.dtype, gain:Union[float,list]=None, offset:Union[float,list]=None) -> np.ndarray:
+        """Gain and offset of new channels stored as integers
+
+        Args:
+            data_arr (np.ndarray): Array of shape (channels, samples).
+            dtype (np.dtype): Storage type of `Data`.
+            gain (Union[float,list], optional): Gain of channels. Defaults to fit of data range.
+            offset (Union[float,list], optional): Offset of channels. Defaults to fit of data range.
+
+        Returns:
+            np.ndarray: Structured array in `SCALING_DTYPES` or None for float storage.
+        """
+        if dtype.kind not in 'iu':
+            return None
+
+        scaling = fit_scaling(data_arr, dtype)
+
+        if gain is not None:
+            scaling['Gain'] = gain
+        if offset is not None:
+            scaling['Offset'] = offset
+
+        return scaling
+
+
+    def _get_scaling(self) -> np.ndarray:
+        """Returns gain and offset of all channels
+
+        Returns:
+            np.ndarray: Structured array in `SCALING_DTYPES` or None for float storage.
+        """
+        if self._batch is not None:
+            return self._batch.table(self, SCALING_DNAME)
+
+        if SCALING_DNAME in self.f_obj:
+            return self.f_obj[SCALING_DNAME][:]
+
+
+    def _to_storage(self, data_arr:np.ndarray, scaling:np.ndarray=None) -> np.ndarray:
+        """Converts physical values into values stored in `Data`
+
+        Args:
+            data_arr (np.ndarray): Array of shape (channels, samples).
+            scaling (np.ndarray, optional): Gain and offset of the channels. None for float storage.
+
+        Returns:
+            np.ndarray: Quantized array or `data_arr` itself for float storage.
+        """
+        # integer input is taken as already quantized
+        if scaling is None or data_arr.dtype.kind in 'iu':
+            return data_arr
+
+        return quantize(data_arr, scaling, self.f_obj[DATASET_DNAME].dtype)
+
+
     def add_samples(self, data_arr:np.ndarray, dim:int=1):
         """_summary_
 
@@ -66,7 +319,7 @@ class DatasetMixin():
 
         # Check for existing dataset
         if not DATASET_DNAME in self.f_obj:
-            self.create_dataset(self, data_arr)
+            self.create_dataset(data_arr)
             return
 
         # Check for data shape consistency
@@ -77,52 +330,337 @@ class DatasetMixin():
                 got {data_arr.shape[DIM_MAPPING[dim]]} instead."""
                 )            
 
-        self.f_obj[DATASET_DNAME].resize(
-            self.f_obj[DATASET_DNAME].shape[dim] + data_arr.shape[dim],
+        dset = self._make_resizable(DATASET_DNAME)
+        nb_items = dset.shape[dim]
+
+        dset.resize(
+            nb_items + data_arr.shape[dim],
             axis=dim,
             )
         
         if dim == 0:
-            self.f_obj[DATASET_DNAME][-data_arr.shape[dim]:, :] = data_arr
+            dset[-data_arr.shape[dim]:, :] = data_arr
+            self._update_overview(rows=slice(nb_items, None))
+            self._update_stats(rows=slice(nb_items, None))
+            self._update_checksums(rows=slice(nb_items, None))
         
         if dim == 1:
-            self.f_obj[DATASET_DNAME][:, -data_arr.shape[dim]:] = data_arr
+            dset[:, -data_arr.shape[dim]:] = self._to_storage(data_arr, self._get_scaling())
+            self._update_overview(from_sample=nb_items)
+            self._update_stats(from_sample=nb_items)
+            self._update_checksums(from_sample=nb_items)
+
+        self._swmr_flush()
     
 
-    def remove_samples(self, sample_range:tuple):
-        """_summary_
+    def _sample_range(self, start_s:float=None, stop_s:float=None) -> tuple:
+        """Converts time range in seconds into half-open range of samples
+
+        Args:
+            start_s (float, optional): Start time in seconds. Defaults to beginning of the record.
+            stop_s (float, optional): Stop time in seconds. Defaults to end of the record.
+
+        Returns:
+            tuple: `(start, stop)` clipped to the length of `Data`.
+        """
+        nb_samples = self.f_obj[DATASET_DNAME].shape[1]
+        sampl_freq = self.metadata.sampl_freq
+
+        start = 0 if start_s is None else int(round(start_s * sampl_freq))
+        stop = nb_samples if stop_s is None else int(round(stop_s * sampl_freq))
+
+        start = min(max(start, 0), nb_samples)
+        stop = min(max(stop, start), nb_samples)
+
+        return start, stop
+
+
+    def read(
+        self,
+        channels:Union[str,int,list]=None,
+        start_s:float=None,
+        stop_s:float=None,
+        datacache_name:str=None,
+        out:np.ndarray=None,
+        raw:bool=False,
+        ) -> np.ndarray:
+        """Reads time window of channels
+
+        Channel names and times are translated into hyperslabs; runs of
+        adjacent channels are read with single selection directly into the
+        output array. Integer `Data` is converted into physical values
+        (float32) using gain and offset from `Scaling`, unless `raw`.
+
+        Args:
+            channels (Union[str,int,list], optional): Channel names or indices. Defaults to all channels
+                (of the datacache).
+            start_s (float, optional): Start time in seconds. Defaults to beginning of the record.
+            stop_s (float, optional): Stop time in seconds. Defaults to end of the record.
+            datacache_name (str, optional): Restrict channel names to given datacache. Defaults to None.
+            out (np.ndarray, optional): C-contiguous array of shape (channels, samples) to read into.
+                Defaults to newly allocated array.
+            raw (bool, optional): Return stored values of integer `Data` without scaling. Defaults to False.
+
+        Raises:
+            ValueError: Shape or type of `out` does not match the selection.
+
+        Returns:
+            np.ndarray: Array of shape (channels, samples).
+        """
+        channel_ids = self._channel_ids(channels, datacache_name)
+        start, stop = self._sample_range(start_s, stop_s)
+
+        return self._read_samples(channel_ids, start, stop, out=out, scaling=None if raw else self._get_scaling())
+
+
+    def _read_samples(self, channel_ids:np.ndarray, start:int, stop:int, out:np.ndarray=None, scaling:np.ndarray=None) -> np.ndarray:
+        """Reads half-open range of samples of channels given by rows
+
+        Args:
+            channel_ids (np.ndarray): Rows of `Data`.
+            start (int): First sample.
+            stop (int): Stop sample.
+            out (np.ndarray, optional): C-contiguous array of shape (channels, samples) to read into.
+                Defaults to newly allocated array.
+            scaling (np.ndarray, optional): Gain and offset of all channels of integer `Data`.
+                Defaults to None (stored values).
+
+        Raises:
+            ValueError: Shape or type of `out` does not match the selection.
+
+        Returns:
+            np.ndarray: Array of shape (channels, samples).
+        """
+        dset = self.f_obj[DATASET_DNAME]
+        shape = (channel_ids.shape[0], stop - start)
+
+        if out is None:
+            out = np.empty(shape, dtype=dset.dtype if scaling is None else np.float32)
+
+        elif out.shape != shape:
+            raise ValueError(f'Shape of output array {out.shape} does not match selection {shape}.')
+
+        elif scaling is not None and out.dtype.kind != 'f':
+            raise ValueError(f'Scaled values can not be read into array of type {out.dtype}.')
+
+        if not out.size:
+            return out
+
+        # memory-mapped `Data` is read through page faults
+        if self._data_map is not None:
+            dset = self._data_map
+
+        # split channels into runs of adjacent rows
+        breaks = np.flatnonzero(np.diff(channel_ids) != 1) + 1
+        bounds = np.concatenate([[0], breaks, [channel_ids.shape[0]]])
+
+        for first, last in zip(bounds[:-1], bounds[1:]):
+            row = int(channel_ids[first])
+
+            if isinstance(dset, np.ndarray):
+                out[first:last] = dset[row:row + last - first, start:stop]
+                continue
+
+            dset.read_direct(
+                out,
+                source_sel=np.s_[row:row + last - first, start:stop],
+                dest_sel=np.s_[first:last, :],
+                )
+
+        if scaling is not None:
+            apply_scaling(out, scaling[channel_ids])
+
+        return out
+
+
+    def finalize(self, contiguous:bool=True, block_bytes:int=None):
+        """Finalizes file for write-once/read-many use
+
+        With `contiguous`, chunked `Data` is rewritten block by block into
+        contiguous, unfiltered layout that can be memory-mapped (see `open`
+        with `mmap`). Appending to the finalized `Data` converts it back
+        into chunked, resizable layout.
+
+        Args:
+            contiguous (bool, optional): Rewrite `Data` into contiguous layout. Defaults to True.
+            block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
+        """
+        self._check_no_batch('finalize')
+
+        if contiguous and DATASET_DNAME in self.f_obj and self.f_obj[DATASET_DNAME].chunks:
+            dset = self.f_obj[DATASET_DNAME]
+
+            tmp_name = DATASET_DNAME + '_contiguous'
+            new_dset = self.f_obj.create_dataset(tmp_name, shape=dset.shape, dtype=dset.dtype)
+
+            step = block_length(dset, axis=1, block_bytes=block_bytes)
+            for start in range(0, dset.shape[1], step):
+                new_dset[:, start:start + step] = dset[:, start:start + step]
+
+            for attr_name, attr_value in dset.attrs.items():
+                new_dset.attrs[attr_name] = attr_value
+
+            del self.f_obj[DATASET_DNAME]
+            self.f_obj.move(tmp_name, DATASET_DNAME)
+            self._update_checksums(block_bytes=block_bytes)
+
+        self.f_obj.flush()
+
+
+    def _map_data(self) -> np.memmap:
+        """Memory-maps contiguous, unfiltered `Data`
+
+        Returns:
+            np.memmap: Read-only view of `Data` or None if it cannot be mapped.
+        """
+        if DATASET_DNAME not in self.f_obj:
+            return None
+
+        dset = self.f_obj[DATASET_DNAME]
+
+        if dset.chunks or dset.is_virtual or dset.external or dset.compression or not dset.size:
+            return None
+
+        offset = dset.id.get_offset()
+        if offset is None:
+            return None
+
+        return np.memmap(self.f_obj.filename, dtype=dset.dtype, mode='r', offset=offset, shape=dset.shape)
+
+
+    def stream_writer(self, block_samples:int=None, growth:float=2.0) -> StreamWriter:
+        """Opens buffered writer session appending samples to `Data`
+
+        Use as context manager; `Data` is trimmed to the written length on exit.
+        Other methods should not modify `Data` while the session is open.
+
+        Args:
+            block_samples (int, optional): Number of samples per written block. Defaults to `DEFAULT_PARAMS['block_bytes']` worth of samples.
+            growth (float, optional): Growth factor of `Data` capacity. Defaults to 2.0.
+
+        Returns:
+            StreamWriter: Writer session.
+        """
+        self._check_no_batch('stream_writer')
+
+        if self._stream_writer is not None:
+            raise RuntimeError('Stream writer session is already open.')
+
+        self._stream_writer = StreamWriter(self, block_samples=block_samples, growth=growth)
+
+        return self._stream_writer
+
+
+    def remove_samples(self, sample_range:tuple, block_bytes:int=None):
+        """Removes range of samples from all channels
+
+        The tail of `Data` following the removed range is shifted towards
+        the beginning block by block, then the dataset is shrunk. Only one
+        block is held in memory at a time, so cost scales with the size of
+        the tail rather than the size of the file.
 
         Args:
-            range (tuple): _description_
+            sample_range (tuple): Half-open range `(start, stop)` of samples to remove.
+            block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
         """
+        self._check_no_batch('remove_samples')
+
         if not DATASET_DNAME in self.f_obj:
             return
 
-        content = self.f_obj[DATASET_DNAME][:]
-        content = np.delete(content, np.s_[sample_range[0]:sample_range[1]], axis=1)
-        
-        del self.f_obj[DATASET_DNAME]
+        dset = self._make_resizable(DATASET_DNAME)
+        nb_samples = dset.shape[1]
 
-        self.f_obj.create_dataset(DATASET_DNAME, dtype=DATASET_DTYPE, data=content, chunks=True, maxshape=(None,None))
+        start, stop, _ = slice(*sample_range).indices(nb_samples)
+        if stop <= start:
+            return
 
+        step = block_length(dset, axis=1, block_bytes=block_bytes)
+        chunk = dset.chunks[1]
 
-    def add_channels(self, data_arr:np.ndarray, ch_names:list=None, datacache_name:str=None, unit_name:Union[str, list]=None):
-        """_summary_
+        # shift the tail; blocks are aligned to chunks of the destination
+        src, dst = stop, start
+        while src < nb_samples:
+            length = min(step - dst % chunk, nb_samples - src)
+            dset[:, dst:dst + length] = dset[:, src:src + length]
+            src += length
+            dst += length
+
+        dset.resize(dst, axis=1)
+
+        self._update_overview(from_sample=start, block_bytes=block_bytes)
+        self._update_stats(from_sample=start, block_bytes=block_bytes)
+        self._update_checksums(from_sample=start, block_bytes=block_bytes)
+
+
+    def add_channels(
+        self,
+        data_arr:np.ndarray,
+        ch_names:Union[str,list]=None,
+        datacache_name:str=None,
+        unit_name:Union[str, list]=None,
+        gain:Union[float,list]=None,
+        offset:Union[float,list]=None,
+        ):
+        """Appends channels to `Data` together with their parameters
 
         Args:
-            data_arr (_type_): _description_
+            data_arr (np.ndarray): Array of shape (channels, samples) with the same number of samples as `Data`.
+            ch_names (Union[str,list], optional): Channel name(s). Defaults to channel indices.
+            datacache_name (str, optional): Datacache name. Defaults to `DEFAULT_PARAMS['datacache_name']`.
+            unit_name (Union[str, list], optional): Physical unit(s). Defaults to `DEFAULT_PARAMS['data_units']`.
+            gain (Union[float,list], optional): Gain of channels if `Data` is stored as integers.
+                Defaults to fit of data range.
+            offset (Union[float,list], optional): Offset of channels if `Data` is stored as integers.
+                Defaults to fit of data range.
         """
-        
-        self.add_samples(data_arr, dim=0)
-        
+
+        if DATASET_DNAME not in self.f_obj:
+            self.create_dataset(data_arr, ch_names, datacache_name, unit_name, gain=gain, offset=offset)
+            return
+
         # generate channel parameters
         if ch_names is None:
             nb_channels = self.f_obj[DATASET_DNAME].shape[0]
             ch_names = list(map(str, range(nb_channels, nb_channels+data_arr.shape[0])))
 
+        if isinstance(ch_names, str):
+            ch_names = [ch_names]
+
+        if len(ch_names) != data_arr.shape[0]:
+            raise ValueError(f'Number of channel names ({len(ch_names)}) does not match number of channels ({data_arr.shape[0]}).')
+
+        if data_arr.shape[1] != self.f_obj[DATASET_DNAME].shape[1]:
+            raise ValueError(f'Number of samples ({data_arr.shape[1]}) does not match `{DATASET_DNAME}` ({self.f_obj[DATASET_DNAME].shape[1]}).')
+
+        # scaling of new channels is needed to update their statistics
+        scaling = self._channel_scaling(data_arr, self.f_obj[DATASET_DNAME].dtype, gain, offset)
+        if scaling is not None:
+            self._append_rows(SCALING_DNAME, scaling)
+
+        self.add_samples(self._to_storage(data_arr, scaling), dim=0)
+
         self._add_channel_params(ch_names, datacache_name, unit_name)
         
 
+    def _get_channel_index(self) -> ChannelIndex:
+        """Returns cached index over `Info` table
+
+        Returns:
+            ChannelIndex: Channel index, empty if file contains no channels.
+        """
+        if self._channel_index is None:
+            info = self.f_obj[INFO_DNAME][:] if INFO_DNAME in self.f_obj else np.empty(0, dtype=INFO_DTYPES)
+            self._channel_index = ChannelIndex(info)
+
+        return self._channel_index
+
+
+    def _invalidate_channel_index(self):
+        self._channel_index = None
+        self._invalidate_metadata('settings')
+
+
     def _get_channels(self):
         """Retrieve channel names
 
@@ -134,7 +672,24 @@ class DatasetMixin():
         """
         
         if CHANNEL_DNAME in self.f_obj:
-            return [item[0].decode('UTF-8') for item in self.f_obj[CHANNEL_DNAME][:]]        
+            return list(self._get_channel_index().names)
+
+
+    def _channel_ids(self, channels:Union[str,int,list]=None, datacache_name:str=None) -> np.ndarray:
+        """Resolves channel names or indices into row indices of `Data`
+
+        Args:
+            channels (Union[str,int,list], optional): Channel name, index or list of these.
+                Defaults to all channels (of the datacache).
+            datacache_name (str, optional): Restrict names to given datacache. Defaults to None.
+
+        Raises:
+            ValueError: Channel does not exist.
+
+        Returns:
+            np.ndarray: Row indices in the order of `channels`.
+        """
+        return self._get_channel_index().rows(channels, datacache_name)
 
 
     def _generate_channel_settings(self, ch_names:list):    
@@ -151,32 +706,19 @@ class DatasetMixin():
             self.f_obj (obj): file obj. handle
         """
 
-        # Generate content
-        content = list()
-
-        for ch_name in ch_names:
-            # Check channel name data type
-            if not isinstance(ch_name, str):
-                raise TypeError('List of channels names contains one or more non-string items.')
+        # Check channel name data type
+        if not all(isinstance(ch_name, str) for ch_name in ch_names):
+            raise TypeError('List of channels names contains one or more non-string items.')
 
-            # Generate single channel settings and append to content            
-            temp = [ch_name.encode('UTF-8')]
-            temp.extend(list(DEFAULT_CHANNEL_SETTINGS.values()))
-            content.append(tuple(temp))
+        # Generate content
+        content = np.empty(len(ch_names), dtype=CHANNEL_DTYPES)
+        content['Channel'] = encode_field(ch_names)
 
-        content = np.array(
-            content,
-            dtype=CHANNEL_DTYPES,
-            )
+        for field, value in DEFAULT_CHANNEL_SETTINGS.items():
+            content[field] = value
 
         # add/append dataset
-        if CHANNEL_DNAME in self.f_obj:
-            current_content = self.f_obj[CHANNEL_DNAME][:]
-            content = np.append(current_content, content)
-
-            del self.f_obj[CHANNEL_DNAME]
-        
-        self.f_obj.create_dataset(CHANNEL_DNAME, data=content)
+        self._append_rows(CHANNEL_DNAME, content)
         
 
     def _generate_channel_info(self, ch_names:list, datacache_name:str=None, unit_name:Union[str,list]=None):
@@ -195,118 +737,143 @@ class DatasetMixin():
         # make a list of datacache names
         if datacache_name is None:
             datacache_name = DEFAULT_PARAMS['datacache_name']
-        
-        if isinstance(datacache_name, str):
-            datacache_name = [datacache_name.encode('UTF-8') for _ in ch_names]
 
         # make a list of physical units
         if unit_name is None:
             unit_name = DEFAULT_PARAMS['data_units']
-        
-        if isinstance(unit_name, str):
-            unit_name = [unit_name.encode('UTF-8') for _ in ch_names]
-
-        # make a list of encoded channel names
-        ch_names = [item.encode('UTF-8') for item in ch_names]
-
-        # Generate content
-        content = list(zip(ch_names, datacache_name, unit_name))
 
-        content = np.array(
-            content,
-            dtype=INFO_DTYPES,
-            )    
+        # Generate content; single names are broadcast over all channels
+        content = np.empty(len(ch_names), dtype=INFO_DTYPES)
+        content['ChannelName'] = encode_field(ch_names)
+        content['DatacacheName'] = encode_field(datacache_name)
+        content['Units'] = encode_field(unit_name)
 
         # add/append dataset
-        if INFO_DNAME in self.f_obj:
-            current_content = self.f_obj[INFO_DNAME][:]
-            content = np.append(current_content, content)
-
-            del self.f_obj[INFO_DNAME]
-        
-        self.f_obj.create_dataset(INFO_DNAME, data=content)
+        self._append_rows(INFO_DNAME, content)
     
 
-    def _add_channel_params(self, ch_names:list, datacache_name:str=None, unit_name:Union[str,list]=None):
-        """_summary_
+    def _add_channel_params(self, ch_names:Union[str,list], datacache_name:str=None, unit_name:Union[str,list]=None):
+        """Appends parameters of new channels to `ChannelSettings` and `Info`
 
         Args:
-            ch_names (list): _description_
-            datacache_name (str, optional): _description_. Defaults to None.
-            unit_name (Union[str,list], optional): _description_. Defaults to None.
+            ch_names (Union[str,list]): Channel name(s).
+            datacache_name (str, optional): Datacache name. Defaults to `DEFAULT_PARAMS['datacache_name']`.
+            unit_name (Union[str,list], optional): Physical unit(s). Defaults to `DEFAULT_PARAMS['data_units']`.
         """
+        if isinstance(ch_names, str):
+            ch_names = [ch_names]
+
         # generate channel settings
         self._generate_channel_settings(ch_names)
 
         # generate channel info
         self._generate_channel_info(ch_names, datacache_name, unit_name)
 
+        self._invalidate_channel_index()
+        self._fill_yrange()
 
-    def _remove_channel_params(self, channel_ids):
-        """_summary_
+
+    def _remove_rows(self, dname:str, row_ids:list, block_bytes:int=None):
+        """Removes rows along axis 0 of dataset in place
+
+        Rows following the first removed one are compacted towards the
+        beginning, for 2D datasets block by block along the time axis.
+        The dataset is then shrunk, keeping its dtype, chunking and filters.
+
+        Args:
+            dname (str): Dataset name.
+            row_ids (list): Indices of rows to remove.
+            block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
+        """
+        dset = self._make_resizable(dname)
+
+        keep = np.ones(dset.shape[0], dtype=bool)
+        keep[row_ids] = False
+
+        # rows before the first removed one stay in place
+        first = int(np.argmin(keep))
+        keep = keep[first:]
+        nb_rows = first + int(keep.sum())
+
+        if nb_rows > first:
+            if dset.ndim == 1:
+                dset[first:nb_rows] = dset[first:][keep]
+
+            else:
+                step = block_length(dset, axis=1, block_bytes=block_bytes)
+                for start in range(0, dset.shape[1], step):
+                    block = dset[first:, start:start + step]
+                    dset[first:nb_rows, start:start + step] = block[keep]
+
+        dset.resize(nb_rows, axis=0)
+
+
+    def _remove_channel_params(self, channel_ids:list):
+        """Removes rows of channel parameters from `Info`, `ChannelSettings`, `Scaling` and `Stats`
 
         Args:
-            channel_ids (_type_): _description_
+            channel_ids (list): Indices of channels to remove.
         """
-        for dname in (CHANNEL_DNAME, INFO_DNAME):
-            content = self.f_obj[dname][:]
-            content = np.delete(content, channel_ids, axis=0) # axis = 1 for columns
-            
-            del self.f_obj[dname]
-            
-            self.f_obj.create_dataset(dname, data=content)
+        for dname in (CHANNEL_DNAME, INFO_DNAME, SCALING_DNAME, STATS_DNAME):
+            if dname in self.f_obj:
+                self._remove_rows(dname, channel_ids)
+
+        self._invalidate_channel_index()
     
 
-    def remove_channel(self, field_txt:Union[str,list], field_name:str='channel') -> None:
-        """_summary_
+    def remove_channel(self, field_txt:Union[str,list], field_name:str='channel', block_bytes:int=None) -> None:
+        """Removes channels matching given names or datacache names
+
+        Channels are removed from `Data`, `Info` and `ChannelSettings` in
+        place without loading whole `Data` into memory.
 
         Args:
-            field_txt (Union[str,list]): _description_
-            field_name (str, optional): _description_. Defaults to 'channel'.
+            field_txt (Union[str,list]): Name or list of names to remove.
+            field_name (str, optional): Matched field, `channel` or `datacache`. Defaults to 'channel'.
+            block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
         """
 
+        self._check_no_batch('remove_channel')
+
         if DATASET_DNAME not in self.f_obj:
             return
 
-        field_mapping  = {'channel': 0, 'datacache': 1}
+        index = self._get_channel_index()
+        field_mapping  = {'channel': index.name_rows, 'datacache': index.datacache_rows}
         
         assert field_name in field_mapping
-
-        if isinstance(field_txt, str):
-            field_txt = [field_txt]
-
-        field_txt = set(field_txt)
         
         # get positions of searched key words in the dataset
-        channel_ids = []
-        for idx, item in enumerate(self.f_obj[INFO_DNAME][:]):
-            if item[field_mapping[field_name]].decode('UTF-8') in field_txt:
-                channel_ids.append(idx)
+        channel_ids = field_mapping[field_name](field_txt)
         
-        if channel_ids:
-            # remove entire datasets if number of matches corresponds to overall number of channels
-            if len(channel_ids) == self.f_obj[INFO_DNAME].shape[0]:
-                self._remove_dataset(dname=[DATASET_DNAME, INFO_DNAME, CHANNEL_DNAME])
-
-            # remove channels from `Data` dataset
-            content = self.f_obj[DATASET_DNAME][:]
-            content = np.delete(content, channel_ids, axis=0) # axis = 1 for columns
-            
-            del self.f_obj[DATASET_DNAME]
-            
-            self.f_obj.create_dataset(DATASET_DNAME, data=content, chunks=True, maxshape=(None,None))
+        if not channel_ids.shape[0]:
+            return
 
-            # remove channel parameters from `Info` and `ChannelSettings`
-            self._remove_channel_params(channel_ids)
+        # remove entire datasets if number of matches corresponds to overall number of channels
+        if channel_ids.shape[0] == self.f_obj[INFO_DNAME].shape[0]:
+            self._remove_dataset(dname=[DATASET_DNAME, INFO_DNAME, CHANNEL_DNAME, SCALING_DNAME, STATS_DNAME, CHECKSUMS_DNAME, OVERVIEW_GNAME])
+            self._invalidate_channel_index()
+            return
 
+        # remove channels from `Data` dataset and its overview
+        self._remove_rows(DATASET_DNAME, channel_ids, block_bytes=block_bytes)
+        self._update_checksums(block_bytes=block_bytes)
 
-    def remove_datacache(self, datacache_name:str):
-        """_summary_
+        for _, dset in self._overview_levels():
+            self._remove_rows(dset.name, channel_ids, block_bytes=block_bytes)
+
+        # remove channel parameters from `Info` and `ChannelSettings`
+        self._remove_channel_params(channel_ids)
+
+
+    def remove_datacache(self, datacache_name:Union[str,list], block_bytes:int=None):
+        """Removes all channels of given datacache
 
         Args:
-            datacache_name (str): _description_
+            datacache_name (Union[str,list]): Datacache name or list of names.
+            block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
         """
-        self.remove_channel(field_txt=datacache_name, field_name='datacache')
+        self.remove_channel(field_txt=datacache_name, field_name='datacache', block_bytes=block_bytes)
         
 
 class MarksMixin():
@@ -316,95 +883,205 @@ class MarksMixin():
         _type_: _description_
     """
 
-    def add_mark(
+    def _marks_content(
         self,
-        start_sample:int=None,
-        end_sample:int=None,
-        group_id:str='',
-        validity:float=0.0,
-        channel_id:str='',
-        info:str=''
-        ) -> None:
-
-        """_summary_
+        start_samples:Union[np.ndarray,list],
+        end_samples:Union[np.ndarray,list]=None,
+        group_ids:Union[str,list]='',
+        validities:Union[float,list]=0.0,
+        channel_ids:Union[str,list]='',
+        infos:Union[str,list]='',
+        ) -> np.ndarray:
+        """Builds structured array of marks in `MARKS_DTYPES`
 
         Args:
-            start_sample (_type_): _description_
-            end_sample (_type_): _description_
-            group_id (bytes, optional): _description_. Defaults to ''.
-            validity (float, optional): _description_. Defaults to 0.0.
-            channel_id (bytes, optional): _description_. Defaults to ''.
-            info (bytes, optional): _description_. Defaults to b'a'.
-        """
-        
-        # TODO: add mutiple marks at once
+            start_samples (Union[np.ndarray,list]): Start samples or structured array of marks.
+            end_samples (Union[np.ndarray,list], optional): End samples. If None, same as start samples.
+            group_ids (Union[str,list], optional): Group ids. Scalar values are broadcast. Defaults to ''.
+            validities (Union[float,list], optional): Validities. Defaults to 0.0.
+            channel_ids (Union[str,list], optional): Channel ids. Defaults to ''.
+            infos (Union[str,list], optional): Info strings. Defaults to ''.
 
-        # check sample validity
-        if start_sample is None:
-            return
+        Raises:
+            ValueError: End sample lower than start sample.
 
-        if end_sample is None:
-            end_sample =  start_sample
-
-        if end_sample - start_sample < 0:
-            raise ValueError('Value of `end_sample` has to be equal or larger then `start_sample`')  
-
-        # create NumPy array
-        content = np.array(
-            [(
-                int(start_sample),
-                int(end_sample),
-                group_id.encode('UTF-8'),
-                float(validity),
-                channel_id.encode('UTF-8'),
-                info.encode('UTF-8')
-            )],
-            dtype=MARKS_DTYPES,
-        )
+        Returns:
+            np.ndarray: Structured array of marks.
+        """
+
+        # structured input is only cast to marks data type
+        if isinstance(start_samples, np.ndarray) and start_samples.dtype.names:
+            content = np.empty(start_samples.shape[0], dtype=MARKS_DTYPES)
+            for field in content.dtype.names:
+                content[field] = encode_field(start_samples[field])
+
+        else:
+            start_samples = np.atleast_1d(np.asarray(start_samples, dtype=np.int64))
+            end_samples = start_samples if end_samples is None else np.asarray(end_samples, dtype=np.int64)
+
+            content = np.empty(start_samples.shape[0], dtype=MARKS_DTYPES)
+            content['SampleLeft'] = start_samples
+            content['SampleRight'] = end_samples
+            content['Group'] = encode_field(group_ids)
+            content['Validity'] = validities
+            content['Channel'] = encode_field(channel_ids)
+            content['Info'] = encode_field(infos)
+
+        if np.any(content['SampleRight'] < content['SampleLeft']):
+            raise ValueError('Value of `end_sample` has to be equal or larger then `start_sample`')
+
+        return content
+
+
+    def add_marks(
+        self,
+        start_samples:Union[np.ndarray,list],
+        end_samples:Union[np.ndarray,list]=None,
+        group_ids:Union[str,list]='',
+        validities:Union[float,list]=0.0,
+        channel_ids:Union[str,list]='',
+        infos:Union[str,list]='',
+        ) -> None:
+        """Appends multiple marks at once
+
+        Marks are appended to the resizable `Marks` dataset in a single
+        resize and write. Scalar arguments are broadcast over all marks.
+
+        Args:
+            start_samples (Union[np.ndarray,list]): Start samples or structured array in `MARKS_DTYPES`.
+            end_samples (Union[np.ndarray,list], optional): End samples. If None, same as start samples.
+            group_ids (Union[str,list], optional): Group ids. Defaults to ''.
+            validities (Union[float,list], optional): Validities. Defaults to 0.0.
+            channel_ids (Union[str,list], optional): Channel ids. Defaults to ''.
+            infos (Union[str,list], optional): Info strings. Defaults to ''.
+        """
+
+        content = self._marks_content(start_samples, end_samples, group_ids, validities, channel_ids, infos)
+
+        if not content.shape[0]:
+            return
+
+        self._append_rows(MARKS_DNAME, content)
+        self._invalidate_marks_index()
 
-        if MARKS_DNAME in self.f_obj:           
-            # read old marks and append new one
-            current_content = self.f_obj[MARKS_DNAME][:]
-            content = np.append(current_content, content)
-        
-            # remove old dataset and store the new one
-            del self.f_obj[MARKS_DNAME]
 
-        self.f_obj.create_dataset(MARKS_DNAME, data=content)
+    def add_mark(
+        self,
+        start_sample:int=None,
+        end_sample:int=None,
+        group_id:str='',
+        validity:float=0.0,
+        channel_id:str='',
+        info:str=''
+        ) -> None:
+
+        """Appends single mark
+
+        Args:
+            start_sample (int): Start sample of the mark. If None, nothing is added.
+            end_sample (int, optional): End sample of the mark. Defaults to `start_sample`.
+            group_id (str, optional): Group id. Defaults to ''.
+            validity (float, optional): Validity. Defaults to 0.0.
+            channel_id (str, optional): Channel id. Defaults to ''.
+            info (str, optional): Info. Defaults to ''.
+        """
+
+        # check sample validity
+        if start_sample is None:
+            return
+
+        self.add_marks([start_sample], end_sample if end_sample is None else [end_sample], group_id, validity, channel_id, info)
         
         
-    def remove_marks(self, field_txt:str=None, field_name:str='group') -> None:
+    def _get_marks_index(self) -> MarksIndex:
+        """Returns cached index over `Marks` table
+
+        Returns:
+            MarksIndex: Marks index or None if file contains no marks.
+        """
+        if self._marks_index is None and MARKS_DNAME in self.f_obj:
+            self._marks_index = MarksIndex(self.f_obj[MARKS_DNAME][:])
+
+        return self._marks_index
+
+
+    def _invalidate_marks_index(self):
+        self._marks_index = None
+        self._invalidate_metadata('marks')
+
+
+    def find_marks(
+        self,
+        group:Union[str,list]=None,
+        channel:Union[str,list]=None,
+        info:Union[str,list]=None,
+        sample_range:tuple=None,
+        ) -> np.ndarray:
+        """Finds marks matching all given conditions
+
+        Args:
+            group (Union[str,list], optional): Group or list of groups. Defaults to None.
+            channel (Union[str,list], optional): Channel or list of channels. Defaults to None.
+            info (Union[str,list], optional): Info or list of infos. Defaults to None.
+            sample_range (tuple, optional): Half-open interval `(start, stop)`. Marks overlapping
+                the interval are returned. Defaults to None.
+
+        Returns:
+            np.ndarray: Structured array of marks in `MARKS_DTYPES`.
+        """
+        index = self._get_marks_index()
+
+        if index is None:
+            return np.empty(0, dtype=MARKS_DTYPES)
+
+        return index.marks[index.select(group=group, channel=channel, info=info, sample_range=sample_range)]
+
+
+    def remove_marks(self, field_txt:Union[str,list]=None, field_name:str='group', sample_range:tuple=None) -> None:
         """Remove marks from the file
 
         Args:
-            group_id (str, optional): ID of group to remove. Defaults to None. If None, all marks will be deleted.
+            field_txt (Union[str,list], optional): Value or list of values of `field_name` to remove.
+                If None together with `sample_range`, all marks will be deleted. Defaults to None.
+            field_name (str, optional): Field to match, one of `group`, `channel`, `info`. Defaults to 'group'.
+            sample_range (tuple, optional): Remove only marks overlapping half-open interval `(start, stop)`.
+                Defaults to None.
         """
 
-        param_mapping = {'group': 2, 'channel': 4, 'info': 5,}
+        field_names = ('group', 'channel', 'info')
+
+        self._check_no_batch('remove_marks')
 
         #check for <marks> dataset existence
         if not MARKS_DNAME in self.f_obj:
             return                
 
         # delete all marks if group is not specified
-        if field_txt is None:
+        if field_txt is None and sample_range is None:
             del self.f_obj[MARKS_DNAME]
+            self._invalidate_marks_index()
             return
-        
-        else:
-            if field_name not in param_mapping:
-                raise ValueError(f'Field {field_name} does not exist. Use only valid field names: ' + ', '.join(list(param_mapping.keys())))
 
-            field_idx = param_mapping[field_name]
+        if field_name not in field_names:
+            raise ValueError(f'Field {field_name} does not exist. Use only valid field names: ' + ', '.join(field_names))
 
-            #filter out marks by field_txt
-            valid_ids = [idx for idx, item in enumerate(self.f_obj[MARKS_DNAME]) if item[field_idx] != field_txt.encode('UTF-8')]
-                
-            valid_marks = self.f_obj[MARKS_DNAME][valid_ids] if valid_ids else None
-            
-            # remove old dataset and store the new one
-            del self.f_obj[MARKS_DNAME]
-            self.f_obj.create_dataset(MARKS_DNAME, data=valid_marks)                                                    
+        index = self._get_marks_index()
+
+        query = {} if field_txt is None else {field_name: field_txt}
+        valid = ~index.mask(sample_range=sample_range, **query)
+
+        if valid.all():
+            return
+
+        # compact valid marks to the beginning of the dataset and shrink it
+        valid_marks = index.marks[valid]
+
+        dset = self._make_resizable(MARKS_DNAME)
+        dset.resize(valid_marks.shape[0], axis=0)
+        if valid_marks.shape[0]:
+            dset[:] = valid_marks
+
+        self._invalidate_marks_index()
         
         
 class AttributesMixin():
@@ -448,8 +1125,14 @@ class AttributesMixin():
             # TODO: check if attr exits
 
             # Allow only ints and floats to be written as attributes.
-            if isinstance(attr_value, (int, float)):        
+            if not isinstance(attr_value, (int, float)):
+                continue
+
+            if self._batch is not None:
+                self._batch.set_attr(attr_name, np.array([attr_value], dtype=ATTR_DTYPE))
+            else:
                 self.f_obj.attrs[attr_name] = np.array([attr_value], dtype=ATTR_DTYPE)
+                self._invalidate_metadata('attrs')
 
 
     def remove_attr(self, attr_name:Union[str, list, tuple]):
@@ -463,12 +1146,65 @@ class AttributesMixin():
             attr_name = [attr_name]
 
         for item in attr_name:
-            if item in self.f_obj.attrs.keys():
-                del self.f_obj.attrs[item]        
+            if self._batch is not None:
+                self._batch.remove_attr(item)
+
+            elif item in self.f_obj.attrs.keys():
+                del self.f_obj.attrs[item]
+                self._invalidate_metadata('attrs')
 
         
     
-class PlantedH5(MarksMixin, AttributesMixin, DatasetMixin):
+def _segment_name(mark:np.void) -> str:
+    """File name of segment built from group, info and samples of its mark"""
+    parts = [mark['Group'].decode('UTF-8')]
+
+    info = mark['Info'].decode('UTF-8')
+    if info:
+        parts.append(info)
+
+    parts.extend((str(int(mark['SampleLeft'])), str(int(mark['SampleRight']))))
+
+    return re.sub(r'[^\w.-]', '_', '_'.join(parts))
+
+
+def _write_segment(f_path:str, data_arr:np.ndarray, marks:np.ndarray, params:dict):
+    """Writes standalone file with segment of recording
+
+    Module-level so that it can be executed on a process pool.
+
+    Args:
+        f_path (str): Path to h5 file.
+        data_arr (np.ndarray): Segment of shape (channels, samples).
+        marks (np.ndarray): Marks re-based to the segment.
+        params (dict): `sampl_freq`, `attrs`, `info`, `settings`, `scaling` and `storage_profile` of the source.
+    """
+    planter = PlantedH5()
+    planter.create(f_path, sampl_freq=params['sampl_freq'], storage_profile=params['storage_profile'])
+
+    for attr_name, attr_value in params['attrs'].items():
+        planter.f_obj.attrs[attr_name] = attr_value
+
+    planter.f_obj.create_dataset(
+        DATASET_DNAME,
+        data=data_arr,
+        maxshape=(None, None),
+        **planter._storage_kwargs(data_arr.shape[0]),
+        )
+
+    planter._append_rows(INFO_DNAME, params['info'])
+    planter._append_rows(CHANNEL_DNAME, params['settings'])
+
+    if params['scaling'] is not None:
+        planter._append_rows(SCALING_DNAME, params['scaling'])
+
+    if marks.shape[0]:
+        planter._append_rows(MARKS_DNAME, marks)
+
+    planter.close()
+
+
+class PlantedH5(MarksMixin, AttributesMixin, OverviewMixin, StatsMixin, DeriveMixin, VerifyMixin, DatasetMixin):
     """_summary_
 
     Args:
@@ -478,24 +1214,64 @@ class PlantedH5(MarksMixin, AttributesMixin, DatasetMixin):
 
     def __init__(self):
         self._f_obj = None
+        self._marks_index = None
+        self._channel_index = None
+        self._data_map = None
+        self._stream_writer = None
+        self._async_writer = None
+        self._storage_profile = None
+        self._batch = None
+        self._profiler = None
+        self._metadata = None
         
 
     @property
     def f_obj(self):
-        return self._f_obj
+        if self._profiler is None or self._f_obj is None:
+            return self._f_obj
+
+        return self._profiler.wrap(self._f_obj)
 
 
     @f_obj.setter
     def f_obj(self, value):
         self._f_obj = value
+        self._marks_index = None
+        self._data_map = None
+        self._channel_index = None
+        self._metadata = None
+
+
+    @property
+    def metadata(self) -> Metadata:
+        """Lazily loaded snapshot of attributes, channels and marks of the opened file"""
+        if self._metadata is None:
+            self._metadata = Metadata(self)
+
+        return self._metadata
+
+
+    def _invalidate_metadata(self, *parts):
+        if self._metadata is not None:
+            self._metadata.invalidate(*parts)
+
+
+    @property
+    def data_map(self) -> np.memmap:
+        """Read-only memory map of `Data` if opened with `mmap`, otherwise None"""
+        return self._data_map
     
 
-    def create(self, f_path:str, sampl_freq:int=None):
+    def create(self, f_path:str, sampl_freq:int=None, storage_profile:Union[str,dict]=None, swmr:bool=False):
         """Creates new h5 file.
 
         Args:
             f_path (_str_): Path to h5 file
             sampl_freq (int, optional): _description_. Defaults to 2000.
+            storage_profile (Union[str,dict], optional): Chunking and filters of `Data`, name of profile
+                in `STORAGE_PROFILES` or profile dictionary. Defaults to `DEFAULT_PARAMS['storage_profile']`.
+            swmr (bool, optional): Create file in the latest format so that single-writer/multiple-reader
+                mode can be started by `start_swmr` once `Data` is created. Defaults to False.
 
         Returns:
             _type_: _description_
@@ -506,12 +1282,13 @@ class PlantedH5(MarksMixin, AttributesMixin, DatasetMixin):
             f_path += '.h5'
 
         try:            
-            self.f_obj = h.File(f_path, 'w')            
+            self.f_obj = h.File(f_path, 'w', libver='latest' if swmr else None)
         except FileExistsError as e:
             pass
         except IOError as e:
             print(e)
 
+        self._storage_profile = storage_profile
 
         # Add sampling frequency into attributes
         self.f_obj.attrs['Fs'] = np.array([sampl_freq], dtype='<f4')    
@@ -522,40 +1299,799 @@ class PlantedH5(MarksMixin, AttributesMixin, DatasetMixin):
         self.f_obj.attrs['RightI'] = DEFAULT_PARAMS['right_index']
         
 
-    def open(self, f_path:str, mode:str='a'):
+    def open(
+        self,
+        f_path:str,
+        mode:str='a',
+        rdcc_nbytes:int=None,
+        rdcc_nslots:int=None,
+        rdcc_w0:float=None,
+        mmap:bool=False,
+        swmr:bool=False,
+        ):
         """_summary_
 
         Args:
             f_path (_str_): Path to h5 file
+            mode (str, optional): File mode. Defaults to 'a'.
+            rdcc_nbytes (int, optional): Size of raw data chunk cache per dataset in bytes. Defaults to h5py default (1 MB).
+            rdcc_nslots (int, optional): Number of chunk slots in the cache; preferably a prime about
+                100 times the number of chunks fitting the cache. Defaults to h5py default.
+            rdcc_w0 (float, optional): Chunk preemption policy. Defaults to h5py default.
+            mmap (bool, optional): Memory-map `Data` for reading if it is contiguous and unfiltered
+                (see `finalize`); requires read-only mode. `read` then bypasses HDF5. Defaults to False.
+            swmr (bool, optional): Single-writer/multiple-reader access. In mode `r`, the file is
+                opened as SWMR reader (see `LiveReader`); otherwise SWMR writing is started if `Data`
+                exists (see `start_swmr`). Defaults to False.
 
         Returns:
             _handle_: File handle
         """
 
+        if mmap and mode != 'r':
+            raise ValueError('Memory-mapped mode requires read-only file mode `r`.')
+
         #check if f_obj exists. If so, close old one first.
         if self.f_obj:
             self.close()
 
+        self._storage_profile = None
+
+        kwargs = {}
+        if swmr and mode == 'r':
+            kwargs['swmr'] = True
+        elif swmr:
+            kwargs['libver'] = 'latest'
+
         try:
-            self.f_obj = h.File(f_path, mode)
+            self.f_obj = h.File(f_path, mode, rdcc_nbytes=rdcc_nbytes, rdcc_nslots=rdcc_nslots, rdcc_w0=rdcc_w0, **kwargs)
         
         except IOError as e:
             print(e)
+            return
+
+        if swmr and mode != 'r' and DATASET_DNAME in self.f_obj:
+            self.start_swmr()
+
+        if mmap:
+            self._data_map = self._map_data()
+
+
+    @classmethod
+    def open_many(cls, paths:list, max_workers:int=None, load:bool=True, skip_errors:bool=False, **kwargs) -> list:
+        """Opens files read-only and loads their metadata concurrently
+
+        Opening and metadata reads run on a thread pool. h5py serializes
+        HDF5 calls, so mostly file system latency of the opens overlaps.
+
+        Args:
+            paths (list): Paths to h5 files.
+            max_workers (int, optional): Number of threads. Defaults to ThreadPoolExecutor default.
+            load (bool, optional): Load `metadata` of every file. Defaults to True.
+            skip_errors (bool, optional): Return None in place of files that fail to open
+                instead of closing the others and raising. Defaults to False.
+            **kwargs: Chunk cache settings passed to `h5py.File`.
+
+        Returns:
+            list: Planters in order of `paths`.
+        """
+
+        def open_one(path):
+            planter = cls()
+            planter.f_obj = h.File(path, 'r', **kwargs)
+            try:
+                if load:
+                    planter.metadata.load()
+            except Exception:
+                planter.close()
+                raise
+
+            return planter
+
+        planters = []
+        errors = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for future in [executor.submit(open_one, path) for path in paths]:
+                try:
+                    planters.append(future.result())
+                except Exception as e:
+                    planters.append(None)
+                    errors.append(e)
+
+        if errors and not skip_errors:
+            for planter in planters:
+                if planter is not None:
+                    planter.close()
+            raise errors[0]
+
+        return planters
+
+
+    def merge(self, out_file:str, paths_list:list, mode:str='virtual', max_workers:int=None, block_bytes:int=None):
+        """Concatenates recordings in time into new file
+
+        Sources have to share sampling frequency, data type and channels
+        (names, datacaches and scaling). `Info`, `ChannelSettings` and attributes are
+        taken from the first source, marks of each source are shifted by its
+        position in the merged recording. The merged file stays opened.
+
+        In `virtual` mode, `Data` is a virtual dataset mapping the sources
+        without copying; source files have to stay in place. In `materialize`
+        mode, sources are copied block by block with reads on a thread pool.
+
+        Args:
+            out_file (str): Path to merged h5 file.
+            paths_list (list): Paths to source h5 files in time order.
+            mode (str, optional): `virtual` or `materialize`. Defaults to 'virtual'.
+            max_workers (int, optional): Number of reading threads in `materialize` mode. Defaults to None.
+            block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
+
+        Raises:
+            ValueError: Unknown mode or inconsistent sources.
+        """
+        if mode not in ('virtual', 'materialize'):
+            raise ValueError(f'Unknown merge mode {mode}. Use `virtual` or `materialize`.')
+
+        if not paths_list:
+            raise ValueError('No files to merge.')
+
+        # collect metadata of sources
+        sources = []
+        for f_path in paths_list:
+            with h.File(f_path, 'r') as f_obj:
+                dset = f_obj[DATASET_DNAME]
+                info = f_obj[INFO_DNAME][:]
+                sources.append({
+                    'path': os.path.abspath(f_path),
+                    'shape': dset.shape,
+                    'dtype': dset.dtype,
+                    'fs': float(f_obj.attrs['Fs'][0]),
+                    'channels': info[['ChannelName', 'DatacacheName']],
+                    'marks': f_obj[MARKS_DNAME][:] if MARKS_DNAME in f_obj else None,
+                    'scaling': f_obj[SCALING_DNAME][:] if SCALING_DNAME in f_obj else None,
+                    })
+
+                if len(sources) == 1:
+                    first_storage = dataset_storage(dset)
+                    first_info = info
+                    first_settings = f_obj[CHANNEL_DNAME][:]
+                    first_attrs = dict(f_obj.attrs)
+
+        first = sources[0]
+        for source in sources[1:]:
+            if source['fs'] != first['fs'] or source['dtype'] != first['dtype']:
+                raise ValueError(f"File {source['path']} differs in sampling frequency or data type.")
+
+            if not np.array_equal(source['channels'], first['channels']):
+                raise ValueError(f"File {source['path']} differs in channels.")
+
+            if not np.array_equal(source['scaling'], first['scaling']):
+                raise ValueError(f"File {source['path']} differs in scaling of channels.")
+
+        offsets = np.cumsum([0] + [source['shape'][1] for source in sources])
+        shape = (first['shape'][0], int(offsets[-1]))
+
+        if self.f_obj:
+            self.close()
+
+        storage_profile = self._storage_profile if self._storage_profile is not None else first_storage
+        self.create(out_file, sampl_freq=first['fs'], storage_profile=storage_profile)
+        out_file = self.f_obj.filename
+
+        for attr_name, attr_value in first_attrs.items():
+            self.f_obj.attrs[attr_name] = attr_value
+
+        if mode == 'virtual':
+            layout = h.VirtualLayout(shape=shape, dtype=first['dtype'])
+            for source, offset in zip(sources, offsets):
+                layout[:, offset:offset + source['shape'][1]] = h.VirtualSource(source['path'], DATASET_DNAME, shape=source['shape'])
+
+            self.f_obj.create_virtual_dataset(DATASET_DNAME, layout)
+
+        else:
+            dset = self.f_obj.create_dataset(
+                DATASET_DNAME,
+                shape=shape,
+                dtype=first['dtype'],
+                maxshape=(None, None),
+                **self._storage_kwargs(shape[0]),
+                )
+            self._copy_sources(dset, sources, offsets, max_workers, block_bytes)
+
+        self._append_rows(INFO_DNAME, first_info)
+        self._append_rows(CHANNEL_DNAME, first_settings)
+
+        if first['scaling'] is not None:
+            self._append_rows(SCALING_DNAME, first['scaling'])
+
+        # shift marks by position of their source
+        marks = []
+        for source, offset in zip(sources, offsets):
+            if source['marks'] is not None:
+                source['marks']['SampleLeft'] += offset
+                source['marks']['SampleRight'] += offset
+                marks.append(source['marks'])
+
+        if marks:
+            self._append_rows(MARKS_DNAME, np.concatenate(marks))
+
+
+    def _copy_sources(self, dset:h.Dataset, sources:list, offsets:list, max_workers:int=None, block_bytes:int=None):
+        """Copies `Data` of sources into `dset` block by block
+
+        Blocks are read on a thread pool and written in order as they come.
+        The number of blocks in flight is bounded, so memory use does not
+        depend on the size of the sources.
+
+        Args:
+            dset (h.Dataset): Destination dataset.
+            sources (list): Source descriptions with `path` and `shape`.
+            offsets (list): Position of each source in `dset`.
+            max_workers (int, optional): Number of reading threads. Defaults to None.
+            block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
+        """
+        def read_block(src_dset, start, stop):
+            return src_dset[:, start:stop]
+
+        if max_workers is None:
+            max_workers = min(32, (os.cpu_count() or 1) + 4)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            max_pending = 2 * max_workers
+
+            for source, offset in zip(sources, offsets):
+                with h.File(source['path'], 'r') as f_obj:
+                    src_dset = f_obj[DATASET_DNAME]
+                    step = block_length(src_dset, axis=1, block_bytes=block_bytes)
+
+                    pending = collections.deque()
+                    for start in range(0, source['shape'][1], step):
+                        stop = min(start + step, source['shape'][1])
+                        pending.append((start, stop, executor.submit(read_block, src_dset, start, stop)))
+
+                        while len(pending) >= max_pending or (pending and stop == source['shape'][1]):
+                            block_start, block_stop, future = pending.popleft()
+                            dset[:, offset + block_start:offset + block_stop] = future.result()
+
+
+    def file_from_mark(
+        self,
+        group_id:Union[str,list],
+        info:Union[str,list]=None,
+        out_dir:str=None,
+        pre_samples:int=0,
+        post_samples:int=0,
+        stack:bool=False,
+        max_workers:int=None,
+        block_bytes:int=None,
+        ) -> Union[list,np.ndarray]:
+        """Extracts segments of the recording around marks
+
+        Segments span from `pre_samples` before `SampleLeft` to `post_samples`
+        after `SampleRight` of every matching mark. Overlapping or adjacent
+        segments are coalesced into as few reads of `Data` as possible; each
+        read is bounded by the block size.
+
+        With `stack`, segments anchored at `SampleLeft` of length
+        `pre_samples + post_samples + 1` are returned as one array; samples
+        outside of the recording are NaN and integer `Data` is scaled into
+        physical values. Otherwise each segment is written into standalone
+        file in `out_dir` with marks re-based to the segment; files are named
+        after group, info and samples of the mark, and marks starting outside
+        of the recording are skipped. Files are written on a process pool,
+        `max_workers=0` writes them in the calling process.
+
+        Args:
+            group_id (Union[str,list]): Group or list of groups of marks.
+            info (Union[str,list], optional): Info or list of infos of marks. Defaults to None.
+            out_dir (str, optional): Output directory of segment files. Defaults to directory of the file.
+            pre_samples (int, optional): Samples before the mark. Defaults to 0.
+            post_samples (int, optional): Samples after the mark. Defaults to 0.
+            stack (bool, optional): Return stacked array instead of writing files. Defaults to False.
+            max_workers (int, optional): Number of writing processes. Defaults to None.
+            block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
+
+        Returns:
+            Union[list,np.ndarray]: Paths of written files or array of shape (segments, channels, samples).
+        """
+        marks = self.find_marks(group=group_id, info=info)
+
+        dset = self.f_obj[DATASET_DNAME]
+        nb_samples = dset.shape[1]
+
+        # segment bounds
+        if stack:
+            starts = marks['SampleLeft'].astype(np.int64) - pre_samples
+            stops = marks['SampleLeft'].astype(np.int64) + post_samples + 1
+        else:
+            marks = marks[(marks['SampleLeft'] >= 0) & (marks['SampleLeft'] < nb_samples)]
+            starts = np.maximum(marks['SampleLeft'].astype(np.int64) - pre_samples, 0)
+            stops = np.minimum(marks['SampleRight'].astype(np.int64) + post_samples + 1, nb_samples)
+
+        if stack:
+            scaling = self._get_scaling()
+            dtype = np.result_type(dset.dtype, np.float32) if scaling is None else np.float32
+
+            result = np.full((marks.shape[0], dset.shape[0], pre_samples + post_samples + 1), np.nan, dtype=dtype)
+            for idx, start, stop, block_start, block in self._iter_segments(starts, stops, block_bytes):
+                src_start, src_stop = max(start, 0), min(stop, nb_samples)
+                result[idx, :, src_start - start:src_stop - start] = block[:, src_start - block_start:src_stop - block_start]
+
+            if scaling is not None:
+                apply_scaling(result.transpose(1, 0, 2), scaling)
+
+            return result
+
+        if out_dir is None:
+            out_dir = os.path.dirname(os.path.abspath(self.f_obj.filename))
+
+        segment_params = {
+            'sampl_freq': float(self.f_obj.attrs['Fs'][0]),
+            'attrs': dict(self.f_obj.attrs),
+            'info': self.f_obj[INFO_DNAME][:],
+            'settings': self.f_obj[CHANNEL_DNAME][:],
+            'scaling': self._get_scaling(),
+            'storage_profile': dataset_storage(dset),
+            }
+
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+
+        executor = None
+        if max_workers:
+            executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+        paths = []
+        names = collections.Counter()
+        pending = collections.deque()
+
+        try:
+            for idx, start, stop, block_start, block in self._iter_segments(starts, stops, block_bytes):
+                # identical marks get numbered
+                name = _segment_name(marks[idx])
+                names[name] += 1
+                if names[name] > 1:
+                    name = f'{name}_{names[name] - 1}'
+
+                f_path = os.path.join(out_dir, name + '.h5')
+
+                # marks within the segment re-based to its beginning
+                seg_marks = self.find_marks(sample_range=(start, stop))
+                seg_marks['SampleLeft'] = np.clip(seg_marks['SampleLeft'] - start, 0, stop - start - 1)
+                seg_marks['SampleRight'] = np.clip(seg_marks['SampleRight'] - start, 0, stop - start - 1)
+
+                args = (f_path, block[:, start - block_start:stop - block_start], seg_marks, segment_params)
 
+                if executor is None:
+                    _write_segment(*args)
+                else:
+                    pending.append(executor.submit(_write_segment, *args))
+                    while len(pending) > 2 * max_workers:
+                        pending.popleft().result()
 
-    def merge(self, out_file:str, paths_list:list):        
-        raise NotImplementedError
+                paths.append(f_path)
 
+            while pending:
+                pending.popleft().result()
 
-    def file_from_mark(self, group_id: str, info: str):        
-        raise NotImplementedError
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        return paths
+
+
+    def _iter_segments(self, starts:np.ndarray, stops:np.ndarray, block_bytes:int=None):
+        """Reads segments of `Data` through coalesced reads
+
+        Segments are sorted and merged into spans of overlapping or adjacent
+        segments not longer than the block size; every span is read once.
+
+        Args:
+            starts (np.ndarray): Start samples of segments, may lie outside of `Data`.
+            stops (np.ndarray): Stop samples of segments.
+            block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
+
+        Yields:
+            tuple: Segment index, start, stop, start of read span and the span.
+        """
+        dset = self.f_obj[DATASET_DNAME]
+        max_span = block_length(dset, axis=1, block_bytes=block_bytes)
+
+        clipped_starts = np.clip(starts, 0, dset.shape[1])
+        clipped_stops = np.clip(stops, 0, dset.shape[1])
+
+        order = np.argsort(clipped_starts, kind='stable')
+
+        span = []
+        span_start = span_stop = 0
+
+        def read_span():
+            block = dset[:, span_start:span_stop]
+            for idx in span:
+                yield int(idx), int(starts[idx]), int(stops[idx]), span_start, block
+
+        for idx in order:
+            start, stop = clipped_starts[idx], clipped_stops[idx]
+
+            if span and (start > span_stop or max(stop, span_stop) - span_start > max_span):
+                yield from read_span()
+                span = []
+
+            if not span:
+                span_start, span_stop = start, stop
+            else:
+                span_stop = max(span_stop, stop)
+
+            span.append(idx)
+
+        if span:
+            yield from read_span()
+
+
+    def export_float(self, out_file:str, block_bytes:int=None) -> str:
+        """Exports recording with physical values stored as float
+
+        Integer `Data` is converted block by block using `Scaling`; the
+        exported file contains attributes, `Info`, `ChannelSettings`,
+        `Marks` and float32 `Data` and can be opened in Signal Plant.
+
+        Args:
+            out_file (str): Path to exported h5 file.
+            block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
+
+        Returns:
+            str: Path to the exported file.
+        """
+        dset = self.f_obj[DATASET_DNAME]
+        scaling = self._get_scaling()
+
+        planter = PlantedH5()
+        planter.create(out_file, sampl_freq=float(self.f_obj.attrs['Fs'][0]), storage_profile=dataset_storage(dset))
+
+        try:
+            for attr_name, attr_value in self.f_obj.attrs.items():
+                planter.f_obj.attrs[attr_name] = attr_value
+
+            out_dset = planter.f_obj.create_dataset(
+                DATASET_DNAME,
+                shape=dset.shape,
+                dtype=DATASET_DTYPE,
+                maxshape=(None, None),
+                **planter._storage_kwargs(dset.shape[0]),
+                )
+
+            step = block_length(dset, axis=1, block_bytes=block_bytes)
+            for start in range(0, dset.shape[1], step):
+                block = dset[:, start:start + step].astype(DATASET_DTYPE)
+                if scaling is not None:
+                    apply_scaling(block, scaling)
+
+                out_dset[:, start:start + step] = block
+
+            for dname in (INFO_DNAME, CHANNEL_DNAME, MARKS_DNAME):
+                if dname in self.f_obj:
+                    planter._append_rows(dname, self.f_obj[dname][:])
+
+            out_file = planter.f_obj.filename
+
+        finally:
+            planter.close()
+
+        return out_file
+
+
+    def fragmentation(self) -> dict:
+        """Estimates space of the file not occupied by datasets
+
+        Space left by removed or shrunk datasets is never reused by HDF5.
+        The estimate compares the file size with storage size of all
+        datasets; it only reads metadata.
+
+        Returns:
+            dict: `file_size`, `used_bytes`, `unused_bytes` and `ratio` of unused space.
+        """
+        self.f_obj.flush()
+        file_size = os.path.getsize(self.f_obj.filename)
+
+        used_bytes = []
+        self.f_obj.visititems(lambda name, item: used_bytes.append(item.id.get_storage_size()) if isinstance(item, h.Dataset) else None)
+
+        unused_bytes = max(0, file_size - sum(used_bytes))
+
+        return {
+            'file_size': file_size,
+            'used_bytes': sum(used_bytes),
+            'unused_bytes': unused_bytes,
+            'ratio': unused_bytes / file_size if file_size else 0.0,
+            }
+
+
+    def repack(self, target:str=None, chunk_profile:Union[str,dict]=None, block_bytes:int=None) -> dict:
+        """Rewrites file into fresh one to reclaim unused space
+
+        All datasets, groups and attributes are copied into a new file;
+        `Data` is copied block by block, optionally re-chunked. Without
+        `target`, the new file atomically replaces the opened one, which is
+        then reopened with its mode, chunk cache settings and storage
+        profile. With `target`, the opened file is left unchanged and
+        `Checksums` of re-chunked `Data` have to be recomputed in the new file.
+
+        Args:
+            target (str, optional): Path to repacked h5 file. Defaults to replacing the opened file.
+            chunk_profile (Union[str,dict], optional): Storage profile of `Data`, name of profile
+                in `STORAGE_PROFILES` or profile dictionary. Defaults to profile of the existing `Data`.
+            block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
+
+        Raises:
+            ValueError: Writer session is running, file is read-only or in SWMR mode.
+
+        Returns:
+            dict: `path`, `size_before`, `size_after` and `reclaimed` bytes.
+        """
+        self._check_no_batch('repack')
+
+        if self._stream_writer is not None or self._async_writer is not None:
+            raise ValueError('Repacking is not possible while a writer session is running.')
+
+        if target is None and not self.is_writable():
+            raise ValueError('Repacking in place requires writable file.')
+
+        if self.f_obj.swmr_mode:
+            raise ValueError('Repacking is not possible in SWMR mode.')
+
+        self.f_obj.flush()
+        f_path = self.f_obj.filename
+        size_before = os.path.getsize(f_path)
+
+        tmp_path = target if target is not None else f_path + '.repack'
+
+        with h.File(tmp_path, 'w') as new_obj:
+            for attr_name, attr_value in self.f_obj.attrs.items():
+                new_obj.attrs[attr_name] = attr_value
+
+            for name, item in self.f_obj.items():
+                if name != DATASET_DNAME or item.is_virtual:
+                    self.f_obj.copy(item, new_obj, name=name)
+                    continue
+
+                if chunk_profile is None and not item.chunks:
+                    kwargs = {}
+                else:
+                    kwargs = self._storage_kwargs(item.shape[0], chunk_profile if chunk_profile is not None else dataset_storage(item))
+                    kwargs['maxshape'] = (None, None)
+
+                dset = new_obj.create_dataset(DATASET_DNAME, shape=item.shape, dtype=item.dtype, **kwargs)
+
+                step = block_length(item, axis=1, block_bytes=block_bytes)
+                for start in range(0, item.shape[1], step):
+                    dset[:, start:start + step] = item[:, start:start + step]
+
+                for attr_name, attr_value in item.attrs.items():
+                    dset.attrs[attr_name] = attr_value
+
+        size_after = os.path.getsize(tmp_path)
+
+        if target is None:
+            # handle is reopened the way it was opened
+            _, rdcc_nslots, rdcc_nbytes, rdcc_w0 = self.f_obj.id.get_access_plist().get_cache()
+            mode = self.f_obj.mode
+            storage_profile = self._storage_profile
+
+            self.close()
+            os.replace(tmp_path, f_path)
+            self.open(f_path, mode=mode, rdcc_nbytes=rdcc_nbytes, rdcc_nslots=rdcc_nslots, rdcc_w0=rdcc_w0)
+            self._storage_profile = storage_profile
+
+            # checksum units follow chunks of `Data`
+            if chunk_profile is not None:
+                self._update_checksums(block_bytes=block_bytes)
+
+        return {
+            'path': os.path.abspath(tmp_path if target is not None else f_path),
+            'size_before': size_before,
+            'size_after': size_after,
+            'reclaimed': size_before - size_after,
+            }
+
+
+    def start_swmr(self):
+        """Starts single-writer/multiple-reader mode
+
+        Readers opened with `swmr` (e.g. `LiveReader`) may then read the file
+        while samples and marks are appended. `Data` and `Marks` are made
+        resizable first; in SWMR mode no datasets or attributes can be
+        created or removed, only existing ones resized and written. Appended
+        samples and marks are flushed to readers immediately.
+
+        Raises:
+            ValueError: `Data` does not exist or file was not created with `swmr`.
+        """
+        self._check_no_batch('start_swmr')
+
+        if DATASET_DNAME not in self.f_obj:
+            raise ValueError(f'Dataset `{DATASET_DNAME}` does not exist. Create it first using `create_dataset`.')
+
+        if self.f_obj.libver[0] == 'earliest':
+            raise ValueError('SWMR mode requires file created or opened with `swmr=True`.')
+
+        self._make_resizable(DATASET_DNAME)
+
+        if MARKS_DNAME in self.f_obj:
+            self._make_resizable(MARKS_DNAME)
+        else:
+            self.f_obj.create_dataset(MARKS_DNAME, shape=(0,), dtype=MARKS_DTYPES, chunks=(TABLE_CHUNK_ROWS,), maxshape=(None,))
+
+        # superblock of files created in older format does not support SWMR
+        try:
+            self.f_obj.swmr_mode = True
+        except RuntimeError as e:
+            raise ValueError(f'SWMR mode can not be started ({e}); the file has to be created with `swmr=True`.') from e
+
+
+    def _swmr_flush(self):
+        """Makes written data visible to SWMR readers"""
+        if self.f_obj.swmr_mode:
+            self.f_obj.flush()
+
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Defers metadata mutations into single all-or-nothing commit
+
+        Inside the block, rows appended to `Info`, `ChannelSettings` and
+        `Marks` and attribute changes are buffered in memory and written
+        with one write per dataset when the block ends. If the block raises,
+        or the channel tables would not match `Data`, buffered mutations are
+        discarded and `Data` is restored to its state before the batch.
+
+        Reads inside the block see the state before the batch. Methods that
+        rewrite data in place (`remove_*`) and writer sessions are not
+        supported inside the block.
+
+        Yields:
+            Batch: Pending mutations.
+        """
+        if self._batch is not None:
+            yield self._batch
+            return
+
+        batch = self._batch = Batch(self)
+
+        try:
+            yield batch
+            batch.check(self)
+
+        except BaseException:
+            self._batch = None
+            batch.rollback(self)
+            raise
+
+        self._batch = None
+        batch.commit(self)
+
+
+    def start_writer(self, maxsize:int=256, block_samples:int=None, growth:float=2.0) -> AsyncWriter:
+        """Starts background writer thread
+
+        While the writer is running, it owns the file handle. Samples and
+        marks have to be passed through `submit_samples` and `submit_marks`;
+        other methods must not be called until `stop_writer` or `close`.
+
+        Args:
+            maxsize (int, optional): Maximum number of queued items. Defaults to 256.
+            block_samples (int, optional): Number of samples per written block. Defaults to `DEFAULT_PARAMS['block_bytes']` worth of samples.
+            growth (float, optional): Growth factor of `Data` capacity. Defaults to 2.0.
+
+        Returns:
+            AsyncWriter: Running writer.
+        """
+        self._check_no_batch('start_writer')
+
+        if self._async_writer is not None or self._stream_writer is not None:
+            raise RuntimeError('Writer session is already open.')
+
+        self._async_writer = AsyncWriter(self, maxsize=maxsize, block_samples=block_samples, growth=growth)
+
+        return self._async_writer
+
+
+    def stop_writer(self):
+        """Writes all queued items and stops background writer
+
+        Raises:
+            Exception: Error raised in the writer thread, if any.
+        """
+        if self._async_writer is None:
+            return
+
+        writer, self._async_writer = self._async_writer, None
+        writer.close()
+
+
+    def submit_samples(self, data_arr:np.ndarray, block:bool=False, timeout:float=None) -> bool:
+        """Queues samples to be appended by background writer
+
+        Args:
+            data_arr (np.ndarray): Array of shape (channels, samples).
+            block (bool, optional): Wait for free space in the queue. Defaults to False.
+            timeout (float, optional): Maximum waiting time in seconds if `block`. Defaults to None.
+
+        Returns:
+            bool: False if the queue is full and samples were not accepted.
+        """
+        if self._async_writer is None:
+            raise RuntimeError('Background writer is not running. Start it using `start_writer`.')
+
+        return self._async_writer.submit_samples(data_arr, block=block, timeout=timeout)
+
+
+    def submit_marks(
+        self,
+        start_samples:Union[np.ndarray,list],
+        end_samples:Union[np.ndarray,list]=None,
+        group_ids:Union[str,list]='',
+        validities:Union[float,list]=0.0,
+        channel_ids:Union[str,list]='',
+        infos:Union[str,list]='',
+        block:bool=False,
+        timeout:float=None,
+        ) -> bool:
+        """Queues marks to be appended by background writer
+
+        Arguments are the same as for `add_marks`.
+
+        Returns:
+            bool: False if the queue is full and marks were not accepted.
+        """
+        if self._async_writer is None:
+            raise RuntimeError('Background writer is not running. Start it using `start_writer`.')
+
+        content = self._marks_content(start_samples, end_samples, group_ids, validities, channel_ids, infos)
+
+        return self._async_writer.submit_marks(content, block=block, timeout=timeout)
+
+
+    async def aflush(self):
+        """Awaitable flush; waits for background writer without blocking the event loop"""
+        if self._async_writer is not None:
+            await self._async_writer.aflush()
+        else:
+            self.flush()
+
+
+    def writer_metrics(self) -> dict:
+        """Queue depth and write latency metrics of background writer
+
+        Returns:
+            dict: Metrics snapshot, empty if the writer is not running.
+        """
+        if self._async_writer is None:
+            return {}
+
+        return self._async_writer.metrics()
 
 
     def close(self):
-        self.f_obj.close()   
+        try:
+            self.stop_writer()
+
+            if self._stream_writer is not None:
+                self._stream_writer.close()
+
+        finally:
+            self._data_map = None
+            self.f_obj.close()   
 
 
     def flush(self):
+        if self._async_writer is not None:
+            self._async_writer.flush()
+            return
+
+        if self._stream_writer is not None:
+            self._stream_writer.flush()
+
         self.f_obj.flush()   
 
 
@@ -563,6 +2099,57 @@ class PlantedH5(MarksMixin, AttributesMixin, DatasetMixin):
         return self.f_obj.mode in {'r+', 'a', 'w', 'w-', 'x'}
 
 
+    def enable_profiling(self, hooks:list=None):
+        """Starts recording calls and I/O of the planter
+
+        Call counts and wall time of public methods of `DatasetMixin`,
+        `MarksMixin` and `AttributesMixin` are recorded together with bytes
+        read and written, resizes and created or deleted datasets. When
+        profiling is disabled, methods only check that it is off.
+
+        Args:
+            hooks (list, optional): Callables receiving `(method_name, record)` after every
+                recorded call, e.g. for export to external metrics. Defaults to None.
+        """
+        self._profiler = Profiler(hooks)
+
+
+    def disable_profiling(self):
+        """Stops recording; collected statistics are dropped"""
+        self._profiler = None
+
+
+    def add_profiling_hook(self, hook):
+        """Adds callable receiving `(method_name, record)` after every recorded call"""
+        if self._profiler is None:
+            raise ValueError('Profiling is not enabled. Enable it first using `enable_profiling`.')
+
+        self._profiler.hooks.append(hook)
+
+
+    def stats(self, reset:bool=False) -> dict:
+        """Snapshot of profiling counters
+
+        Args:
+            reset (bool, optional): Reset counters after the snapshot. Defaults to False.
+
+        Returns:
+            dict: `totals` of I/O counters and `methods` mapping method names to `calls`,
+                `time` and I/O counters including nested calls; None if profiling is disabled.
+        """
+        if self._profiler is None:
+            return None
+
+        snapshot = self._profiler.snapshot()
+        if reset:
+            self._profiler.reset()
+
+        return snapshot
+
+
+instrument(PlantedH5, (DatasetMixin, MarksMixin, AttributesMixin))
+
+
 
 def main():
     """ Testing function
@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+
+import time
+import functools
+import collections
+import h5py as h
+import numpy as np
+from typing import Callable
+
+
+COUNTERS = ('bytes_read', 'bytes_written', 'resizes', 'created', 'deleted')
+
+
+class Profiler():
+    """Call and I/O counters of `PlantedH5`
+
+    Public methods of `DatasetMixin`, `MarksMixin` and `AttributesMixin`
+    record call counts and wall time. Datasets accessed through `f_obj`
+    are wrapped, so bytes read and written, resizes and created or
+    deleted datasets are counted. Counters of a method include nested
+    calls of other methods.
+
+    Args:
+        hooks (list, optional): Callables receiving `(method_name, record)` after every call,
+            where `record` holds `time` and counter increments of the call. Defaults to None.
+    """
+
+    def __init__(self, hooks:list=None):
+        self.hooks = list(hooks) if hooks is not None else []
+        self.reset()
+
+
+    def reset(self):
+        self.totals = dict.fromkeys(COUNTERS, 0)
+        self.methods = collections.defaultdict(lambda: dict.fromkeys(('calls', 'time') + COUNTERS, 0))
+
+
+    def count(self, counter:str, value:int=1):
+        self.totals[counter] += value
+
+
+    def record(self, method_name:str, elapsed:float, before:dict):
+        """Adds call of method with counter values `before` the call"""
+        entry = self.methods[method_name]
+        entry['calls'] += 1
+        entry['time'] += elapsed
+
+        record = {'time': elapsed}
+        for counter in COUNTERS:
+            record[counter] = self.totals[counter] - before[counter]
+            entry[counter] += record[counter]
+
+        for hook in self.hooks:
+            hook(method_name, record)
+
+
+    def snapshot(self) -> dict:
+        return {
+            'totals': dict(self.totals),
+            'methods': {name: dict(entry) for name, entry in self.methods.items()},
+            }
+
+
+    def wrap(self, item):
+        """Wraps h5py group or dataset for counting"""
+        if isinstance(item, h.Dataset):
+            return ProfiledDataset(item, self)
+
+        if isinstance(item, h.Group):
+            return ProfiledGroup(item, self)
+
+        return item
+
+
+def _unwrap(item):
+    return item._item if isinstance(item, (ProfiledGroup, ProfiledDataset)) else item
+
+
+class ProfiledDataset():
+    """h5py dataset counting reads, writes and resizes"""
+
+    def __init__(self, item:h.Dataset, profiler:Profiler):
+        self._item = item
+        self._profiler = profiler
+
+
+    def __getattr__(self, name):
+        return getattr(self._item, name)
+
+
+    def __setattr__(self, name, value):
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._item, name, value)
+
+
+    def __len__(self):
+        return len(self._item)
+
+
+    def __getitem__(self, key):
+        content = self._item[key]
+        self._profiler.count('bytes_read', getattr(content, 'nbytes', 0))
+
+        return content
+
+
+    def __setitem__(self, key, value):
+        self._item[key] = value
+        self._profiler.count('bytes_written', np.asarray(value).nbytes)
+
+
+    def read_direct(self, dest, source_sel=None, dest_sel=None):
+        self._item.read_direct(dest, source_sel=source_sel, dest_sel=dest_sel)
+        self._profiler.count('bytes_read', dest[dest_sel].nbytes if dest_sel is not None else dest.nbytes)
+
+
+    def resize(self, size, axis=None):
+        self._item.resize(size, axis=axis)
+        self._profiler.count('resizes')
+
+
+class ProfiledGroup():
+    """h5py group or file wrapping its members and counting created and deleted datasets"""
+
+    def __init__(self, item:h.Group, profiler:Profiler):
+        self._item = item
+        self._profiler = profiler
+
+
+    def __getattr__(self, name):
+        return getattr(self._item, name)
+
+
+    def __setattr__(self, name, value):
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._item, name, value)
+
+
+    def __bool__(self):
+        return bool(self._item)
+
+
+    def __len__(self):
+        return len(self._item)
+
+
+    def __iter__(self):
+        return iter(self._item)
+
+
+    def __contains__(self, name):
+        return name in self._item
+
+
+    def __getitem__(self, name):
+        return self._profiler.wrap(self._item[name])
+
+
+    def __delitem__(self, name):
+        del self._item[name]
+        self._profiler.count('deleted')
+
+
+    def values(self):
+        return [self._profiler.wrap(item) for item in self._item.values()]
+
+
+    def items(self):
+        return [(name, self._profiler.wrap(item)) for name, item in self._item.items()]
+
+
+    def create_dataset(self, name, *args, **kwargs):
+        dset = self._item.create_dataset(name, *args, **kwargs)
+        self._profiler.count('created')
+
+        if kwargs.get('data') is not None:
+            self._profiler.count('bytes_written', np.asarray(kwargs['data']).nbytes)
+
+        return ProfiledDataset(dset, self._profiler)
+
+
+    def create_group(self, name, *args, **kwargs):
+        return ProfiledGroup(self._item.create_group(name, *args, **kwargs), self._profiler)
+
+
+    def copy(self, source, dest, *args, **kwargs):
+        return self._item.copy(_unwrap(source), _unwrap(dest), *args, **kwargs)
+
+
+def profiled(method:Callable) -> Callable:
+    """Records calls of method if profiling of the planter is enabled"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        profiler = self._profiler
+        if profiler is None:
+            return method(self, *args, **kwargs)
+
+        before = dict(profiler.totals)
+        t_start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            profiler.record(method.__name__, time.perf_counter() - t_start, before)
+
+    return wrapper
+
+
+def instrument(cls:type, mixins:tuple):
+    """Wraps public methods of mixins of class by `profiled`
+
+    Args:
+        cls (type): Class to instrument.
+        mixins (tuple): Mixin classes whose public methods are recorded.
+    """
+    for mixin in mixins:
+        for name, member in vars(mixin).items():
+            if name.startswith('_') or not callable(member):
+                continue
+
+            setattr(cls, name, profiled(getattr(cls, name)))
@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+
+import os
+import collections
+import multiprocessing
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from .config.constants import *
+from .config.config import *
+from .utils import block_length, apply_scaling
+
+
+def block_stats(block:np.ndarray, scaling:np.ndarray=None) -> np.ndarray:
+    """Statistics of block of samples
+
+    Module-level so that it can be executed on a process pool.
+
+    Args:
+        block (np.ndarray): Samples of shape (channels, samples) as stored in `Data`.
+        scaling (np.ndarray, optional): Gain and offset of the channels. None for float storage.
+
+    Returns:
+        np.ndarray: Structured array in `STATS_DTYPES`, one row per channel.
+    """
+    values = block.astype(np.float64)
+    if scaling is not None:
+        apply_scaling(values, scaling)
+
+    valid = ~np.isnan(values)
+
+    stats = np.zeros(values.shape[0], dtype=STATS_DTYPES)
+    stats['Count'] = valid.sum(axis=1)
+    stats['NaNCount'] = values.shape[1] - stats['Count']
+    stats['Min'] = np.where(valid, values, np.inf).min(axis=1, initial=np.inf)
+    stats['Max'] = np.where(valid, values, -np.inf).max(axis=1, initial=-np.inf)
+
+    count = np.maximum(stats['Count'], 1)
+    stats['Mean'] = np.where(valid, values, 0.0).sum(axis=1) / count
+    stats['M2'] = np.square(np.where(valid, values - stats['Mean'][:, None], 0.0)).sum(axis=1)
+
+    return stats
+
+
+def merge_stats(left:np.ndarray, right:np.ndarray) -> np.ndarray:
+    """Merges statistics of two disjoint parts of channels
+
+    Means and sums of squared deviations are combined by the pairwise
+    update of Chan et al., so partial results can be merged in any order.
+
+    Args:
+        left (np.ndarray): Statistics in `STATS_DTYPES`.
+        right (np.ndarray): Statistics in `STATS_DTYPES` of the same channels.
+
+    Returns:
+        np.ndarray: Merged statistics.
+    """
+    stats = np.empty(left.shape[0], dtype=STATS_DTYPES)
+
+    n_left = left['Count'].astype(np.float64)
+    n_right = right['Count'].astype(np.float64)
+    n_total = np.maximum(n_left + n_right, 1)
+
+    delta = right['Mean'] - left['Mean']
+
+    stats['Count'] = left['Count'] + right['Count']
+    stats['NaNCount'] = left['NaNCount'] + right['NaNCount']
+    stats['Min'] = np.minimum(left['Min'], right['Min'])
+    stats['Max'] = np.maximum(left['Max'], right['Max'])
+    stats['Mean'] = left['Mean'] + delta * n_right / n_total
+    stats['M2'] = left['M2'] + right['M2'] + delta ** 2 * n_left * n_right / n_total
+
+    return stats
+
+
+class StatsMixin():
+    """Per-channel statistics of `Data`
+
+    Count, NaN count, minimum, maximum, mean and sum of squared deviations
+    of every channel are stored in table `Stats` in physical values. Once
+    computed, the table is updated together with `Data`; appended samples
+    are merged into the stored statistics, other changes trigger a rescan.
+    """
+
+    def compute_channel_stats(self, yrange:bool=False, max_workers:int=None, use_processes:bool=False, block_bytes:int=None):
+        """Scans `Data` and stores statistics of all channels
+
+        Blocks of `Data` are read in order and reduced on a thread or
+        process pool; partial results are merged as they come.
+
+        Args:
+            yrange (bool, optional): Keep `YRangeMin`/`YRangeMax` of `ChannelSettings` equal to
+                the range of the channels. Defaults to False.
+            max_workers (int, optional): Number of workers, 0 computes in the calling thread. Defaults to None.
+            use_processes (bool, optional): Use process pool instead of thread pool. Defaults to False.
+            block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
+        """
+        if DATASET_DNAME not in self.f_obj:
+            return
+
+        stats = self._scan_stats(max_workers=max_workers, use_processes=use_processes, block_bytes=block_bytes)
+
+        if STATS_DNAME in self.f_obj:
+            del self.f_obj[STATS_DNAME]
+
+        dset = self.f_obj.create_dataset(STATS_DNAME, data=stats, chunks=(TABLE_CHUNK_ROWS,), maxshape=(None,))
+        dset.attrs['NbSamples'] = self.f_obj[DATASET_DNAME].shape[1]
+        dset.attrs['YRange'] = int(yrange)
+
+        self._fill_yrange()
+
+
+    def remove_channel_stats(self):
+        """Removes table of statistics"""
+        if STATS_DNAME in self.f_obj:
+            del self.f_obj[STATS_DNAME]
+
+
+    def channel_stats(self, channels=None, datacache_name:str=None) -> dict:
+        """Returns stored statistics of channels
+
+        Args:
+            channels (Union[str,int,list], optional): Channel names or indices. Defaults to all channels.
+            datacache_name (str, optional): Restrict channel names to given datacache. Defaults to None.
+
+        Raises:
+            ValueError: Statistics were not computed.
+
+        Returns:
+            dict: `count`, `nan_count`, `min`, `max`, `mean` and `std` arrays.
+        """
+        if STATS_DNAME not in self.f_obj:
+            raise ValueError(f'Dataset `{STATS_DNAME}` does not exist. Compute it first using `compute_channel_stats`.')
+
+        stats = self.f_obj[STATS_DNAME][:][self._channel_ids(channels, datacache_name)]
+        count = stats['Count'].astype(np.float64)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.where(count > 0, np.sqrt(stats['M2'] / count), np.nan)
+
+        return {
+            'count': stats['Count'],
+            'nan_count': stats['NaNCount'],
+            'min': stats['Min'],
+            'max': stats['Max'],
+            'mean': np.where(count > 0, stats['Mean'], np.nan),
+            'std': std,
+            }
+
+
+    def _scan_stats(self, rows:slice=None, start:int=0, stop:int=None, max_workers:int=0, use_processes:bool=False, block_bytes:int=None) -> np.ndarray:
+        """Statistics of rectangle of `Data`
+
+        Args:
+            rows (slice, optional): Scanned channels. Defaults to all channels.
+            start (int, optional): First sample. Defaults to 0.
+            stop (int, optional): Stop sample. Defaults to `Data.shape[1]`.
+            max_workers (int, optional): Number of workers, 0 computes in the calling thread. Defaults to 0.
+            use_processes (bool, optional): Use process pool instead of thread pool. Defaults to False.
+            block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
+
+        Returns:
+            np.ndarray: Structured array in `STATS_DTYPES`.
+        """
+        dset = self.f_obj[DATASET_DNAME]
+        rows = slice(None) if rows is None else rows
+        stop = dset.shape[1] if stop is None else stop
+
+        scaling = self._get_scaling()
+        if scaling is not None:
+            scaling = scaling[rows]
+
+        nb_rows = len(range(*rows.indices(dset.shape[0])))
+        stats = block_stats(np.empty((nb_rows, 0), dtype=dset.dtype))
+
+        step = block_length(dset, axis=1, block_bytes=block_bytes)
+
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+
+        if not max_workers:
+            for pos in range(start, stop, step):
+                stats = merge_stats(stats, block_stats(dset[rows, pos:min(pos + step, stop)], scaling))
+
+            return stats
+
+        if use_processes:
+            executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+        else:
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        # parent reads blocks in order, number of blocks in flight is bounded
+        with executor:
+            pending = collections.deque()
+            for pos in range(start, stop, step):
+                pending.append(executor.submit(block_stats, dset[rows, pos:min(pos + step, stop)], scaling))
+
+                while len(pending) > 2 * max_workers:
+                    stats = merge_stats(stats, pending.popleft().result())
+
+            while pending:
+                stats = merge_stats(stats, pending.popleft().result())
+
+        return stats
+
+
+    def _update_stats(self, from_sample:int=0, stop:int=None, rows:slice=None, block_bytes:int=None):
+        """Updates statistics after change of `Data`
+
+        Samples appended at the end of the covered range are merged into
+        the stored statistics, added channels are scanned alone. Any other
+        change rescans whole `Data`.
+
+        Args:
+            from_sample (int, optional): First changed sample. Defaults to 0.
+            stop (int, optional): Number of valid samples of `Data`. Defaults to `Data.shape[1]`.
+            rows (slice, optional): Added channels. Defaults to None.
+            block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
+        """
+        if STATS_DNAME not in self.f_obj:
+            return
+
+        dset = self._make_resizable(STATS_DNAME)
+        data = self.f_obj[DATASET_DNAME]
+        stop = data.shape[1] if stop is None else stop
+        covered = int(dset.attrs['NbSamples'])
+
+        if rows is not None and covered == stop:
+            dset.resize(data.shape[0], axis=0)
+            dset[rows] = self._scan_stats(rows=rows, stop=stop, block_bytes=block_bytes)
+
+        elif rows is None and covered == from_sample and dset.shape[0] == data.shape[0]:
+            dset[:] = merge_stats(dset[:], self._scan_stats(start=from_sample, stop=stop, block_bytes=block_bytes))
+
+        else:
+            dset.resize(data.shape[0], axis=0)
+            dset[:] = self._scan_stats(stop=stop, block_bytes=block_bytes)
+
+        dset.attrs['NbSamples'] = stop
+
+        self._fill_yrange()
+
+
+    def _fill_yrange(self):
+        """Sets Y-range of channels in `ChannelSettings` to their range if requested"""
+        if STATS_DNAME not in self.f_obj or not self.f_obj[STATS_DNAME].attrs.get('YRange', 0):
+            return
+
+        # settings are written at the end of the batch
+        if self._batch is not None or CHANNEL_DNAME not in self.f_obj:
+            return
+
+        stats = self.f_obj[STATS_DNAME].fields(['Count', 'Min', 'Max'])[:]
+        settings = self.f_obj[CHANNEL_DNAME]
+        yrange = settings.fields(['YRangeMin', 'YRangeMax'])[:]
+
+        nb_rows = min(stats.shape[0], yrange.shape[0])
+        stats, yrange = stats[:nb_rows], yrange[:nb_rows]
+
+        y_min = stats['Min'].astype(yrange.dtype['YRangeMin'])
+        y_max = stats['Max'].astype(yrange.dtype['YRangeMax'])
+        changed = (stats['Count'] > 0) & ((yrange['YRangeMin'] != y_min) | (yrange['YRangeMax'] != y_max))
+
+        if not changed.any():
+            return
+
+        # only Y-range columns of the span of changed rows are written
+        row_ids = np.flatnonzero(changed)
+        first, last = row_ids[0], row_ids[-1] + 1
+
+        yrange['YRangeMin'][changed] = y_min[changed]
+        yrange['YRangeMax'][changed] = y_max[changed]
+
+        settings[first:last, 'YRangeMin', 'YRangeMax'] = yrange[first:last]
+        self._invalidate_metadata('settings')
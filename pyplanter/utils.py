@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+
+import os
+import glob
+import h5py as h
+import numpy as np
+from typing import Union
+
+from .config.constants import *
+from .config.config import *
+
+
+def encode_field(values:Union[str,bytes,list,np.ndarray]) -> np.ndarray:
+    """Encodes string values into UTF-8 bytes
+
+    Args:
+        values (Union[str,bytes,list,np.ndarray]): Scalar or sequence of strings.
+
+    Returns:
+        np.ndarray: Array of encoded values. Non-string values are returned unchanged.
+    """
+    values = np.asarray(values)
+
+    if values.dtype.kind == 'U':
+        return np.char.encode(values, 'UTF-8')
+
+    return values
+
+
+def collect_files(paths:Union[str,list], pattern:Union[str,list]='*.h5') -> list:
+    """Expands files and directories into sorted list of absolute file paths
+
+    Args:
+        paths (Union[str,list]): Files or directories (searched recursively).
+        pattern (Union[str,list], optional): File name pattern or patterns within directories. Defaults to '*.h5'.
+
+    Returns:
+        list: Unique absolute file paths.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+
+    patterns = [pattern] if isinstance(pattern, str) else pattern
+
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name_pattern in patterns:
+                files.extend(glob.glob(os.path.join(path, '**', name_pattern), recursive=True))
+        else:
+            files.append(path)
+
+    return sorted({os.path.abspath(path) for path in files})
+
+
+def block_length(dset:h.Dataset, axis:int, block_bytes:int=None) -> int:
+    """Number of items along `axis` fitting into a block of `block_bytes`
+
+    The length is aligned to the chunk size of the dataset along `axis`,
+    so that blocks never read a chunk partially twice.
+
+    Args:
+        dset (h.Dataset): Dataset handle.
+        axis (int): Iteration axis.
+        block_bytes (int, optional): Block size in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
+
+    Returns:
+        int: Block length along `axis`.
+    """
+    if block_bytes is None:
+        block_bytes = DEFAULT_PARAMS['block_bytes']
+
+    item_bytes = dset.dtype.itemsize * int(np.prod([n for ax, n in enumerate(dset.shape) if ax != axis]))
+    length = max(1, block_bytes // max(1, item_bytes))
+
+    if dset.chunks:
+        chunk = dset.chunks[axis]
+        length = max(chunk, length // chunk * chunk)
+
+    return length
+
+
+def dataset_storage(dset:h.Dataset) -> dict:
+    """Storage profile of existing 2D dataset
+
+    Args:
+        dset (h.Dataset): Dataset handle.
+
+    Returns:
+        dict: Profile as in `STORAGE_PROFILES`, None for datasets without chunks.
+    """
+    if not dset.chunks:
+        return None
+
+    return {
+        'chunks': (None if dset.chunks[0] == dset.shape[0] else dset.chunks[0], dset.chunks[1]),
+        'compression': dset.compression,
+        'compression_opts': dset.compression_opts,
+        'shuffle': dset.shuffle,
+        'fletcher32': dset.fletcher32,
+        }
+
+
+def read_rows(dset:h.Dataset, row_ids:np.ndarray, sel:tuple=()) -> np.ndarray:
+    """Reads rows of dataset in arbitrary order
+
+    HDF5 point selections have to be increasing, so unique sorted rows are
+    read and reordered afterwards. Contiguous row ranges are read as slices.
+
+    Args:
+        dset (h.Dataset): Dataset handle.
+        row_ids (np.ndarray): Row indices along axis 0.
+        sel (tuple, optional): Selection of remaining axes. Defaults to all.
+
+    Returns:
+        np.ndarray: Array with rows in the order of `row_ids`.
+    """
+    row_ids = np.asarray(row_ids)
+    unique_ids, inverse = np.unique(row_ids, return_inverse=True)
+
+    if unique_ids.shape[0] and unique_ids[-1] - unique_ids[0] + 1 == unique_ids.shape[0]:
+        content = dset[(slice(int(unique_ids[0]), int(unique_ids[-1]) + 1),) + tuple(sel)]
+    else:
+        content = dset[(unique_ids,) + tuple(sel)]
+
+    if unique_ids.shape[0] == row_ids.shape[0] and np.array_equal(unique_ids, row_ids):
+        return content
+
+    return content[inverse]
+
+
+def fit_scaling(data_arr:np.ndarray, dtype:Union[str,np.dtype]) -> np.ndarray:
+    """Per-channel gain and offset mapping data range onto integer type
+
+    Integer input is stored unchanged (gain 1, offset 0).
+
+    Args:
+        data_arr (np.ndarray): Array of shape (channels, samples).
+        dtype (Union[str,np.dtype]): Integer storage type.
+
+    Returns:
+        np.ndarray: Structured array in `SCALING_DTYPES`.
+    """
+    scaling = np.empty(data_arr.shape[0], dtype=SCALING_DTYPES)
+    scaling['Gain'] = 1.0
+    scaling['Offset'] = 0.0
+
+    if data_arr.dtype.kind in 'iu' or not data_arr.shape[1]:
+        return scaling
+
+    limits = np.iinfo(dtype)
+    mins = np.nanmin(data_arr, axis=1)
+    maxs = np.nanmax(data_arr, axis=1)
+
+    gain = (maxs - mins) / (float(limits.max) - float(limits.min))
+    valid = np.isfinite(gain) & (gain > 0)
+
+    # minimum of the data maps onto minimum of the type
+    scaling['Gain'][valid] = gain[valid]
+    scaling['Offset'][valid] = mins[valid] - float(limits.min) * gain[valid]
+
+    return scaling
+
+
+def quantize(data_arr:np.ndarray, scaling:np.ndarray, dtype:Union[str,np.dtype]) -> np.ndarray:
+    """Converts physical values into integer storage values
+
+    Args:
+        data_arr (np.ndarray): Array of shape (channels, samples).
+        scaling (np.ndarray): Gain and offset of channels in `SCALING_DTYPES`.
+        dtype (Union[str,np.dtype]): Integer storage type.
+
+    Returns:
+        np.ndarray: Array of `dtype`, values out of range are clipped.
+    """
+    limits = np.iinfo(dtype)
+
+    values = (data_arr - scaling['Offset'][:, None]) / scaling['Gain'][:, None]
+    np.rint(values, out=values)
+    np.clip(values, limits.min, limits.max, out=values)
+
+    return values.astype(dtype)
+
+
+def apply_scaling(values:np.ndarray, scaling:np.ndarray) -> np.ndarray:
+    """Converts storage values into physical values in place
+
+    Args:
+        values (np.ndarray): Float array of shape (channels, ...).
+        scaling (np.ndarray): Gain and offset of channels in `SCALING_DTYPES`.
+
+    Returns:
+        np.ndarray: The same array.
+    """
+    shape = (-1,) + (1,) * (values.ndim - 1)
+
+    values *= scaling['Gain'].reshape(shape).astype(values.dtype)
+    values += scaling['Offset'].reshape(shape).astype(values.dtype)
+
+    return values
@@ -0,0 +1,524 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import zlib
+import argparse
+import collections
+import multiprocessing
+import h5py as h
+import numpy as np
+from typing import Union
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from .config.constants import *
+from .config.config import *
+from .utils import block_length, collect_files
+from .batch import Batch
+
+
+def unit_checksums(block:np.ndarray, unit:tuple) -> np.ndarray:
+    """CRC32 of every checksum unit of block
+
+    Module-level so that it can be executed on a process pool.
+
+    Args:
+        block (np.ndarray): Samples of shape (channels, samples) starting at unit boundaries.
+        unit (tuple): Unit shape (channels, samples); units at the end of the block may be partial.
+
+    Returns:
+        np.ndarray: Array of shape (channel units, sample units) in `CHECKSUM_DTYPE`.
+    """
+    rows = range(0, block.shape[0], unit[0])
+    cols = range(0, block.shape[1], unit[1])
+
+    crcs = np.empty((len(rows), len(cols)), dtype=CHECKSUM_DTYPE)
+    for row_idx, row in enumerate(rows):
+        for col_idx, col in enumerate(cols):
+            crcs[row_idx, col_idx] = zlib.crc32(np.ascontiguousarray(block[row:row + unit[0], col:col + unit[1]]))
+
+    return crcs
+
+
+def _problem(check:str, dname:str, message:str, rows:list=None, chunks:list=None) -> dict:
+    return {'check': check, 'dataset': dname, 'message': message, 'rows': rows, 'chunks': chunks}
+
+
+class VerifyMixin():
+    """Consistency checks and per-chunk checksums of planted files
+
+    The fast level of `verify` compares shapes of `Data` and channel
+    tables, marks, overview levels and bookkeeping attributes without
+    reading samples. The deep level reads every chunk of `Data`; chunks
+    of datasets with `fletcher32` filter are verified by HDF5 on read,
+    and if table `Checksums` exists (see `compute_checksums`), CRC32 of
+    every chunk is compared with the stored one. Once computed, the table
+    is updated together with `Data`.
+    """
+
+    def _checksum_unit(self, dset:h.Dataset) -> tuple:
+        """Shape of checksum unit; chunk shape or span of all channels if contiguous"""
+        if dset.chunks:
+            return tuple(int(n) for n in dset.chunks)
+
+        return (max(1, dset.shape[0]), DEFAULT_PARAMS['checksum_samples'])
+
+
+    def _unit_step(self, dset:h.Dataset, unit:tuple, block_bytes:int=None) -> int:
+        """Block length along time axis aligned to checksum units"""
+        step = block_length(dset, axis=1, block_bytes=block_bytes)
+
+        return max(unit[1], step // unit[1] * unit[1])
+
+
+    def compute_checksums(self, max_workers:int=None, use_processes:bool=False, block_bytes:int=None):
+        """Computes and stores CRC32 of every chunk of `Data`
+
+        Args:
+            max_workers (int, optional): Number of workers, 0 computes in the calling thread. Defaults to None.
+            use_processes (bool, optional): Use process pool instead of thread pool. Defaults to False.
+            block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
+        """
+        if DATASET_DNAME not in self.f_obj:
+            return
+
+        self.remove_checksums()
+        dset = self.f_obj.create_dataset(CHECKSUMS_DNAME, shape=(0, 0), dtype=CHECKSUM_DTYPE, chunks=True, maxshape=(None, None))
+        dset.attrs['Algorithm'] = 'crc32'
+
+        self._write_checksums(max_workers=max_workers, use_processes=use_processes, block_bytes=block_bytes)
+
+
+    def remove_checksums(self):
+        """Removes table of checksums"""
+        if CHECKSUMS_DNAME in self.f_obj:
+            del self.f_obj[CHECKSUMS_DNAME]
+
+
+    def _scan_checksums(self, first_row:int=0, start:int=0, stop:int=None, max_workers:int=0, use_processes:bool=False, block_bytes:int=None) -> np.ndarray:
+        """Checksums of units of rectangle of `Data`
+
+        Args:
+            first_row (int, optional): First channel, aligned to units. Defaults to 0.
+            start (int, optional): First sample, aligned to units. Defaults to 0.
+            stop (int, optional): Stop sample. Defaults to `Data.shape[1]`.
+            max_workers (int, optional): Number of workers, 0 computes in the calling thread. Defaults to 0.
+            use_processes (bool, optional): Use process pool instead of thread pool. Defaults to False.
+            block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
+
+        Returns:
+            np.ndarray: Array of shape (channel units, sample units) in `CHECKSUM_DTYPE`.
+        """
+        dset = self.f_obj[DATASET_DNAME]
+        unit = self._checksum_unit(dset)
+        stop = dset.shape[1] if stop is None else stop
+        step = self._unit_step(dset, unit, block_bytes)
+
+        nb_row_units = -(-(dset.shape[0] - first_row) // unit[0])
+        parts = [np.empty((nb_row_units, 0), dtype=CHECKSUM_DTYPE)]
+
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+
+        if not max_workers:
+            for pos in range(start, stop, step):
+                parts.append(unit_checksums(dset[first_row:, pos:min(pos + step, stop)], unit))
+
+            return np.concatenate(parts, axis=1)
+
+        if use_processes:
+            executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+        else:
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        # parent reads blocks in order, number of blocks in flight is bounded
+        with executor:
+            pending = collections.deque()
+            for pos in range(start, stop, step):
+                pending.append(executor.submit(unit_checksums, dset[first_row:, pos:min(pos + step, stop)], unit))
+
+                while len(pending) > 2 * max_workers:
+                    parts.append(pending.popleft().result())
+
+            while pending:
+                parts.append(pending.popleft().result())
+
+        return np.concatenate(parts, axis=1)
+
+
+    def _write_checksums(self, first_row:int=0, start:int=0, stop:int=None, max_workers:int=0, use_processes:bool=False, block_bytes:int=None):
+        """Recomputes checksums of units from given channel and sample on"""
+        data = self.f_obj[DATASET_DNAME]
+        unit = self._checksum_unit(data)
+        stop = data.shape[1] if stop is None else stop
+
+        dset = self._make_resizable(CHECKSUMS_DNAME)
+        dset.resize((-(-data.shape[0] // unit[0]), -(-stop // unit[1])))
+        dset[first_row // unit[0]:, start // unit[1]:] = self._scan_checksums(
+            first_row, start, stop, max_workers=max_workers, use_processes=use_processes, block_bytes=block_bytes,
+            )
+
+        # attributes are modified in place, which is allowed in SWMR mode
+        dset.attrs.modify('NbSamples', stop)
+        if tuple(dset.attrs.get('UnitShape', ())) != unit:
+            dset.attrs['UnitShape'] = np.array(unit, dtype=np.int64)
+
+
+    def _update_checksums(self, from_sample:int=0, stop:int=None, rows:slice=None, block_bytes:int=None):
+        """Updates checksums after change of `Data`
+
+        Units of appended samples or channels are computed alone, the
+        last partial unit is recomputed. Change of the unit shape, e.g. by
+        re-chunking, recomputes all units.
+
+        Args:
+            from_sample (int, optional): First changed sample. Defaults to 0.
+            stop (int, optional): Number of valid samples of `Data`. Defaults to `Data.shape[1]`.
+            rows (slice, optional): Added channels. Defaults to None.
+            block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
+        """
+        if CHECKSUMS_DNAME not in self.f_obj or DATASET_DNAME not in self.f_obj:
+            return
+
+        data = self.f_obj[DATASET_DNAME]
+        dset = self.f_obj[CHECKSUMS_DNAME]
+        unit = self._checksum_unit(data)
+        stop = data.shape[1] if stop is None else stop
+        covered = int(dset.attrs.get('NbSamples', 0))
+
+        first_row, start = 0, 0
+        if tuple(dset.attrs.get('UnitShape', ())) == unit:
+            if rows is not None and covered == stop:
+                first_row = rows.indices(data.shape[0])[0] // unit[0] * unit[0]
+
+            elif rows is None:
+                start = min(from_sample, covered) // unit[1] * unit[1]
+
+        self._write_checksums(first_row, start, stop, block_bytes=block_bytes)
+
+
+    def _stored_checksums(self, problems:list) -> np.ndarray:
+        """Stored checksums if they match `Data`, otherwise None and a problem is recorded"""
+        if CHECKSUMS_DNAME not in self.f_obj:
+            return None
+
+        data = self.f_obj[DATASET_DNAME]
+        dset = self.f_obj[CHECKSUMS_DNAME]
+        unit = self._checksum_unit(data)
+        expected = (-(-data.shape[0] // unit[0]), -(-data.shape[1] // unit[1]))
+
+        if (
+            tuple(dset.attrs.get('UnitShape', ())) != unit
+            or int(dset.attrs.get('NbSamples', -1)) != data.shape[1]
+            or dset.shape != expected
+            ):
+            problems.append(_problem(
+                'stale', CHECKSUMS_DNAME,
+                f'`{CHECKSUMS_DNAME}` does not match shape or chunks of `{DATASET_DNAME}`. Recompute it using `compute_checksums`.',
+                ))
+            return None
+
+        return dset[:]
+
+
+    def _verify_structure(self) -> list:
+        """Checks consistency of metadata without reading samples"""
+        problems = []
+        f_obj = self.f_obj
+
+        if 'Fs' not in f_obj.attrs or not np.all(np.asarray(f_obj.attrs['Fs']) > 0):
+            problems.append(_problem('attributes', '/', 'Sampling frequency `Fs` is missing or not positive.'))
+
+        leftovers = [
+            name for name in f_obj
+            if name.endswith(Batch.BACKUP_SUFFIX) or name.endswith('_resizable') or name == DATASET_DNAME + '_contiguous'
+            ]
+        if leftovers:
+            problems.append(_problem('leftover', ', '.join(leftovers), 'Temporary datasets of an interrupted operation.'))
+
+        if DATASET_DNAME not in f_obj:
+            orphans = [dname for dname in (INFO_DNAME, CHANNEL_DNAME, SCALING_DNAME, STATS_DNAME, CHECKSUMS_DNAME, OVERVIEW_GNAME) if dname in f_obj]
+            if orphans:
+                problems.append(_problem('missing', DATASET_DNAME, f'`{DATASET_DNAME}` is missing, but ' + ', '.join(orphans) + ' exist.'))
+
+            return problems + self._verify_marks(None)
+
+        data = f_obj[DATASET_DNAME]
+        if data.ndim != 2:
+            problems.append(_problem('shape', DATASET_DNAME, f'`{DATASET_DNAME}` has {data.ndim} dimensions instead of 2.'))
+            return problems
+
+        nb_channels, nb_samples = data.shape
+
+        # channel tables
+        for dname in (INFO_DNAME, CHANNEL_DNAME, SCALING_DNAME, STATS_DNAME):
+            if dname not in f_obj:
+                if dname in (INFO_DNAME, CHANNEL_DNAME) or (dname == SCALING_DNAME and data.dtype.kind in 'iu'):
+                    problems.append(_problem('missing', dname, f'`{dname}` is missing.'))
+                continue
+
+            nb_rows = f_obj[dname].shape[0]
+            if nb_rows != nb_channels:
+                problems.append(_problem(
+                    'rows', dname,
+                    f'`{dname}` has {nb_rows} rows, `{DATASET_DNAME}` has {nb_channels} channels.',
+                    rows=list(range(min(nb_rows, nb_channels), max(nb_rows, nb_channels))),
+                    ))
+
+        if SCALING_DNAME in f_obj:
+            if data.dtype.kind not in 'iu':
+                problems.append(_problem('scaling', SCALING_DNAME, f'`{SCALING_DNAME}` exists, but `{DATASET_DNAME}` is not stored as integers.'))
+
+            gain = f_obj[SCALING_DNAME]['Gain']
+            invalid = np.flatnonzero(~np.isfinite(gain) | (gain == 0))
+            if invalid.shape[0]:
+                problems.append(_problem('scaling', SCALING_DNAME, 'Gain is zero or not finite.', rows=invalid.tolist()))
+
+        if STATS_DNAME in f_obj and int(f_obj[STATS_DNAME].attrs.get('NbSamples', -1)) != nb_samples:
+            problems.append(_problem('stale', STATS_DNAME, f'`{STATS_DNAME}` does not cover {nb_samples} samples of `{DATASET_DNAME}`.'))
+
+        for factor, dset in self._overview_levels():
+            expected = (nb_channels, nb_samples // factor, 3)
+            if dset.shape != expected:
+                problems.append(_problem('stale', dset.name, f'Overview level of factor {factor} has shape {dset.shape} instead of {expected}.'))
+
+        self._stored_checksums(problems)
+
+        return problems + self._verify_marks(nb_samples)
+
+
+    def _verify_marks(self, nb_samples:int=None) -> list:
+        """Checks that marks are ordered and lie within `Data`"""
+        if MARKS_DNAME not in self.f_obj:
+            return []
+
+        marks = self.f_obj[MARKS_DNAME][:]
+        left = marks['SampleLeft'].astype(np.int64)
+        right = marks['SampleRight'].astype(np.int64)
+
+        problems = []
+
+        reversed_rows = np.flatnonzero(left > right)
+        if reversed_rows.shape[0]:
+            problems.append(_problem('marks', MARKS_DNAME, 'Marks end before they start.', rows=reversed_rows.tolist()))
+
+        limit = np.iinfo(np.int64).max if nb_samples is None else nb_samples
+        outside = np.flatnonzero((left < 0) | (right < 0) | (left >= limit) | (right >= limit))
+        if outside.shape[0]:
+            problems.append(_problem('marks', MARKS_DNAME, f'Marks lie outside of {nb_samples} samples of `{DATASET_DNAME}`.', rows=outside.tolist()))
+
+        return problems
+
+
+    def _verify_data(self, max_workers:int=None, use_processes:bool=False, block_bytes:int=None) -> tuple:
+        """Reads every chunk of `Data` and compares stored checksums
+
+        Returns:
+            tuple: List of problems and name of verified checksum (`fletcher32`, `crc32`) or None.
+        """
+        problems = []
+        data = self.f_obj[DATASET_DNAME]
+        unit = self._checksum_unit(data)
+        stored = self._stored_checksums([])
+
+        nb_channels, nb_samples = data.shape
+        step = self._unit_step(data, unit, block_bytes)
+        unreadable = []
+
+        def read_block(pos):
+            stop = min(pos + step, nb_samples)
+            try:
+                return data[:, pos:stop]
+
+            # locate unreadable chunks within the block
+            except OSError:
+                block = np.zeros((nb_channels, stop - pos), dtype=data.dtype)
+                for row in range(0, nb_channels, unit[0]):
+                    for col in range(pos, stop, unit[1]):
+                        chunk = (row, min(row + unit[0], nb_channels), col, min(col + unit[1], stop))
+                        try:
+                            block[chunk[0]:chunk[1], chunk[2] - pos:chunk[3] - pos] = data[chunk[0]:chunk[1], chunk[2]:chunk[3]]
+                        except OSError as e:
+                            unreadable.append((chunk, str(e)))
+
+                return block
+
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+
+        parts = [np.empty((-(-nb_channels // unit[0]), 0), dtype=CHECKSUM_DTYPE)]
+
+        if stored is None or not max_workers:
+            for pos in range(0, nb_samples, step):
+                block = read_block(pos)
+                if stored is not None:
+                    parts.append(unit_checksums(block, unit))
+
+        else:
+            if use_processes:
+                executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+            else:
+                executor = ThreadPoolExecutor(max_workers=max_workers)
+
+            with executor:
+                pending = collections.deque()
+                for pos in range(0, nb_samples, step):
+                    pending.append(executor.submit(unit_checksums, read_block(pos), unit))
+
+                    while len(pending) > 2 * max_workers:
+                        parts.append(pending.popleft().result())
+
+                while pending:
+                    parts.append(pending.popleft().result())
+
+        if unreadable:
+            problems.append(_problem(
+                'read', DATASET_DNAME,
+                f'{len(unreadable)} chunks cannot be read: ' + unreadable[0][1],
+                chunks=[chunk for chunk, _ in unreadable],
+                ))
+
+        if stored is not None:
+            unread = {(chunk[0] // unit[0], chunk[2] // unit[1]) for chunk, _ in unreadable}
+            bad = [
+                (row * unit[0], min((row + 1) * unit[0], nb_channels), col * unit[1], min((col + 1) * unit[1], nb_samples))
+                for row, col in zip(*(idx.tolist() for idx in np.nonzero(np.concatenate(parts, axis=1) != stored)))
+                if (row, col) not in unread
+                ]
+
+            if bad:
+                problems.append(_problem('checksum', DATASET_DNAME, f'{len(bad)} chunks do not match stored checksums.', chunks=bad))
+
+        checksum = 'crc32' if stored is not None else 'fletcher32' if data.fletcher32 else None
+
+        return problems, checksum
+
+
+    def verify(self, deep:bool=False, max_workers:int=None, use_processes:bool=False, block_bytes:int=None) -> dict:
+        """Checks consistency of the file
+
+        The fast level compares the number of channels of `Data` with rows
+        of `Info`, `ChannelSettings`, `Scaling` and `Stats`, marks with the
+        number of samples, overview levels, stored checksums and temporary
+        datasets left by interrupted operations. The deep level also reads
+        every chunk of `Data` and verifies its checksums.
+
+        Args:
+            deep (bool, optional): Read and verify every chunk of `Data`. Defaults to False.
+            max_workers (int, optional): Number of workers computing checksums, 0 computes in the calling
+                thread. Defaults to None.
+            use_processes (bool, optional): Use process pool instead of thread pool. Defaults to False.
+            block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
+
+        Returns:
+            dict: `path`, `level`, `ok`, `checksum` (verified checksum, `fletcher32`, `crc32` or None)
+                and list of `problems`, each with `check`, `dataset`, `message`, `rows` (indices of bad rows)
+                and `chunks` (bad chunks as `(first channel, stop channel, first sample, stop sample)`).
+        """
+        problems = self._verify_structure()
+        checksum = None
+
+        if deep and DATASET_DNAME in self.f_obj and self.f_obj[DATASET_DNAME].ndim == 2:
+            data_problems, checksum = self._verify_data(max_workers=max_workers, use_processes=use_processes, block_bytes=block_bytes)
+            problems.extend(data_problems)
+
+        return {
+            'path': self.f_obj.filename,
+            'level': 'deep' if deep else 'fast',
+            'ok': not problems,
+            'checksum': checksum,
+            'problems': problems,
+            }
+
+
+def verify_file(f_path:str, deep:bool=False, block_bytes:int=None) -> dict:
+    """Verifies single file opened read-only
+
+    Module-level so that it can be executed on a process pool.
+
+    Args:
+        f_path (str): Path to h5 file.
+        deep (bool, optional): Read and verify every chunk of `Data`. Defaults to False.
+        block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
+
+    Returns:
+        dict: Report of `VerifyMixin.verify`; a file that cannot be opened has problem `open`.
+    """
+    from .planter import PlantedH5
+
+    planter = PlantedH5()
+
+    try:
+        planter.f_obj = h.File(f_path, 'r')
+    except OSError as e:
+        return {'path': f_path, 'level': 'deep' if deep else 'fast', 'ok': False, 'checksum': None, 'problems': [_problem('open', '/', str(e))]}
+
+    try:
+        return planter.verify(deep=deep, max_workers=0, block_bytes=block_bytes)
+
+    except (OSError, KeyError, ValueError) as e:
+        return {'path': f_path, 'level': 'deep' if deep else 'fast', 'ok': False, 'checksum': None, 'problems': [_problem('error', '/', str(e))]}
+
+    finally:
+        planter.close()
+
+
+def verify_many(paths:Union[str,list], deep:bool=False, pattern:str='*.h5', max_workers:int=None, block_bytes:int=None):
+    """Verifies many files in parallel
+
+    Args:
+        paths (Union[str,list]): Files or directories (searched recursively).
+        deep (bool, optional): Read and verify every chunk of `Data`. Defaults to False.
+        pattern (str, optional): File name pattern within directories. Defaults to '*.h5'.
+        max_workers (int, optional): Number of processes, 0 verifies in the calling process. Defaults to None.
+        block_bytes (int, optional): Size of a block in bytes. Defaults to `DEFAULT_PARAMS['block_bytes']`.
+
+    Yields:
+        dict: Report of every file (see `VerifyMixin.verify`) in order of paths.
+    """
+    files = collect_files(paths, pattern)
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    if not max_workers or len(files) < 2:
+        for f_path in files:
+            yield verify_file(f_path, deep, block_bytes)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        yield from executor.map(verify_file, files, [deep] * len(files), [block_bytes] * len(files))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Verifies consistency of planted files.')
+    parser.add_argument('paths', nargs='+', help='Files or directories.')
+    parser.add_argument('--deep', action='store_true', help='Read and verify every chunk of `Data`.')
+    parser.add_argument('--pattern', default='*.h5')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Number of processes, 0 for none.')
+    args = parser.parse_args()
+
+    nb_files, nb_bad = 0, 0
+    for report in verify_many(args.paths, deep=args.deep, pattern=args.pattern, max_workers=args.workers):
+        nb_files += 1
+        if report['ok']:
+            print(f'OK     {report["path"]}')
+            continue
+
+        nb_bad += 1
+        print(f'FAILED {report["path"]}')
+        for problem in report['problems']:
+            location = ''
+            if problem['rows']:
+                location = f' rows {problem["rows"][:10]}' + (' ...' if len(problem['rows']) > 10 else '')
+            if problem['chunks']:
+                location = f' chunks {problem["chunks"][:10]}' + (' ...' if len(problem['chunks']) > 10 else '')
+
+            print(f'    {problem["check"]:>10} | {problem["dataset"]}: {problem["message"]}{location}')
+
+    print(f'{nb_files - nb_bad} of {nb_files} files consistent')
+    sys.exit(1 if nb_bad else 0)
+
+
+if __name__ == '__main__':
+    main()
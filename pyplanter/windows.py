@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+
+import collections
+import numpy as np
+from typing import Union
+from concurrent.futures import ThreadPoolExecutor
+
+from .config.constants import *
+from .planter import PlantedH5
+
+
+WindowBatch = collections.namedtuple('WindowBatch', ['data', 'channels', 'marks'])
+
+
+class WindowIterator():
+    """Batches of fixed-length windows sampled from planted files
+
+    Each iteration is one epoch yielding `WindowBatch(data, channels, marks)`,
+    where `data` has shape (windows, channels, window) and `marks` holds
+    the marks overlapping every window with samples relative to its start.
+
+    Window positions of an epoch are planned up front from `seed` and
+    the epoch number, so every shard computes the same plan and takes
+    every `nb_shards`-th window of it. Windows of a batch are read in
+    file and sample order, which keeps reads within neighbouring chunks.
+    Batches are read ahead on a thread pool into preallocated buffers
+    that are reused; a yielded array is overwritten when the next batch
+    is requested, so copy it to keep it longer.
+
+    Args:
+        paths (Union[str,list]): Path or list of paths to h5 files.
+        window (int): Window length in samples.
+        channels (Union[str,int,list], optional): Channel names or indices, the same in every file.
+            Defaults to all channels (of the datacache).
+        datacache_name (str, optional): Restrict channel names to given datacache. Defaults to None.
+        sampling (str, optional): `strided`, `random` or `marks`. Defaults to 'strided'.
+        stride (int, optional): Step of strided windows. Defaults to `window`.
+        nb_windows (int, optional): Number of random windows per file and epoch. Defaults to
+            the number of non-overlapping windows of the file.
+        mark_group (Union[str,list], optional): Group(s) of marks windows are centred on in `marks`
+            sampling. Defaults to all marks.
+        batch_size (int, optional): Number of windows per batch. Defaults to 32.
+        shuffle (bool, optional): Shuffle strided and mark-centred windows every epoch. Random
+            windows are always shuffled. Defaults to False.
+        drop_last (bool, optional): Drop last incomplete batch. Defaults to False.
+        seed (int, optional): Seed of random sampling and shuffling. Defaults to 0.
+        shard_id (int, optional): Index of this shard. Defaults to 0.
+        nb_shards (int, optional): Number of shards, e.g. worker processes. Defaults to 1.
+        prefetch (int, optional): Number of batches read ahead. Defaults to 2.
+        max_workers (int, optional): Number of reading threads. Defaults to `prefetch`.
+        raw (bool, optional): Yield stored values of integer `Data` without scaling. Defaults to False.
+        mmap (bool, optional): Memory-map contiguous `Data` (see `PlantedH5.open`). Defaults to False.
+    """
+
+    SAMPLING = ('strided', 'random', 'marks')
+
+    def __init__(
+        self,
+        paths:Union[str,list],
+        window:int,
+        channels:Union[str,int,list]=None,
+        datacache_name:str=None,
+        sampling:str='strided',
+        stride:int=None,
+        nb_windows:int=None,
+        mark_group:Union[str,list]=None,
+        batch_size:int=32,
+        shuffle:bool=False,
+        drop_last:bool=False,
+        seed:int=0,
+        shard_id:int=0,
+        nb_shards:int=1,
+        prefetch:int=2,
+        max_workers:int=None,
+        raw:bool=False,
+        mmap:bool=False,
+        ):
+        if sampling not in self.SAMPLING:
+            raise ValueError(f'Unknown sampling {sampling}. Use one of: ' + ', '.join(self.SAMPLING))
+
+        if not 0 <= shard_id < nb_shards:
+            raise ValueError(f'Shard {shard_id} out of range of {nb_shards} shards.')
+
+        if isinstance(paths, str):
+            paths = [paths]
+
+        self.window = int(window)
+        self.sampling = sampling
+        self.stride = self.window if stride is None else int(stride)
+        self.nb_windows = nb_windows
+        self.mark_group = mark_group
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.seed = seed
+        self.shard_id = shard_id
+        self.nb_shards = nb_shards
+        self.prefetch = max(0, prefetch)
+        self.max_workers = max(1, self.prefetch) if max_workers is None else max_workers
+        self.epoch = 0
+
+        self._planters = []
+        self._channel_ids = []
+        self._scalings = []
+
+        try:
+            for f_path in paths:
+                planter = PlantedH5()
+                planter.open(f_path, mode='r', mmap=mmap)
+                self._planters.append(planter)
+
+                self._channel_ids.append(planter._channel_ids(channels, datacache_name))
+                self._scalings.append(None if raw else planter._get_scaling())
+
+                # build marks index before reading threads use it
+                planter._get_marks_index()
+
+        except BaseException:
+            self.close()
+            raise
+
+        nb_channels = {ids.shape[0] for ids in self._channel_ids}
+        if len(nb_channels) != 1:
+            raise ValueError('Files differ in number of selected channels.')
+
+        index = self._planters[0]._get_channel_index()
+        self.channels = [index.names[row] for row in self._channel_ids[0]]
+
+        dtypes = [planter.f_obj[DATASET_DNAME].dtype for planter in self._planters]
+        if any(scaling is not None for scaling in self._scalings):
+            dtypes.append(np.dtype(np.float32))
+
+        self.dtype = np.result_type(*dtypes)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    def close(self):
+        """Closes all files"""
+        for planter in self._planters:
+            planter.close()
+
+        self._planters = []
+
+
+    def set_epoch(self, epoch:int):
+        """Sets epoch of the next iteration; window plans depend on it"""
+        self.epoch = epoch
+
+
+    def plan(self, epoch:int=None) -> np.ndarray:
+        """Window positions of this shard in the order of reading
+
+        Args:
+            epoch (int, optional): Epoch. Defaults to current epoch.
+
+        Returns:
+            np.ndarray: Array of shape (windows, 2) with file index and first sample.
+        """
+        epoch = self.epoch if epoch is None else epoch
+        rng = np.random.default_rng([self.seed, epoch])
+
+        positions = []
+        for file_idx, planter in enumerate(self._planters):
+            nb_samples = planter.f_obj[DATASET_DNAME].shape[1]
+            last = nb_samples - self.window
+
+            if last < 0:
+                continue
+
+            if self.sampling == 'strided':
+                starts = np.arange(0, last + 1, self.stride)
+
+            elif self.sampling == 'random':
+                nb_windows = nb_samples // self.window if self.nb_windows is None else self.nb_windows
+                starts = rng.integers(0, last + 1, size=nb_windows)
+
+            else:
+                marks = planter.find_marks(group=self.mark_group)
+                centres = (marks['SampleLeft'].astype(np.int64) + marks['SampleRight']) // 2
+                starts = centres - self.window // 2
+                starts = starts[(starts >= 0) & (starts <= last)]
+
+            positions.append(np.stack([np.full(starts.shape[0], file_idx), starts], axis=1).astype(np.int64))
+
+        positions = np.concatenate(positions) if positions else np.empty((0, 2), dtype=np.int64)
+
+        if self.shuffle or self.sampling == 'random':
+            positions = positions[rng.permutation(positions.shape[0])]
+
+        # equal number of windows in every shard
+        nb_positions = positions.shape[0] // self.nb_shards * self.nb_shards
+
+        return positions[self.shard_id:nb_positions:self.nb_shards]
+
+
+    def _batches(self, positions:np.ndarray) -> list:
+        """Splits positions into batches with windows sorted by file and sample"""
+        batches = []
+        for first in range(0, positions.shape[0], self.batch_size):
+            batch = positions[first:first + self.batch_size]
+
+            if self.drop_last and batch.shape[0] < self.batch_size:
+                break
+
+            batches.append(batch[np.lexsort((batch[:, 1], batch[:, 0]))])
+
+        return batches
+
+
+    def __len__(self):
+        return len(self._batches(self.plan()))
+
+
+    def _fill(self, batch:np.ndarray, out:np.ndarray) -> WindowBatch:
+        """Reads windows of batch into buffer"""
+        marks = []
+        for idx, (file_idx, start) in enumerate(batch):
+            planter = self._planters[file_idx]
+            stop = start + self.window
+
+            planter._read_samples(self._channel_ids[file_idx], start, stop, out=out[idx], scaling=self._scalings[file_idx])
+
+            window_marks = planter.find_marks(sample_range=(start, stop))
+            window_marks['SampleLeft'] -= start
+            window_marks['SampleRight'] -= start
+            marks.append(window_marks)
+
+        return WindowBatch(out, self.channels, marks)
+
+
+    def __iter__(self):
+        batches = self._batches(self.plan())
+
+        # batch being consumed and batches read ahead
+        nb_buffers = self.prefetch + 2
+        buffers = np.empty((nb_buffers, self.batch_size, len(self.channels), self.window), dtype=self.dtype)
+
+        def submit(batch_idx):
+            batch = batches[batch_idx]
+            out = buffers[batch_idx % nb_buffers, :batch.shape[0]]
+            return executor.submit(self._fill, batch, out)
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        pending = collections.deque(submit(batch_idx) for batch_idx in range(min(self.prefetch + 1, len(batches))))
+
+        try:
+            for batch_idx in range(len(batches)):
+                result = pending.popleft().result()
+
+                if batch_idx + self.prefetch + 1 < len(batches):
+                    pending.append(submit(batch_idx + self.prefetch + 1))
+
+                yield result
+
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+        self.epoch += 1
@@ -0,0 +1,365 @@
+#!/usr/bin/env python
+
+import time
+import queue
+import asyncio
+import threading
+import collections
+import numpy as np
+from concurrent.futures import Future
+
+from .config.constants import *
+from .config.config import *
+from .utils import block_length
+
+
+class StreamWriter():
+    """Buffered writer appending samples to `Data`
+
+    Incoming blocks are collected in a preallocated buffer and written
+    to `Data` in whole, chunk-aligned blocks. `Data` is grown
+    geometrically ahead of the written samples and trimmed to the number
+    of written samples on `close`. Until then, the dataset may contain
+    preallocated samples past the end of the recording, except in SWMR
+    mode where it grows by written blocks only. Samples of integer
+    `Data` are quantized with the channel scaling.
+
+    Args:
+        planter (PlantedH5): Planter with opened, writable file containing `Data`.
+        block_samples (int, optional): Number of samples per written block. Rounded up
+            to a multiple of the chunk length. Defaults to `DEFAULT_PARAMS['block_bytes']`
+            worth of samples.
+        growth (float, optional): Growth factor of `Data` capacity. Defaults to 2.0.
+    """
+
+    def __init__(self, planter, block_samples:int=None, growth:float=2.0):
+        if DATASET_DNAME not in planter.f_obj:
+            raise ValueError(f'Dataset `{DATASET_DNAME}` does not exist. Create it first using `create_dataset`.')
+
+        if growth <= 1.0:
+            raise ValueError('Value of `growth` has to be larger than 1.0')
+
+        self._planter = planter
+        self._dset = planter._make_resizable(DATASET_DNAME)
+        self._growth = growth
+        self._scaling = planter._get_scaling()
+
+        chunk = self._dset.chunks[1]
+        if block_samples is None:
+            block_samples = block_length(self._dset, axis=1, block_bytes=DEFAULT_PARAMS['block_bytes'])
+
+        self._block_samples = -(-block_samples // chunk) * chunk
+        self._buffer = np.empty((self._dset.shape[0], self._block_samples), dtype=self._dset.dtype)
+
+        self._nb_samples = self._dset.shape[1]
+        self._fill = 0
+        self._closed = False
+
+        # first block only fills the partially written chunk
+        self._capacity = self._block_samples - self._nb_samples % chunk
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    @property
+    def nb_samples(self) -> int:
+        """Number of samples of the recording including buffered ones"""
+        return self._nb_samples + self._fill
+
+
+    def write(self, data_arr:np.ndarray):
+        """Appends samples to all channels
+
+        Args:
+            data_arr (np.ndarray): Array of shape (channels, samples).
+
+        Raises:
+            ValueError: Inconsistent shape of the input data.
+        """
+        if self._closed:
+            raise ValueError('Writing to closed stream writer.')
+
+        if data_arr.ndim != 2 or data_arr.shape[0] != self._buffer.shape[0]:
+            raise ValueError(
+                f"""Inconsistent shape of the input data.
+                Expected to be {self._buffer.shape[0]},
+                got {data_arr.shape[0]} instead."""
+                )
+
+        data_arr = self._planter._to_storage(data_arr, self._scaling)
+
+        pos = 0
+        while pos < data_arr.shape[1]:
+            length = min(self._capacity - self._fill, data_arr.shape[1] - pos)
+            self._buffer[:, self._fill:self._fill + length] = data_arr[:, pos:pos + length]
+            self._fill += length
+            pos += length
+
+            if self._fill == self._capacity:
+                self._write_buffer()
+
+
+    def _write_buffer(self):
+        """Writes buffered samples into `Data`, growing it when necessary"""
+        if not self._fill:
+            return
+
+        end = self._nb_samples + self._fill
+
+        # SWMR readers take the extent of `Data` as the recording length
+        if self._planter.f_obj.swmr_mode:
+            self._dset.resize(end, axis=1)
+        elif end > self._dset.shape[1]:
+            self._dset.resize(max(end, int(self._dset.shape[1] * self._growth)), axis=1)
+
+        self._dset[:, self._nb_samples:end] = self._buffer[:, :self._fill]
+        self._planter._update_overview(from_sample=self._nb_samples, stop=end)
+        self._planter._update_stats(from_sample=self._nb_samples, stop=end)
+        self._planter._update_checksums(from_sample=self._nb_samples, stop=end)
+        self._planter._swmr_flush()
+
+        self._nb_samples = end
+        self._fill = 0
+        self._capacity = self._block_samples - self._nb_samples % self._dset.chunks[1]
+
+
+    def flush(self):
+        """Writes buffered samples and flushes the file"""
+        self._write_buffer()
+        self._planter.f_obj.flush()
+
+
+    def close(self):
+        """Writes buffered samples and trims `Data` to the written length
+
+        `Data` is trimmed even if writing the buffer fails.
+        """
+        if self._closed:
+            return
+
+        try:
+            self._write_buffer()
+        finally:
+            self._dset.resize(self._nb_samples, axis=1)
+            self._closed = True
+            self._planter._stream_writer = None
+
+
+class AsyncWriter():
+    """Background thread writing submitted samples and marks
+
+    Submitted items are passed through a bounded queue to a dedicated
+    thread, which is the only one touching the file while the writer is
+    running. Samples are written through `StreamWriter`. An exception
+    raised in the thread stops writing and is re-raised on the next
+    submit, flush or on `close`; samples buffered before the error are
+    still written and `Data` is trimmed to the written length.
+
+    Args:
+        planter (PlantedH5): Planter with opened, writable file containing `Data`.
+        maxsize (int, optional): Maximum number of queued items. Defaults to 256.
+        block_samples (int, optional): Number of samples per written block.
+            Defaults to `DEFAULT_PARAMS['block_bytes']` worth of samples.
+        growth (float, optional): Growth factor of `Data` capacity. Defaults to 2.0.
+        nb_latencies (int, optional): Number of recent write latencies kept for metrics. Defaults to 4096.
+    """
+
+    def __init__(self, planter, maxsize:int=256, block_samples:int=None, growth:float=2.0, nb_latencies:int=4096):
+        self._planter = planter
+        self._stream = StreamWriter(planter, block_samples=block_samples, growth=growth)
+        self._nb_channels = self._stream._buffer.shape[0]
+
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._error = None
+        self._closed = False
+
+        self._lock = threading.Lock()
+        self._latencies = collections.deque(maxlen=nb_latencies)
+        self._counters = collections.Counter()
+
+        self._thread = threading.Thread(target=self._run, name='pyplanter-writer', daemon=True)
+        self._thread.start()
+
+
+    def _run(self):
+        """Writer thread loop"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            kind, payload, t_submit = item
+
+            if self._error is not None:
+                if kind == 'flush':
+                    payload.set_exception(self._error)
+                continue
+
+            try:
+                if kind == 'samples':
+                    self._stream.write(payload)
+                elif kind == 'marks':
+                    self._planter._append_rows(MARKS_DNAME, payload)
+                    self._planter._invalidate_marks_index()
+                elif kind == 'flush':
+                    self._stream.flush()
+                    payload.set_result(None)
+
+            except Exception as e:
+                self._error = e
+                if kind == 'flush':
+                    payload.set_exception(e)
+                continue
+
+            latency = time.perf_counter() - t_submit
+            with self._lock:
+                self._latencies.append(latency)
+                self._counters[kind + '_written'] += 1
+                if kind == 'samples':
+                    self._counters['nb_samples_written'] += payload.shape[1]
+
+        # buffered samples are written and `Data` trimmed after an error too
+        try:
+            self._stream.close()
+        except Exception as e:
+            if self._error is None:
+                self._error = e
+
+
+    def _put(self, item:tuple, block:bool, timeout:float) -> bool:
+        if self._closed:
+            raise ValueError('Submitting to closed writer.')
+
+        if self._error is not None:
+            raise self._error
+
+        try:
+            self._queue.put(item, block=block, timeout=timeout)
+        except queue.Full:
+            with self._lock:
+                self._counters['rejected'] += 1
+            return False
+
+        with self._lock:
+            self._counters[item[0] + '_submitted'] += 1
+            self._counters['max_queue_depth'] = max(self._counters['max_queue_depth'], self._queue.qsize())
+
+        return True
+
+
+    def submit_samples(self, data_arr:np.ndarray, block:bool=False, timeout:float=None) -> bool:
+        """Queues samples to be appended to all channels
+
+        The array is copied, so the caller may reuse its buffer.
+
+        Args:
+            data_arr (np.ndarray): Array of shape (channels, samples).
+            block (bool, optional): Wait for free space in the queue. Defaults to False.
+            timeout (float, optional): Maximum waiting time in seconds if `block`. Defaults to None.
+
+        Raises:
+            ValueError: Inconsistent shape of the input data.
+
+        Returns:
+            bool: False if the queue is full and samples were not accepted.
+        """
+        if data_arr.ndim != 2 or data_arr.shape[0] != self._nb_channels:
+            raise ValueError(
+                f"""Inconsistent shape of the input data.
+                Expected to be {self._nb_channels},
+                got {data_arr.shape[0]} instead."""
+                )
+
+        return self._put(('samples', np.array(data_arr), time.perf_counter()), block, timeout)
+
+
+    def submit_marks(self, marks:np.ndarray, block:bool=False, timeout:float=None) -> bool:
+        """Queues marks to be appended to `Marks`
+
+        The array is converted field by field into a copy in `MARKS_DTYPES`,
+        so invalid marks are rejected before they are queued.
+
+        Args:
+            marks (np.ndarray): 1-D structured array with fields of `MARKS_DTYPES`.
+            block (bool, optional): Wait for free space in the queue. Defaults to False.
+            timeout (float, optional): Maximum waiting time in seconds if `block`. Defaults to None.
+
+        Raises:
+            ValueError: Marks are not 1-D structured array with fields of `MARKS_DTYPES`.
+
+        Returns:
+            bool: False if the queue is full and marks were not accepted.
+        """
+        marks = np.asarray(marks)
+        field_names = [name for name, _ in MARKS_DTYPES]
+
+        if marks.ndim != 1 or marks.dtype.names is None or sorted(marks.dtype.names) != sorted(field_names):
+            raise ValueError(f'Marks have to be 1-D structured array with fields {field_names}.')
+
+        content = np.empty(marks.shape[0], dtype=MARKS_DTYPES)
+        for name in field_names:
+            content[name] = marks[name]
+
+        return self._put(('marks', content, time.perf_counter()), block, timeout)
+
+
+    def _submit_flush(self) -> Future:
+        future = Future()
+        self._put(('flush', future, time.perf_counter()), True, None)
+
+        return future
+
+
+    def flush(self, timeout:float=None):
+        """Blocks until all items submitted so far are written and flushed
+
+        Args:
+            timeout (float, optional): Maximum waiting time in seconds. Defaults to None.
+        """
+        self._submit_flush().result(timeout=timeout)
+
+
+    async def aflush(self):
+        """Awaitable variant of `flush` for use in asyncio event loops"""
+        await asyncio.wrap_future(self._submit_flush())
+
+
+    def metrics(self) -> dict:
+        """Snapshot of queue and latency metrics
+
+        Returns:
+            dict: Counters, current queue depth and write latencies (submit to write) in seconds.
+        """
+        with self._lock:
+            metrics = dict(self._counters)
+            latencies = np.array(self._latencies)
+
+        metrics['queue_depth'] = self._queue.qsize()
+        metrics['queue_size'] = self._queue.maxsize
+
+        if latencies.shape[0]:
+            metrics['latency_mean'] = float(latencies.mean())
+            metrics['latency_p50'] = float(np.percentile(latencies, 50))
+            metrics['latency_p99'] = float(np.percentile(latencies, 99))
+            metrics['latency_max'] = float(latencies.max())
+
+        return metrics
+
+
+    def close(self):
+        """Writes all queued items, stops the thread and re-raises its error"""
+        if self._closed:
+            return
+
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+        if self._error is not None:
+            raise self._error
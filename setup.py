@@ -17,6 +17,12 @@ setup(
             'h5py>=3.6.0',
             'numpy>=1.21.2',
         ],        
+        entry_points={
+            'console_scripts': [
+                'planter-import=pyplanter.importer:main',
+                'planter-verify=pyplanter.verify:main',
+            ],
+        },
         keywords=['python', 'signal plant', 'hdf5', 'h5py'],
         classifiers= [
             "Development Status :: 3 - Alpha",